@@ -28,10 +28,17 @@ Usage :
 Auteur: CHPS0706 Éléments Finis - M1 Nicolas Marano
 """
 
+import os
+import sys
 import numpy as np
 import scipy.sparse as sp
 import scipy.sparse.linalg as spla
 
+sys.path.append(os.path.dirname(__file__))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'python'))
+
+from mesh_io import read_msh
+
 
 # ============================================================================
 # FONCTIONS DE BASE (Exercice 5)
@@ -316,7 +323,7 @@ def assemblage_EF_P1(vertices, triangles, edges, boundary_edges, kappa_func, f_f
     Args:
         vertices: array (nv, 2) coordonnees des sommets
         triangles: array (nt, 3) indices des triangles (0-based)
-        edges: list des aretes avec labels
+        edges: aretes de bord avec labels, array (nbe, 3) : i1 i2 label
         boundary_edges: set des labels de bord Dirichlet (pour penalisation)
         kappa_func: Fonction κ(x, y)
         f_func: Fonction source f(x, y)
@@ -406,7 +413,7 @@ def assemblage_EF_P1(vertices, triangles, edges, boundary_edges, kappa_func, f_f
 # LECTURE MAILLAGE FREEFEM++ (.msh)
 # ============================================================================
 
-def read_freefem_mesh(filename):
+def read_freefem_mesh(filename, cache=False):
     """
     Lecture d'un maillage FreeFem++ au format .msh
 
@@ -416,46 +423,30 @@ def read_freefem_mesh(filename):
         Puis : triangles (i1 i2 i3 label)
         Puis : aretes bord (i1 i2 label)
 
+    La lecture est deleguee au lecteur commun mesh_io.read_msh.
+
     Args:
         filename: Chemin vers le fichier .msh
+        cache: Reutiliser le cache binaire <filename>.npz s'il est a jour
 
     Returns:
-        dict avec 'vertices', 'triangles', 'edges', 'dirichlet_labels'
+        dict avec 'vertices', 'triangles', 'edges' (array (nbe, 3) : i1 i2 label),
+        'dirichlet_labels'
     """
-    with open(filename, 'r') as f:
-        first_line = f.readline().strip().split()
-        nv = int(first_line[0])
-        nt = int(first_line[1])
-        nbe = int(first_line[2])
-
-        vertices = np.zeros((nv, 2))
-        for i in range(nv):
-            line = f.readline().strip().split()
-            vertices[i] = [float(line[0]), float(line[1])]
-
+    mesh = read_msh(filename, cache=cache)
 
-        triangles = np.zeros((nt, 3), dtype=int)
-        for i in range(nt):
-            line = f.readline().strip().split()
-            triangles[i] = [int(line[0])-1, int(line[1])-1, int(line[2])-1]
-
-
-        edges = []
-        for i in range(nbe):
-            line = f.readline().strip().split()
-            i1, i2, label = int(line[0])-1, int(line[1])-1, int(line[2])
-            edges.append((i1, i2, label))
+    edges = np.column_stack([mesh['edges'], mesh['edge_labels']])
 
     dirichlet_labels = {1}
 
     return {
-        'vertices': vertices,
-        'triangles': triangles,
+        'vertices': mesh['vertices'],
+        'triangles': mesh['triangles'],
         'edges': edges,
         'dirichlet_labels': dirichlet_labels,
-        'nv': nv,
-        'nt': nt,
-        'nbe': nbe
+        'nv': mesh['nv'],
+        'nt': mesh['nt'],
+        'nbe': mesh['nbe']
     }
 
 
@@ -174,6 +174,13 @@ def create_archive(output_file='EXERCICES_5_6.zip'):
         'python/validation_pen.py': 'validation_pen.py',
         'python/validation_pas_a_pas.py': 'validation_pas_a_pas.py',
         'python/exercice6_convergence.py': 'exercice6_convergence.py',
+        'python/mesh_io.py': 'mesh_io.py',
+        'python/utils.py': 'utils.py',
+        'python/error_norms.py': 'error_norms.py',
+        'python/solvers.py': 'solvers.py',
+        'python/renumbering.py': 'renumbering.py',
+        'python/mesh_topology.py': 'mesh_topology.py',
+        'python/p2_elements.py': 'p2_elements.py',
 
         # Documentation
         'results/DOCUMENTATION_EXERCICES_5_6.pdf': 'DOCUMENTATION_EXERCICES_5_6.pdf',
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Executable de substitution a FreeFem++ (tests de l'ordonnanceur de main.py)
+
+Accepte la meme ligne de commande que FreeFem++ (script.edp [maillage] [-nw]),
+affiche une sortie au format des scripts .edp puis se termine, sans ecrire
+de fichier de resultats. Permet de tester main.py --jobs N sur une machine
+sans FreeFem++ :
+
+    python main.py --skip-meshgen --skip-report --jobs 8 \
+                   --freefem-cmd "python3 freefem/freefem_stub.py"
+
+Variables d'environnement :
+    FREEFEM_STUB_DELAY : duree simulee d'un calcul en secondes (defaut : 0.5)
+    FREEFEM_STUB_EXIT  : code de retour (defaut : 0)
+"""
+
+import os
+import sys
+import time
+
+
+def main(argv):
+    if '-h' in argv or not argv:
+        print("FreeFem++ stub - usage : freefem_stub.py script.edp [maillage] [-nw]")
+        return 0
+
+    args = [a for a in argv if not a.startswith('-')]
+    script = args[0]
+    mesh = args[1] if len(args) > 1 else '-'
+
+    print("========================================")
+    print(f"Stub FreeFem++ : {script} {mesh} (pid {os.getpid()})")
+    print("========================================")
+    for line in range(3):
+        print(f"  ligne {line + 1}/3 ({mesh})")
+        sys.stdout.flush()
+        time.sleep(float(os.environ.get('FREEFEM_STUB_DELAY', 0.5)) / 3)
+
+    code = int(os.environ.get('FREEFEM_STUB_EXIT', 0))
+    if code != 0:
+        print(f"Error : code de retour simule {code}", file=sys.stderr)
+    else:
+        print(f"[OK] {mesh} traite")
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -92,8 +92,42 @@ def read_convergence_data(method='standard'):
     }
 
 
-def generate_pdf_report():
-    """Fonction principale de génération du rapport PDF"""
+def convergence_data_from_results(solve_results):
+    """
+    Données de convergence à partir des résultats structurés du backend Python
+
+    Args:
+        solve_results: Liste de résultats python_backend.solve_mesh (ou None)
+
+    Returns:
+        dict avec 'errors' et 'orders' (même format que read_convergence_data)
+    """
+    import math
+
+    errors = [res['error_H1'] if res is not None else None for res in solve_results]
+    orders = []
+    for i in range(len(errors) - 1):
+        if errors[i] is not None and errors[i+1] is not None:
+            orders.append(math.log(errors[i] / errors[i+1]) / math.log(2.0))
+        else:
+            orders.append(None)
+
+    return {
+        'errors': errors,
+        'orders': orders
+    }
+
+
+def generate_pdf_report(convergence_data=None):
+    """
+    Fonction principale de génération du rapport PDF
+
+    Args:
+        convergence_data: dict {'standard': ..., 'penalized': ...} au format de
+                          read_convergence_data (backend Python) ; par défaut,
+                          lecture des fichiers results/m*_error*.txt
+    """
+    convergence_data = convergence_data or {}
 
     print("\n" + "="*70)
     print("GÉNÉRATION DU RAPPORT PDF")
@@ -141,7 +175,7 @@ def generate_pdf_report():
 
     # 5. Lecture des données de convergence - Standard
     print("  [5/9] Lecture des données de convergence (standard)...")
-    convergence_standard = read_convergence_data('standard')
+    convergence_standard = convergence_data.get('standard') or read_convergence_data('standard')
 
     # Fusion des données pour le tableau standard
     table_data_standard = {
@@ -162,7 +196,7 @@ def generate_pdf_report():
 
     # 7. Lecture des données de convergence - Pénalisation
     print("  [7/9] Lecture des données de convergence (pénalisation)...")
-    convergence_penalized = read_convergence_data('penalized')
+    convergence_penalized = convergence_data.get('penalized') or read_convergence_data('penalized')
 
     # Fusion des données pour le tableau pénalisation
     table_data_penalized = {
@@ -9,13 +9,17 @@ Exercices realises :
 1. Calculs analytiques de f et uE
 2. Generation et analyse des maillages
 3. Resolution avec FreeFem++ (standard et penalisation)
+   ou dans le processus Python (--backend python, sans FreeFem++)
 4. Analyse de convergence et generation des graphiques
 """
 
 import os
 import sys
+import time
+import shlex
 import subprocess
 import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Ajout du chemin python pour les imports
 sys.path.append(os.path.join(os.path.dirname(__file__), 'python'))
@@ -24,6 +28,16 @@ from python.mesh_analysis import analyze_all_meshes
 from python.convergence_analysis import analyze_convergence
 
 
+# Delai maximal d'une resolution FreeFem++ (secondes)
+FREEFEM_TIMEOUT = 60
+
+# Scripts FreeFem++ par methode
+FREEFEM_SCRIPTS = {
+    'standard': 'freefem/validation.edp',
+    'penalized': 'freefem/validation_pen.edp'
+}
+
+
 def print_banner():
     """Affiche la banniere du programme"""
     banner = """
@@ -47,10 +61,32 @@ def print_banner():
         print("="*70 + "\n")
 
 
-def check_freefem():
-    """Verifie que FreeFem++ est installe et accessible"""
+def freefem_command(freefem_cmd):
+    """Ligne de commande FreeFem++ sous forme de liste ("python3 stub.py" -> 2 elements)"""
+    return shlex.split(freefem_cmd)
+
+
+def check_freefem(freefem_cmd=None):
+    """
+    Verifie que FreeFem++ est installe et accessible
+
+    Args:
+        freefem_cmd: Commande imposee (ex. executable de substitution),
+                     sinon FreeFem++ puis freefem++ dans le PATH
+    """
     print("\n[1/7] Verification de FreeFem++...")
 
+    if freefem_cmd is not None:
+        try:
+            subprocess.run(freefem_command(freefem_cmd) + ['-h'],
+                           capture_output=True,
+                           timeout=5)
+            print(f"[OK] Commande FreeFem++ : {freefem_cmd}")
+            return freefem_cmd
+        except (subprocess.TimeoutExpired, FileNotFoundError, PermissionError):
+            print(f"[ERREUR] Commande {freefem_cmd} non executable")
+            return None
+
     # Essayer d'abord FreeFem++ (capitale - installation Ubuntu)
     try:
         result = subprocess.run(['FreeFem++', '-h'],
@@ -90,7 +126,7 @@ def generate_meshes(freefem_cmd, graphics=False):
     os.makedirs('meshes', exist_ok=True)
 
     # Execution de FreeFem++
-    freefem_args = [freefem_cmd, script]
+    freefem_args = freefem_command(freefem_cmd) + [script]
     if not graphics:  # Par defaut, pas de graphiques (WSL)
         freefem_args.append('-nw')
 
@@ -121,6 +157,15 @@ def generate_meshes(freefem_cmd, graphics=False):
         return False
 
 
+def generate_meshes_python():
+    """Genere les maillages m1..m4 manquants sans FreeFem++ (mesh_generator)"""
+    from python.mesh_generator import generate_convergence_meshes
+
+    print("\n[2/7] Generation des maillages (Python)...")
+    generate_convergence_meshes(range(1, 5), 'meshes')
+    print("[OK] Maillages disponibles")
+
+
 def analyze_meshes():
     """Analyse la qualite et le pas des maillages"""
     print("\n[3/7] Analyse des maillages (Exercice 2)...")
@@ -134,70 +179,190 @@ def analyze_meshes():
         return None
 
 
-def solve_with_freefem(freefem_cmd, method='standard', graphics=False):
-    """Resout le probleme avec FreeFem++"""
+def _run_freefem_job(job, timeout=FREEFEM_TIMEOUT):
+    """
+    Execute une resolution FreeFem++ (appele dans un thread du pool)
 
-    if method == 'standard':
-        print("\n[4/7] Resolution avec FreeFem++ (methode standard - Exercice 3.1)...")
-        script = 'freefem/validation.edp'
-    else:
-        print("\n[5/7] Resolution avec FreeFem++ (methode penalisation - Exercice 3.2)...")
-        script = 'freefem/validation_pen.edp'
+    stdout et stderr sont captures dans le resultat : l'affichage est fait
+    par le thread principal, job par job, sans melange des sorties.
 
-    if not os.path.exists(script):
-        print(f"[ERREUR] Script {script} non trouve!")
-        return False
+    Args:
+        job: dict avec 'method', 'mesh_name', 'args'
+
+    Returns:
+        dict du job complete par 'status' ('ok', 'timeout', 'error'),
+        'returncode', 'stdout', 'stderr', 'time'
+    """
+    t0 = time.perf_counter()
+    result = dict(job, status='ok', returncode=None, stdout='', stderr='')
+
+    try:
+        proc = subprocess.run(job['args'],
+                              capture_output=True,
+                              text=True,
+                              timeout=timeout)
+        result.update(returncode=proc.returncode, stdout=proc.stdout, stderr=proc.stderr)
+    except subprocess.TimeoutExpired as e:
+        result.update(status='timeout', stdout=e.stdout or '', stderr=e.stderr or '')
+        if isinstance(result['stdout'], bytes):
+            result['stdout'] = result['stdout'].decode(errors='replace')
+        if isinstance(result['stderr'], bytes):
+            result['stderr'] = result['stderr'].decode(errors='replace')
+    except Exception as e:
+        result.update(status='error', stderr=str(e))
+
+    result['time'] = time.perf_counter() - t0
+    return result
+
+
+def _print_freefem_job(result, done, total):
+    """Affiche le bilan d'un job termine (bloc contigu)"""
+    print(f"\n  [{done}/{total}] {result['mesh_name']} ({result['method']}) "
+          f"- {result['time']:.2f} s")
+
+    if result['status'] == 'timeout':
+        print(f"  [X] Timeout pour {result['mesh_name']}")
+        return
+    if result['status'] == 'error':
+        print(f"  [X] Erreur : {result['stderr']}")
+        return
+
+    # FreeFem++ peut retourner un code non-zero meme avec succes (warnings)
+    # On affiche la sortie et on verifie s'il y a des vraies erreurs
+    for line in result['stdout'].split('\n'):
+        if 'Erreur' in line or 'H¹' in line or '[OK]' in line or '===' in line:
+            print(f"    {line}")
+
+    # Verifier s'il y a eu une vraie erreur fatale
+    if result['returncode'] != 0 and result['stderr'] and 'Error' in result['stderr']:
+        print(f"  [WARN]  Avertissement pour {result['mesh_name']} (code retour: {result['returncode']})")
+        if result['stderr'].strip():
+            print(f"    {result['stderr']}")
+
+
+def run_freefem_jobs(jobs, max_workers=1, timeout=FREEFEM_TIMEOUT):
+    """
+    Ordonnanceur borne : au plus max_workers processus FreeFem++ simultanes
+
+    Les processus FreeFem++ sont lances depuis un pool de threads (le GIL est
+    relache pendant l'attente des sous-processus). Chaque job est affiche en
+    entier des qu'il se termine.
+
+    Args:
+        jobs: Liste de dicts avec 'method', 'mesh_name', 'args'
+        max_workers: Nombre maximal de FreeFem++ simultanes
+        timeout: Delai maximal par job (secondes)
+
+    Returns:
+        Liste des resultats (voir _run_freefem_job), dans l'ordre de jobs
+    """
+    results = [None] * len(jobs)
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        futures = {pool.submit(_run_freefem_job, job, timeout): i for i, job in enumerate(jobs)}
+        for done, future in enumerate(as_completed(futures), 1):
+            i = futures[future]
+            results[i] = future.result()
+            _print_freefem_job(results[i], done, len(jobs))
+
+    return results
+
+
+def solve_with_freefem(freefem_cmd, method='standard', graphics=False, jobs=1):
+    """
+    Resout le probleme avec FreeFem++
+
+    Args:
+        freefem_cmd: Commande FreeFem++
+        method: 'standard', 'penalized', ou liste/tuple de methodes
+                (tous les couples maillage/methode partagent le meme pool)
+        graphics: Fenetres graphiques FreeFem++
+        jobs: Nombre maximal de FreeFem++ simultanes
+
+    Returns:
+        bool (une methode) ou dict {methode: bool} (plusieurs methodes)
+    """
+    methods = [method] if isinstance(method, str) else list(method)
+
+    for m in methods:
+        if m == 'standard':
+            print("\n[4/7] Resolution avec FreeFem++ (methode standard - Exercice 3.1)...")
+        else:
+            print("\n[5/7] Resolution avec FreeFem++ (methode penalisation - Exercice 3.2)...")
 
     # Creation du dossier results
     os.makedirs('results', exist_ok=True)
 
-    # Resolution pour chaque maillage
+    # Un job par couple (maillage, methode)
     mesh_files = ['meshes/m1.msh', 'meshes/m2.msh', 'meshes/m3.msh', 'meshes/m4.msh']
     mesh_names = ['m1', 'm2', 'm3', 'm4']
 
-    for mesh_file, mesh_name in zip(mesh_files, mesh_names):
-        if not os.path.exists(mesh_file):
-            print(f"[WARN]  Maillage {mesh_file} non trouve, ignore")
+    status = {}
+    job_list = []
+    for m in methods:
+        script = FREEFEM_SCRIPTS['standard' if m == 'standard' else 'penalized']
+        if not os.path.exists(script):
+            print(f"[ERREUR] Script {script} non trouve!")
+            status[m] = False
             continue
+        status[m] = True
 
-        print(f"\n  Traitement de {mesh_name}...")
+        for mesh_file, mesh_name in zip(mesh_files, mesh_names):
+            if not os.path.exists(mesh_file):
+                print(f"[WARN]  Maillage {mesh_file} non trouve, ignore")
+                continue
 
-        # Construction des arguments FreeFem++
-        freefem_args = [freefem_cmd, script, mesh_file]
-        if not graphics:  # Par defaut, pas de graphiques (WSL)
-            freefem_args.append('-nw')
+            # Construction des arguments FreeFem++
+            freefem_args = freefem_command(freefem_cmd) + [script, mesh_file]
+            if not graphics:  # Par defaut, pas de graphiques (WSL)
+                freefem_args.append('-nw')
 
-        try:
-            result = subprocess.run(freefem_args,
-                                    capture_output=True,
-                                    text=True,
-                                    timeout=60)
-
-            # FreeFem++ peut retourner un code non-zero meme avec succes (warnings)
-            # On affiche la sortie et on verifie s'il y a des vraies erreurs
-            lines = result.stdout.split('\n')
-            for line in lines:
-                if 'Erreur' in line or 'H¹' in line or '[OK]' in line or '===' in line:
-                    print(f"    {line}")
-
-            # Verifier s'il y a eu une vraie erreur fatale
-            if result.returncode != 0 and result.stderr and 'Error' in result.stderr:
-                print(f"  [WARN]  Avertissement pour {mesh_name} (code retour: {result.returncode})")
-                if result.stderr.strip():
-                    print(f"    {result.stderr}")
-
-        except subprocess.TimeoutExpired:
-            print(f"  [X] Timeout pour {mesh_name}")
-            continue
-        except Exception as e:
-            print(f"  [X] Erreur : {e}")
-            continue
+            job_list.append({'method': m, 'mesh_name': mesh_name, 'args': freefem_args})
+
+    print(f"\n  {len(job_list)} resolutions FreeFem++, {jobs} en parallele...")
+    t0 = time.perf_counter()
+    run_freefem_jobs(job_list, max_workers=jobs)
+
+    for m in methods:
+        if status[m]:
+            print(f"\n[OK] Resolution terminee ({m})")
+    print(f"  Temps ecoule : {time.perf_counter() - t0:.2f} s")
+
+    return status[methods[0]] if isinstance(method, str) else status
+
+
+def solve_with_python(methods=('standard', 'penalized')):
+    """
+    Resout le probleme dans le processus courant (backend Python)
+
+    Returns:
+        dict {methode: [resultat par maillage]} (voir python_backend.solve_mesh),
+        ou None en cas d'erreur
+    """
+    from python.python_backend import run_python_backend, format_timings
+
+    print("\n[4-5/7] Resolution avec le backend Python (standard + penalisation)...")
+
+    mesh_files = ['meshes/m1.msh', 'meshes/m2.msh', 'meshes/m3.msh', 'meshes/m4.msh']
+
+    try:
+        t0 = time.perf_counter()
+        results = run_python_backend(mesh_files, methods=methods)
+        elapsed = time.perf_counter() - t0
+    except Exception as e:
+        print(f"[X] Erreur : {e}")
+        return None
+
+    for method in methods:
+        print(f"\n  Temps par etape (ms) - {method}")
+        for line in format_timings(results[method]).split('\n'):
+            print(f"    {line}")
 
-    print(f"\n[OK] Resolution terminee ({method})")
-    return True
+    print(f"\n[OK] Resolution terminee ({elapsed:.2f} s)")
+    return results
 
 
-def analyze_convergence_results(mesh_results, method='standard'):
+def analyze_convergence_results(mesh_results, method='standard', solve_results=None):
     """Analyse la convergence et genere les graphiques"""
 
     if method == 'standard':
@@ -210,7 +375,7 @@ def analyze_convergence_results(mesh_results, method='standard'):
         return False
 
     try:
-        analyze_convergence(mesh_results, method=method)
+        analyze_convergence(mesh_results, method=method, solve_results=solve_results)
         print(f"[OK] Analyse de convergence terminee ({method})")
         return True
     except Exception as e:
@@ -220,10 +385,29 @@ def analyze_convergence_results(mesh_results, method='standard'):
         return False
 
 
-def generate_pdf_report():
-    """Genere le rapport PDF final"""
+def generate_pdf_report(solve_results=None):
+    """
+    Genere le rapport PDF final
+
+    Args:
+        solve_results: Resultats du backend Python ; si fournis, le rapport
+                       est genere dans le processus courant a partir de ces
+                       resultats (sans relire results/m*_error*.txt)
+    """
     print("\n[6/7] Generation du rapport PDF...")
 
+    if solve_results is not None:
+        try:
+            import generate_report
+        except ImportError as e:
+            print(f"[X] Generation du PDF impossible : {e}")
+            print("  pip3 install -r requirements.txt")
+            return False
+
+        convergence_data = {method: generate_report.convergence_data_from_results(res)
+                            for method, res in solve_results.items()}
+        return generate_report.generate_pdf_report(convergence_data)
+
     try:
         result = subprocess.run([sys.executable, 'generate_report.py'],
                                 capture_output=True,
@@ -246,8 +430,14 @@ def generate_pdf_report():
         return False
 
 
-def display_summary():
-    """Affiche un resume des resultats"""
+def display_summary(backend='freefem'):
+    """
+    Affiche un resume des resultats
+
+    Args:
+        backend: 'python' : les erreurs sont transmises en memoire, les
+                 fichiers results/m*_error*.txt ne sont pas attendus
+    """
     print("\n[7/7] Resume des resultats...")
     print("\n" + "="*70)
     print("FICHIERS GÉNÉRÉS")
@@ -274,6 +464,9 @@ def display_summary():
         ('results/RAPPORT_CONVERGENCE.pdf', 'Rapport PDF final'),
     ]
 
+    if backend == 'python':
+        files_to_check = [(f, d) for f, d in files_to_check if '_error' not in f]
+
     for filepath, description in files_to_check:
         exists = os.path.exists(filepath)
         status = "[OK]" if exists else "[X]"
@@ -308,14 +501,24 @@ def main():
                         help='Uniquement analyser les resultats existants')
     parser.add_argument('--graphics', action='store_true',
                         help='Activer les fenetres graphiques FreeFem++ (necessite serveur X)')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                        help='Nombre maximal de FreeFem++ simultanes (defaut : nombre de coeurs)')
+    parser.add_argument('--backend', choices=['freefem', 'python'], default='freefem',
+                        help='Resolution par FreeFem++ (defaut) ou dans le processus Python')
+    parser.add_argument('--freefem-cmd', default=None,
+                        help='Commande FreeFem++ a utiliser (ex. "python3 freefem/freefem_stub.py")')
 
     args = parser.parse_args()
 
     print_banner()
 
-    # Verification de FreeFem++
-    if not args.only_analysis:
-        freefem_cmd = check_freefem()
+    python_backend = args.backend == 'python'
+
+    # Verification de FreeFem++ (inutile avec le backend Python)
+    if python_backend:
+        freefem_cmd = None
+    elif not args.only_analysis:
+        freefem_cmd = check_freefem(args.freefem_cmd)
         if freefem_cmd is None and not args.skip_solve:
             print("\n[WARN]  FreeFem++ requis pour continuer")
             return 1
@@ -324,7 +527,9 @@ def main():
 
     # Generation des maillages
     if not args.skip_meshgen and not args.only_analysis:
-        if not generate_meshes(freefem_cmd, graphics=args.graphics):
+        if python_backend:
+            generate_meshes_python()
+        elif not generate_meshes(freefem_cmd, graphics=args.graphics):
             print("\n[X] Échec de la generation des maillages")
             return 1
 
@@ -338,25 +543,40 @@ def main():
     # RÉSOLUTION AVEC LES 2 MÉTHODES (standard + penalisation)
     # ========================================================================
 
+    # Les 8 couples maillage/methode sont resolus ensemble (--jobs en parallele)
+    solve_status = {'standard': True, 'penalized': True}
+    python_results = None
+    if python_backend and not args.skip_solve and not args.only_analysis:
+        python_results = solve_with_python()
+        if python_results is None:
+            solve_status = {'standard': False, 'penalized': False}
+    elif not args.skip_solve and not args.only_analysis:
+        solve_status = solve_with_freefem(freefem_cmd, method=('standard', 'penalized'),
+                                          graphics=args.graphics, jobs=args.jobs)
+
+    def results_for(method):
+        return python_results[method] if python_results is not None else None
+
     # Methode 1 : Standard (Exercice 3.1)
-    if not args.skip_solve and not args.only_analysis:
-        if not solve_with_freefem(freefem_cmd, method='standard', graphics=args.graphics):
-            print("\n[X] Échec de la resolution standard")
-            return 1
+    if not solve_status['standard']:
+        print("\n[X] Échec de la resolution standard")
+        return 1
 
     # Analyse de convergence - Standard
-    if not analyze_convergence_results(mesh_results, method='standard'):
+    if not analyze_convergence_results(mesh_results, method='standard',
+                                       solve_results=results_for('standard')):
         print("\n[X] Échec de l'analyse de convergence standard")
         return 1
 
     # Methode 2 : Penalisation (Exercice 3.2) - TOUJOURS EXÉCUTÉE
     if not args.skip_solve and not args.only_analysis:
-        if not solve_with_freefem(freefem_cmd, method='penalized', graphics=args.graphics):
+        if not solve_status['penalized']:
             print("\n[WARN]  Methode de penalisation echouee")
             # On continue quand meme pour generer le PDF avec les resultats standard
         else:
             # Analyse de convergence - Penalisation
-            if not analyze_convergence_results(mesh_results, method='penalized'):
+            if not analyze_convergence_results(mesh_results, method='penalized',
+                                               solve_results=results_for('penalized')):
                 print("\n[WARN]  Analyse penalisation echouee")
 
     # ========================================================================
@@ -364,11 +584,11 @@ def main():
     # ========================================================================
 
     if not args.skip_report:
-        if not generate_pdf_report():
+        if not generate_pdf_report(python_results):
             print("\n[WARN]  Generation du PDF echouee (resultats disponibles quand meme)")
 
     # Resume final
-    display_summary()
+    display_summary(args.backend)
 
     print("\n" + "="*70)
     print("[OK] ÉTUDE DE CONVERGENCE TERMINÉE AVEC SUCCÈS")
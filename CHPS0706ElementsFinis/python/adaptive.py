@@ -0,0 +1,437 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Raffinement adaptatif : estimateur a posteriori par residus, marquage de
+Dorfler et bisection par le plus recent sommet (newest vertex bisection)
+
+Boucle SOLVE -> ESTIMATE -> MARK -> REFINE :
+
+    ESTIMATE  indicateur par triangle (residu interieur + sauts du flux)
+
+        η_T^2 = h_T^2 ||f||_T^2                                (residu, Δu_h = 0 en P1)
+              + 1/2 Σ_{E ⊂ T interieure} h_E ||[κ ∇u_h · n]||_E^2
+              +     Σ_{E ⊂ T Neumann}    h_E ||κ ∇u_h · n||_E^2   (g = 0, label 2)
+
+        calcule sans boucle : ∇u_h par barycentric_gradients, aretes et
+        triangles voisins par MeshTopology (edge_triangles), sommes par bincount.
+        Les aretes Dirichlet (penalisees, label 1) ne contribuent pas.
+
+    MARK      Dorfler : plus petit ensemble M de triangles tel que
+              Σ_M η_T^2 >= θ Σ η_T^2 (tri decroissant + somme cumulee)
+
+    REFINE    bisection du plus recent sommet : le triangle (a, b, c) est
+              coupe par le milieu m de son arete de raffinement (b, c) en
+              (m, a, b) et (m, c, a) ; le nouveau sommet m est en tete, donc
+              l'arete de raffinement des enfants est l'arete opposee a m.
+              Fermeture de conformite : toute arete marquee d'un triangle
+              force le marquage de son arete de raffinement (iteration
+              vectorisee jusqu'a stabilite), puis bisections successives
+              tant qu'une arete de raffinement est marquee.
+
+Au depart, le sommet 0 de chaque triangle est oppose a son plus grand cote.
+La comparaison se fait avec le raffinement uniforme (rouge) du meme maillage
+initial, a nombre d'inconnues (N = nv) egal, en semi-norme H1 exacte
+|u - u_h|_H1 (quadrature a 7 points).
+
+Usage :
+    python adaptive.py meshes/m1.msh --target 2e-2 --theta 0.5
+"""
+
+import os
+import sys
+import time
+import numpy as np
+from typing import Dict
+
+sys.path.append(os.path.dirname(__file__))
+
+from mesh_io import read_msh
+from mesh_topology import MeshTopology
+from utils import barycentric_gradients
+from error_norms import (quadrature_rule, quadrature_points, compute_error_norms,
+                         energy_norm_error)
+from solvers import solve_linear_system
+from validation_pen import (assemblage_EF_P1_vectorise, _eval_par_lot, fct_kappa, fct_f,
+                            fct_alpha, fct_uE, fct_u, grad_u_exact)
+
+
+# ============================================================================
+# ESTIMATEUR A POSTERIORI
+# ============================================================================
+
+def residual_estimator(vertices, triangles, uh, f_func, kappa_func=1.0, topology=None,
+                       neumann_labels=(2,), n_points=3):
+    """
+    Indicateurs d'erreur par residus η_T^2 de la solution P1 u_h
+
+    Args:
+        vertices: (nv, >=2) coordonnees
+        triangles: (nt, >=3) connectivite
+        uh: Valeurs nodales de u_h
+        f_func: Second membre f(x, y) (accepte des tableaux)
+        kappa_func: κ(x, y) ou constante, evaluee au barycentre
+        topology: MeshTopology du maillage (avec labels de bord pour les
+                  aretes de Neumann) ; construite sans labels si None
+        neumann_labels: Labels des aretes de Neumann homogene
+        n_points: Quadrature de ||f||_T^2 (voir error_norms.quadrature_rule)
+
+    Returns:
+        eta2: (nt,) indicateurs au carre (η = sqrt(eta2.sum()))
+    """
+    vertices = np.asarray(vertices, dtype=float)[:, :2]
+    tri = np.asarray(triangles)[:, :3]
+    topology = topology if topology is not None else MeshTopology(vertices, tri)
+    nt = len(tri)
+
+    grads, areas = barycentric_gradients(vertices, tri)
+    xG, yG = vertices[tri].mean(axis=1).T
+    kappa = kappa_func if callable(kappa_func) else (lambda x, y: kappa_func)
+    flux = _eval_par_lot(kappa, xG, yG)[:, None] * np.einsum('ti,tid->td', uh[tri], grads)
+
+    # Residu interieur : h_T^2 ||f||_T^2, h_T = plus grand cote
+    p = vertices[tri]
+    h_T = np.sqrt(((p - np.roll(p, -1, axis=1))**2).sum(axis=2).max(axis=1))
+    bary, weights = quadrature_rule(n_points)
+    xq = quadrature_points(vertices, tri, bary)
+    eta2 = h_T**2 * areas * (f_func(xq[..., 0], xq[..., 1])**2 @ weights)
+
+    # Sauts du flux normal : constants sur chaque arete, ||.||_E^2 = L_E j^2
+    E = topology.edges
+    d = vertices[E[:, 1]] - vertices[E[:, 0]]
+    length2 = (d**2).sum(axis=1)
+    normal = np.column_stack([d[:, 1], -d[:, 0]]) / np.sqrt(length2)[:, None]
+    t0, t1 = topology.edge_triangles[:, 0], topology.edge_triangles[:, 1]
+
+    inner = t1 >= 0
+    jump = ((flux[t0[inner]] - flux[t1[inner]]) * normal[inner]).sum(axis=1)
+    half = 0.5 * length2[inner] * jump**2
+    eta2 += np.bincount(t0[inner], weights=half, minlength=nt)
+    eta2 += np.bincount(t1[inner], weights=half, minlength=nt)
+
+    neumann = ~inner & np.isin(topology.edge_labels, list(neumann_labels))
+    flux_n = (flux[t0[neumann]] * normal[neumann]).sum(axis=1)
+    eta2 += np.bincount(t0[neumann], weights=length2[neumann] * flux_n**2, minlength=nt)
+
+    return eta2
+
+
+def dorfler_marking(eta2, theta=0.5):
+    """
+    Marquage de Dorfler : triangles aux plus grands indicateurs dont la somme
+    atteint θ Σ η_T^2
+
+    Returns:
+        Indices des triangles marques
+    """
+    order = np.argsort(-eta2, kind='stable')
+    cumulative = np.cumsum(eta2[order])
+    n_marked = min(int(np.searchsorted(cumulative, theta * cumulative[-1])) + 1, len(eta2))
+    return order[:n_marked]
+
+
+# ============================================================================
+# BISECTION DU PLUS RECENT SOMMET
+# ============================================================================
+
+def longest_edge_ordering(mesh: Dict) -> Dict:
+    """
+    Copie du maillage ou le sommet 0 de chaque triangle est oppose a son
+    plus grand cote (arete de raffinement initiale). Permutation circulaire :
+    l'orientation des triangles est conservee.
+    """
+    V = mesh['vertices']
+    T = np.asarray(mesh['triangles'])
+    p = V[T]
+    length2 = ((np.roll(p, -1, axis=1) - p)**2).sum(axis=2)     # arete locale k = (k, k+1)
+    start = (np.argmax(length2, axis=1) + 2) % 3
+    cols = (start[:, None] + np.arange(3)) % 3
+    return dict(mesh, triangles=np.take_along_axis(T, cols, axis=1).astype(np.int32))
+
+
+def newest_vertex_bisection(mesh: Dict, marked) -> Dict:
+    """
+    Raffinement conforme des triangles marques par bisection du plus recent
+    sommet (arete de raffinement = arete locale (1, 2), opposee au sommet 0)
+
+    Args:
+        mesh: dict au format mesh_io.read_msh (triangles ordonnes, voir
+              longest_edge_ordering)
+        marked: Indices des triangles a raffiner
+
+    Returns:
+        Maillage raffine (meme format, labels de bord conserves)
+    """
+    V = mesh['vertices']
+    T = mesh['triangles'].astype(np.int64)
+    nv = len(V)
+    topology = MeshTopology(V, T, mesh['edges'], mesh['edge_labels'])
+    tri_edges = topology.triangle_edges
+
+    # Fermeture : une arete marquee impose l'arete de raffinement du triangle
+    edge_marked = np.zeros(topology.n_edges, dtype=bool)
+    edge_marked[tri_edges[np.asarray(marked, dtype=np.int64), 1]] = True
+    while True:
+        pending = edge_marked[tri_edges].any(axis=1) & ~edge_marked[tri_edges[:, 1]]
+        if not pending.any():
+            break
+        edge_marked[tri_edges[pending, 1]] = True
+
+    split = np.flatnonzero(edge_marked)
+    n_new = len(split)
+    lo, hi = topology.edges[split, 0], topology.edges[split, 1]
+    mid = nv + np.arange(n_new)
+    N = nv + n_new
+    split_keys = lo * N + hi                                   # tries (cles lo * nv + hi triees)
+
+    def midpoint(i, j):
+        keys = np.minimum(i, j) * N + np.maximum(i, j)
+        pos = np.minimum(np.searchsorted(split_keys, keys), max(n_new - 1, 0))
+        found = split_keys[pos] == keys if n_new else np.zeros(len(keys), dtype=bool)
+        return found, mid[pos] if n_new else pos
+
+    # Bisections successives (au plus 3 generations par triangle et par appel)
+    labels = np.asarray(mesh['triangle_labels'])
+    while True:
+        found, m = midpoint(T[:, 1], T[:, 2])
+        if not found.any():
+            break
+        a, b, c = T[found].T
+        m = m[found]
+        T = np.vstack([T[~found], np.column_stack([m, a, b]), np.column_stack([m, c, a])])
+        labels = np.concatenate([labels[~found], np.tile(labels[found], 2)])
+
+    vertices = np.vstack([V, 0.5 * (V[lo] + V[hi])])
+
+    # Aretes de bord coupees : (i, j) -> (i, m), (m, j)
+    E = mesh['edges'].astype(np.int64)
+    cut, m = midpoint(E[:, 0], E[:, 1])
+    edges = np.vstack([E[~cut], np.column_stack([E[cut, 0], m[cut]]),
+                       np.column_stack([m[cut], E[cut, 1]])])
+    edge_labels = np.concatenate([mesh['edge_labels'][~cut], np.tile(mesh['edge_labels'][cut], 2)])
+
+    vertex_labels = np.concatenate([mesh['vertex_labels'], topology.edge_labels[split]])
+
+    return {
+        'vertices': vertices,
+        'vertex_labels': vertex_labels.astype(np.int32),
+        'triangles': T.astype(np.int32),
+        'triangle_labels': labels,
+        'edges': edges.astype(np.int32),
+        'edge_labels': edge_labels,
+        'nv': len(vertices),
+        'nt': len(T),
+        'nbe': len(edges)
+    }
+
+
+# ============================================================================
+# BOUCLE ADAPTATIVE ET COMPARAISON AU RAFFINEMENT UNIFORME
+# ============================================================================
+
+def solve_and_estimate(mesh: Dict, estimate=True):
+    """
+    Probleme penalise de validation_pen sur le maillage, erreur H1 exacte et
+    indicateurs
+
+    Returns:
+        dict avec 'nv', 'nt', 'error_H1' (|u - u_h|_H1), 'error_energy' (e_h),
+        'eta', 'eta2' (si estimate), 'solve_time' (assemblage + resolution)
+    """
+    t0 = time.perf_counter()
+    edges = np.column_stack([mesh['edges'], mesh['edge_labels']])
+    A, F, K = assemblage_EF_P1_vectorise(mesh['vertices'], mesh['triangles'], edges, {1},
+                                         fct_kappa, fct_f, fct_alpha, fct_uE, verbose=False)
+    Uh = solve_linear_system(A, F, method='direct')['solution']
+    solve_time = time.perf_counter() - t0
+
+    norms = compute_error_norms(mesh['vertices'], mesh['triangles'], Uh, None, grad_u_exact,
+                                n_points=7)
+    result = {'nv': mesh['nv'], 'nt': mesh['nt'], 'error_H1': norms['H1_semi'],
+              'error_energy': energy_norm_error(Uh, mesh['vertices'], K, fct_u),
+              'solve_time': solve_time}
+
+    if estimate:
+        topology = MeshTopology(mesh['vertices'], mesh['triangles'], mesh['edges'],
+                                mesh['edge_labels'])
+        eta2 = residual_estimator(mesh['vertices'], mesh['triangles'], Uh, fct_f, fct_kappa,
+                                  topology)
+        result['eta2'] = eta2
+        result['eta'] = float(np.sqrt(eta2.sum()))
+    return result
+
+
+def adaptive_refinement(mesh: Dict, theta=0.5, target=None, max_dofs=200000, max_steps=60,
+                        verbose=True):
+    """
+    Boucle SOLVE -> ESTIMATE -> MARK -> REFINE
+
+    S'arrete des que |u - u_h|_H1 <= target, que N depasse max_dofs ou
+    apres max_steps raffinements.
+
+    Returns:
+        Liste de dicts par etape ('nv', 'nt', 'error_H1', 'error_energy',
+        'eta', 'n_marked', 'solve_time', 'cumulative_time')
+    """
+    mesh = longest_edge_ordering(mesh)
+    history = []
+    cumulative = 0.0
+    for step in range(max_steps + 1):
+        res = solve_and_estimate(mesh)
+        cumulative += res['solve_time']
+        eta2 = res.pop('eta2')
+        res['cumulative_time'] = cumulative
+
+        done = ((target is not None and res['error_H1'] <= target)
+                or mesh['nv'] >= max_dofs or step == max_steps)
+        t0 = time.perf_counter()
+        marked = dorfler_marking(eta2, theta) if not done else np.empty(0, dtype=int)
+        res['n_marked'] = len(marked)
+        history.append(res)
+
+        if verbose:
+            print(f"  etape {step:>2} : N = {res['nv']:>7}, |u-u_h|_H1 = {res['error_H1']:.4e}, "
+                  f"η = {res['eta']:.4e}, marques {len(marked)}/{res['nt']}")
+        if done:
+            break
+        mesh = newest_vertex_bisection(mesh, marked)
+        cumulative += time.perf_counter() - t0
+        history[-1]['cumulative_time'] = cumulative
+
+    return history
+
+
+def uniform_refinement(mesh: Dict, target=None, max_dofs=200000, verbose=True):
+    """Meme etude avec raffinement rouge uniforme (multigrid.red_refine)"""
+    from multigrid import red_refine
+
+    history = []
+    cumulative = 0.0
+    while True:
+        res = solve_and_estimate(mesh, estimate=False)
+        cumulative += res['solve_time']
+        res['cumulative_time'] = cumulative
+        history.append(res)
+        if verbose:
+            print(f"  uniforme   : N = {res['nv']:>7}, |u-u_h|_H1 = {res['error_H1']:.4e}")
+        if (target is not None and res['error_H1'] <= target) or mesh['nv'] >= max_dofs:
+            break
+        mesh, _ = red_refine(mesh)
+    return history
+
+
+def dofs_for_error(history, target):
+    """
+    Nombre d'inconnues pour atteindre target, par interpolation log-log
+    entre les deux etapes qui l'encadrent (None si non atteint)
+    """
+    N = np.array([r['nv'] for r in history], dtype=float)
+    e = np.array([r['error_H1'] for r in history])
+    reached = np.flatnonzero(e <= target)
+    if len(reached) == 0:
+        return None
+    k = reached[0]
+    if k == 0:
+        return N[0]
+    s = np.log(target / e[k - 1]) / np.log(e[k] / e[k - 1])
+    return float(np.exp(np.log(N[k - 1]) + s * np.log(N[k] / N[k - 1])))
+
+
+def format_comparison(adaptive, uniform, target=None):
+    """Tableau erreur / inconnues des deux strategies"""
+    lines = []
+    lines.append("Raffinement adaptatif (Dorfler + bisection) :")
+    lines.append(f"  {'N':>8} {'nt':>8} {'|u-u_h|_H1':>12} {'eta':>12} {'eta/err':>8} "
+                 f"{'e_h':>12} {'t (s)':>8} {'t cumul':>8}")
+    for r in adaptive:
+        lines.append(f"  {r['nv']:>8} {r['nt']:>8} {r['error_H1']:>12.4e} {r['eta']:>12.4e} "
+                     f"{r['eta'] / r['error_H1']:>8.2f} {r['error_energy']:>12.4e} "
+                     f"{r['solve_time']:>8.3f} {r['cumulative_time']:>8.3f}")
+    lines.append("")
+    lines.append("Raffinement uniforme (rouge) :")
+    lines.append(f"  {'N':>8} {'nt':>8} {'|u-u_h|_H1':>12} {'e_h':>12} {'t (s)':>8} {'t cumul':>8}")
+    for r in uniform:
+        lines.append(f"  {r['nv']:>8} {r['nt']:>8} {r['error_H1']:>12.4e} "
+                     f"{r['error_energy']:>12.4e} {r['solve_time']:>8.3f} "
+                     f"{r['cumulative_time']:>8.3f}")
+
+    if target is not None:
+        n_ad, n_un = dofs_for_error(adaptive, target), dofs_for_error(uniform, target)
+        lines.append("")
+        lines.append(f"Cible |u-u_h|_H1 <= {target:.3e} :")
+        for name, hist, n in (('adaptatif', adaptive, n_ad), ('uniforme', uniform, n_un)):
+            if n is None:
+                lines.append(f"  {name:<10} : non atteinte")
+                continue
+            last = next(r for r in hist if r['error_H1'] <= target)
+            lines.append(f"  {name:<10} : N ~ {n:.0f} (interpole), premier maillage N = "
+                         f"{last['nv']}, resolution {last['solve_time']:.3f} s, "
+                         f"boucle complete {last['cumulative_time']:.3f} s")
+        if n_ad is not None and n_un is not None:
+            lines.append(f"  rapport N uniforme / N adaptatif : {n_un / n_ad:.2f}")
+    return "\n".join(lines)
+
+
+def plot_comparison(adaptive, uniform, output_file):
+    """Erreur H1 et estimateur en fonction de N (log-log), pente N^(-1/2)"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    N_ad = np.array([r['nv'] for r in adaptive])
+    N_un = np.array([r['nv'] for r in uniform])
+    e_un = np.array([r['error_H1'] for r in uniform])
+
+    plt.figure(figsize=(9, 6))
+    plt.loglog(N_un, e_un, 's-', label='Uniforme : $|u-u_h|_{H^1}$')
+    plt.loglog(N_ad, [r['error_H1'] for r in adaptive], 'o-', label='Adaptatif : $|u-u_h|_{H^1}$')
+    plt.loglog(N_ad, [r['eta'] for r in adaptive], '^--', alpha=0.7, label='Adaptatif : estimateur $\\eta$')
+    plt.loglog(N_un, e_un[0] * (N_un / N_un[0])**-0.5, 'k:', alpha=0.5, label='$O(N^{-1/2})$')
+    plt.xlabel("Nombre d'inconnues N")
+    plt.ylabel('Erreur')
+    plt.title('Raffinement adaptatif vs uniforme')
+    plt.grid(True, which='both', alpha=0.3)
+    plt.legend()
+    plt.tight_layout()
+    os.makedirs(os.path.dirname(output_file) or '.', exist_ok=True)
+    plt.savefig(output_file, dpi=150)
+    plt.close()
+
+
+def main(mesh_file, theta=0.5, target=None, max_dofs=200000,
+         output_table='results/adaptive_table.txt', output_plot='results/adaptive_plot.png'):
+    """Etude complete : boucle adaptative, raffinement uniforme, tableau et graphique"""
+    mesh = read_msh(mesh_file)
+    print(f"Maillage initial {mesh_file} : {mesh['nv']} sommets, {mesh['nt']} triangles")
+
+    print(f"\nRaffinement adaptatif (θ = {theta}) :")
+    adaptive = adaptive_refinement(mesh, theta, target, max_dofs)
+    print("\nRaffinement uniforme :")
+    uniform = uniform_refinement(mesh, target, max_dofs)
+
+    table = format_comparison(adaptive, uniform, target)
+    print("\n" + table)
+    if output_table:
+        os.makedirs(os.path.dirname(output_table) or '.', exist_ok=True)
+        with open(output_table, 'w', encoding='utf-8') as f:
+            f.write(table + "\n")
+        print(f"\nTableau sauvegarde : {output_table}")
+    if output_plot:
+        plot_comparison(adaptive, uniform, output_plot)
+        print(f"Graphique sauvegarde : {output_plot}")
+
+    return adaptive, uniform
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Raffinement adaptatif (estimateur par residus)')
+    parser.add_argument('mesh', nargs='?', default='meshes/m1.msh', help='Maillage initial .msh')
+    parser.add_argument('--theta', type=float, default=0.5, help='Parametre de Dorfler (defaut : 0.5)')
+    parser.add_argument('--target', type=float, default=None,
+                        help='Erreur |u - u_h|_H1 visee (arret des deux boucles)')
+    parser.add_argument('--max-dofs', type=int, default=200000,
+                        help="Nombre maximal d'inconnues (defaut : 200000)")
+    args = parser.parse_args()
+
+    main(args.mesh, args.theta, args.target, args.max_dofs)
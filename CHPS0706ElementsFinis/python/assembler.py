@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Assembleur EF-P1 a structure creuse reutilisable (balayages de parametres)
+
+assemblage_EF_P1 reconstruit la structure CSR a chaque appel (tri des
+triplets COO, sommation des doublons). Sur un maillage fixe, seule la
+partie numerique depend de κ et de α :
+
+    k^l = κ_l * k0^l     (k0^l : rigidite elementaire pour κ = 1)
+    p^a = α_a * p0^a     (p0^a : masse de bord pour α = 1)
+
+P1Assembler calcule une fois par maillage :
+- la structure CSR (indptr, indices) de A (et de K, qui a la meme)
+- la carte element -> case CSR de chaque contribution elementaire
+- les blocs geometriques k0 et p0
+
+Un re-assemblage pour de nouveaux coefficients se reduit alors a un
+np.bincount des contributions dans le tableau data (pas de tri), et un
+changement de α seul reutilise la partie volumique deja calculee.
+
+Remarque : la structure est celle des triplets ; contrairement a
+assemblage_EF_P1_vectorise (eliminate_zeros), les coefficients nuls
+(ex. aretes diagonales des maillages structures) restent stockes.
+"""
+
+import os
+import sys
+import time
+import numpy as np
+import scipy.sparse as sp
+
+sys.path.append(os.path.dirname(__file__))
+
+from mesh_topology import select_edges
+from validation_pen import (_eval_par_lot, _triplets_coo, coeffelem_P1_rigid_vect,
+                            coeffelem_P1_source_vect, coeffelem_P1_poids_vect,
+                            coeffelem_P1_transf_vect)
+
+
+class P1Assembler:
+    """
+    Structure CSR et carte de diffusion calculees une fois par maillage
+
+    Usage :
+        asm = P1Assembler(vertices, triangles, edges, {1})
+        A, F, K = asm.assemble(fct_kappa, fct_f, fct_alpha, fct_uE)
+        for alpha in alphas:
+            A = asm.matrix(alpha_func=lambda x, y: alpha)    # diffusion seule
+    """
+
+    def __init__(self, vertices, triangles, edges, boundary_edges):
+        vertices = np.asarray(vertices, dtype=float)[:, :2]
+        self.triangles = np.asarray(triangles)[:, :3]
+        self.boundary = select_edges(edges, boundary_edges)
+        self.nv = len(vertices)
+
+        # Geometrie : blocs elementaires pour κ = 1 et α = 1
+        self.coords_T = vertices[self.triangles]
+        self.coords_A = vertices[self.boundary]
+        self.xG = self.coords_T[:, :, 0].mean(axis=1)
+        self.yG = self.coords_T[:, :, 1].mean(axis=1)
+        self.xM = self.coords_A[:, :, 0].mean(axis=1)
+        self.yM = self.coords_A[:, :, 1].mean(axis=1)
+
+        nt, na = len(self.triangles), len(self.boundary)
+        self.k0 = coeffelem_P1_rigid_vect(self.coords_T, np.ones(nt)).reshape(nt, 9)
+        self.p0 = coeffelem_P1_poids_vect(self.coords_A, np.ones(na)).reshape(na, 4)
+
+        # Structure CSR : cles (ligne, colonne) uniques triees, et case de
+        # chaque triplet dans le tableau data
+        rows_T, cols_T, _ = _triplets_coo(self.triangles, self.k0)
+        rows_A, cols_A, _ = _triplets_coo(self.boundary, self.p0)
+        keys = np.concatenate([rows_T, rows_A]).astype(np.int64) * self.nv \
+            + np.concatenate([cols_T, cols_A])
+        unique_keys, slots = np.unique(keys, return_inverse=True)
+
+        self.nnz = len(unique_keys)
+        self.indices = (unique_keys % self.nv).astype(np.int32)
+        self.indptr = np.zeros(self.nv + 1, dtype=np.int32)
+        np.cumsum(np.bincount(unique_keys // self.nv, minlength=self.nv), out=self.indptr[1:])
+        self.slots_T = slots[:9 * nt].reshape(nt, 9)
+        self.slots_A = slots[9 * nt:].reshape(na, 4)
+
+        # Cache de la partie volumique (reutilisee si κ ne change pas)
+        self._kappa_vals = None
+        self._K_data = None
+
+    def _csr(self, data):
+        """Matrice CSR sur la structure commune (aucune copie de indptr/indices)"""
+        M = sp.csr_matrix((self.nv, self.nv))
+        M.data, M.indices, M.indptr = data, self.indices, self.indptr
+        return M
+
+    def stiffness_data(self, kappa_func):
+        """data de K pour κ (diffusion des nt blocs κ_l k0^l, cache si κ inchange)"""
+        kappa_vals = _eval_par_lot(kappa_func, self.xG, self.yG)
+        if self._K_data is None or not np.array_equal(kappa_vals, self._kappa_vals):
+            self._kappa_vals = np.array(kappa_vals)
+            self._K_data = np.bincount(self.slots_T.ravel(),
+                                       weights=(kappa_vals[:, None] * self.k0).ravel(),
+                                       minlength=self.nnz)
+        return self._K_data
+
+    def robin_data(self, alpha_func):
+        """data des termes de bord α_a p0^a (diffusion des na blocs 2x2)"""
+        alpha_vals = _eval_par_lot(alpha_func, self.xM, self.yM)
+        return np.bincount(self.slots_A.ravel(),
+                           weights=(alpha_vals[:, None] * self.p0).ravel(),
+                           minlength=self.nnz)
+
+    def matrix(self, kappa_func=1.0, alpha_func=1.0):
+        """
+        Matrice A = K(κ) + B(α) sur la structure pre-calculee
+
+        kappa_func, alpha_func : fonctions (x, y) ou constantes
+        """
+        kappa = kappa_func if callable(kappa_func) else (lambda x, y: kappa_func)
+        alpha = alpha_func if callable(alpha_func) else (lambda x, y: alpha_func)
+        return self._csr(self.stiffness_data(kappa) + self.robin_data(alpha))
+
+    def stiffness(self, kappa_func=1.0):
+        """Matrice de rigidite K(κ) seule (pour la norme energie)"""
+        kappa = kappa_func if callable(kappa_func) else (lambda x, y: kappa_func)
+        return self._csr(self.stiffness_data(kappa).copy())
+
+    def load(self, f_func, alpha_func, uE_func):
+        """Second membre F (sources volumiques puis flux de bord)"""
+        alpha_vals = _eval_par_lot(alpha_func, self.xM, self.yM)
+        f = coeffelem_P1_source_vect(self.coords_T, f_func)
+        e = coeffelem_P1_transf_vect(self.coords_A, alpha_vals, uE_func)
+        return np.bincount(np.concatenate([self.triangles.ravel(), self.boundary.ravel()]),
+                           weights=np.concatenate([f.ravel(), e.ravel()]),
+                           minlength=self.nv)
+
+    def assemble(self, kappa_func, f_func, alpha_func, uE_func):
+        """Meme sortie (A, F, K) que assemblage_EF_P1_vectorise"""
+        A = self.matrix(kappa_func, alpha_func)
+        K = self.stiffness(kappa_func)
+        F = self.load(f_func, alpha_func, uE_func)
+        return A, F, K
+
+
+def benchmark_reassembly(mesh_file, n_values=200):
+    """
+    Balayage de α : assemblage complet a chaque valeur vs remplissage de data
+    """
+    from validation_pen import (read_freefem_mesh, assemblage_EF_P1_vectorise,
+                                fct_kappa, fct_f, fct_uE)
+
+    mesh = read_freefem_mesh(mesh_file, cache=True)
+    V, T, E = mesh['vertices'], mesh['triangles'], mesh['edges']
+    alphas = np.logspace(0, 10, n_values)
+
+    t0 = time.perf_counter()
+    asm = P1Assembler(V, T, E, mesh['dirichlet_labels'])
+    t_setup = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for a in alphas:
+        asm.matrix(fct_kappa, a)
+    t_refill = time.perf_counter() - t0
+
+    n_full = min(n_values, 10)
+    t0 = time.perf_counter()
+    for a in alphas[:n_full]:
+        assemblage_EF_P1_vectorise(V, T, E, mesh['dirichlet_labels'], fct_kappa, fct_f,
+                                   lambda x, y, a=a: a, fct_uE, verbose=False)
+    t_full = (time.perf_counter() - t0) / n_full
+
+    # Verification : meme matrice que l'assemblage complet
+    A_ref = assemblage_EF_P1_vectorise(V, T, E, mesh['dirichlet_labels'], fct_kappa, fct_f,
+                                       lambda x, y: alphas[-1], fct_uE, verbose=False)[0]
+    A_new = asm.matrix(fct_kappa, alphas[-1])
+    ecart = abs(A_new - A_ref).max() / abs(A_ref).max()
+
+    print(f"Maillage {mesh_file} : {mesh['nv']} sommets, {mesh['nt']} triangles, nnz = {asm.nnz}")
+    print(f"  Construction structure + carte : {t_setup:.4f} s (une fois)")
+    print(f"  Assemblage complet             : {1e3 * t_full:.3f} ms par valeur")
+    print(f"  Remplissage data (α seul)      : {1e3 * t_refill / n_values:.3f} ms par valeur "
+          f"({n_values} valeurs, gain x{t_full * n_values / t_refill:.1f})")
+    print(f"  Ecart relatif max avec l'assemblage complet : {ecart:.2e}")
+
+
+if __name__ == "__main__":
+    mesh_file = sys.argv[1] if len(sys.argv) > 1 else 'meshes/m4.msh'
+    n_values = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    benchmark_reassembly(mesh_file, n_values)
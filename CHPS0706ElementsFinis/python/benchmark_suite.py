@@ -0,0 +1,503 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Suite de benchmarks du pipeline EF-P1 (validation_pen, bonus_assemblage)
+
+Maillages structures generes (mesh_generator, rect_<nx>x<nx>.msh) de taille
+nt ~ 10^3 ... 10^7 triangles (nt = 2 nx^2), etapes chronometrees separement :
+
+    read       lecture du fichier .msh (analyse du texte, ou cache .npz)
+    quality    qualite Q et pas h (utils.compute_mesh_metrics)
+    assembly   rigidite et second membre (termes volumiques)
+    dirichlet  validation_pen   : termes de penalisation des aretes label 1
+                                  (termes_bord_P1_vect), A = K + B
+               bonus_assemblage : noeuds Dirichlet et systeme reduit A_LL
+    solve      resolution (solvers.solve_linear_system)
+    error      validation_pen : norme energie, bonus_assemblage : semi-norme H1
+
+Memoire : pic de RSS de chaque etape. Sous Linux, le pic (VmHWM) est remis a
+zero avant chaque etape (/proc/self/clear_refs) : 'peak_mb' est le pic de
+l'etape, 'delta_mb' son ecart a la RSS de depart. Ailleurs, seul le pic
+cumule du processus (ru_maxrss) est disponible et 'delta_mb' vaut None.
+
+Historique : chaque execution (date, commit git, versions, machine, mesures)
+est ajoutee a results/benchmark_history.json. --save-baseline enregistre
+l'execution comme reference (results/benchmark_baseline.json) ; ensuite,
+toute etape plus lente (ou plus gourmande en memoire) que la reference, a
+la fois en relatif (--time-tol, --memory-tol) et en absolu (seuils de bruit
+--min-time, --min-memory), est signalee comme regression (code de retour 1).
+
+Le solveur direct ne passe pas 10^7 triangles en memoire : utiliser alors
+--solver cg --precond amg.
+
+Usage :
+    python benchmark_suite.py                                     (10^3 ... 10^5)
+    python benchmark_suite.py --sizes 1e3 1e4 1e5 1e6 1e7 --solver cg --precond amg
+    python benchmark_suite.py --save-baseline
+"""
+
+import gc
+import os
+import ctypes
+import ctypes.util
+import sys
+import json
+import time
+import platform
+import subprocess
+import numpy as np
+import scipy
+
+try:
+    _libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6')
+    _libc.malloc_trim
+except (OSError, AttributeError):  # pas de glibc (macOS, Windows, musl)
+    _libc = None
+
+sys.path.append(os.path.dirname(__file__))
+
+from mesh_io import read_msh
+from mesh_generator import generate_mesh
+from mesh_topology import get_topology
+from utils import compute_mesh_metrics, peak_rss_mb
+from solvers import solve_linear_system, PRECONDITIONERS
+import validation_pen as vp
+import bonus_assemblage as ba
+
+
+STAGES = ('read', 'quality', 'assembly', 'dirichlet', 'solve', 'error')
+SOLVERS = ('validation_pen', 'bonus_assemblage')
+
+HISTORY_FILE = 'results/benchmark_history.json'
+BASELINE_FILE = 'results/benchmark_baseline.json'
+
+
+# ============================================================================
+# MESURE DU TEMPS ET DE LA MEMOIRE
+# ============================================================================
+
+def _proc_status_mb(field):
+    """Champ VmRSS / VmHWM de /proc/self/status, en Mo (None si indisponible)"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    return None
+
+
+def _release_free_memory():
+    """
+    Rend au systeme la memoire liberee (glibc : malloc_trim), sinon les
+    pages gardees par l'allocateur masquent le pic de l'etape suivante
+    """
+    gc.collect()
+    if _libc is not None:
+        _libc.malloc_trim(0)
+
+
+def _reset_peak_rss():
+    """Remet a zero le pic de RSS (Linux) ; False si impossible"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_mb():
+    """Pic de RSS du processus en Mo : VmHWM, sinon ru_maxrss (cumule)"""
+    peak = _proc_status_mb('VmHWM')
+    return peak_rss_mb() if peak is None else peak
+
+
+def run_stage(record, name, func, *args, **kwargs):
+    """
+    Execute func(*args, **kwargs) et range son temps et son pic memoire
+    dans record[name]
+
+    Returns:
+        Le resultat de func
+    """
+    _release_free_memory()
+    per_stage = _reset_peak_rss()
+    rss0 = _proc_status_mb('VmRSS')
+
+    t0 = time.perf_counter()
+    result = func(*args, **kwargs)
+    elapsed = time.perf_counter() - t0
+
+    peak = _peak_rss_mb()
+    record[name] = {
+        'time': elapsed,
+        'peak_mb': peak,
+        'delta_mb': peak - rss0 if per_stage and rss0 is not None else None,
+    }
+    return result
+
+
+# ============================================================================
+# PIPELINES
+# ============================================================================
+
+def _solve(A, F, solver, solver_options):
+    return solve_linear_system(A, F, method=solver, **solver_options)['solution']
+
+
+def _penalisation(A, F, vertices, edges, labels):
+    """A + B et F + F_B (termes de bord de validation_pen, aretes de labels)"""
+    nv = len(vertices)
+    dirichlet, p, e = vp.termes_bord_P1_vect(vertices, edges, labels, vp.fct_alpha, vp.fct_uE)
+    B = vp._coo_vers_csr(*vp._triplets_coo(dirichlet, p), nv)
+    return (A + B).tocsr(), F + np.bincount(dirichlet.ravel(), weights=e.ravel(), minlength=nv)
+
+
+def pipeline_validation_pen(mesh_file, solver='direct', solver_options=None, cache=False):
+    """Etapes de validation_pen.main (mode vectorise, penalisation α = 1e8)"""
+    record = {}
+    mesh = run_stage(record, 'read', vp.read_freefem_mesh, mesh_file, cache=cache)
+    V, T, E = mesh['vertices'], mesh['triangles'], mesh['edges']
+
+    run_stage(record, 'quality', compute_mesh_metrics, V, T)
+    # Termes volumiques seuls (aucune arete de bord), penalisation a part
+    A, F, K = run_stage(record, 'assembly', vp.assemblage_EF_P1_vectorise, V, T, E, set(),
+                        vp.fct_kappa, vp.fct_f, vp.fct_alpha, vp.fct_uE, verbose=False)
+    A, F = run_stage(record, 'dirichlet', _penalisation, A, F, V, E, mesh['dirichlet_labels'])
+    solver_options = solver_options or {}
+    if solver_options.get('precond') == 'schwarz':
+        from schwarz import schwarz_options
+        solver_options = {**schwarz_options(mesh, mesh['dirichlet_labels']), **solver_options}
+    Uh = run_stage(record, 'solve', _solve, A, F, solver, solver_options)
+    error = run_stage(record, 'error', vp.compute_H1_error, Uh, V, T, K,
+                      vp.fct_u, vp.grad_u_exact)
+    return record, {'nv': mesh['nv'], 'nt': mesh['nt'], 'error': error}
+
+
+def _dirichlet_reduit(mesh, A, F):
+    """Noeuds Dirichlet (label 1) et systeme reduit de bonus_assemblage"""
+    dirichlet_nodes = get_topology(mesh).label_nodes({1})
+    return ba.reduce_dirichlet_system(A, F, dirichlet_nodes, mesh['vertices'], ba.u_exact)
+
+
+def pipeline_bonus_assemblage(mesh_file, solver='direct', solver_options=None, cache=False):
+    """Etapes de bonus_assemblage.main (assemblage vectorise, Dirichlet par relevement)"""
+    record = {}
+    mesh = run_stage(record, 'read', read_msh, mesh_file, cache=cache)
+    V, T = mesh['vertices'], mesh['triangles']
+
+    run_stage(record, 'quality', ba.mesh_quality_and_step, V, T)
+    A, F = run_stage(record, 'assembly', ba.assemble_stiffness_and_load_vectorized,
+                     V, T, ba.f_source)
+    A_LL, F_L, free_nodes, u_D = run_stage(record, 'dirichlet', _dirichlet_reduit, mesh, A, F)
+    u_free = run_stage(record, 'solve', _solve, A_LL, F_L, solver, solver_options or {})
+    uh = ba.lift_dirichlet_solution(u_free, free_nodes, u_D)
+    error = run_stage(record, 'error', ba.compute_H1_semi_error, V, T, uh, ba.grad_u_exact)
+    return record, {'nv': mesh['nv'], 'nt': mesh['nt'], 'error': error}
+
+
+PIPELINES = {
+    'validation_pen': pipeline_validation_pen,
+    'bonus_assemblage': pipeline_bonus_assemblage,
+}
+
+
+# ============================================================================
+# SUITE COMPLETE
+# ============================================================================
+
+def benchmark_meshes(sizes, directory='meshes'):
+    """
+    Maillages structures nx × nx avec nt = 2 nx^2 ~ size triangles (generes
+    s'ils manquent, avec leur cache .npz)
+
+    Returns:
+        Liste des fichiers, dans l'ordre de sizes
+    """
+    files = []
+    for size in sizes:
+        nx = max(1, int(round(np.sqrt(float(size) / 2.0))))
+        filename = os.path.join(directory, f'rect_{nx}x{nx}.msh')
+        if not os.path.exists(filename):
+            generate_mesh(filename, nx, cache=True)
+        files.append(filename)
+    return files
+
+
+def run_suite(sizes, solvers=SOLVERS, solver='direct', solver_options=None, cache=False,
+              repeat=1, mesh_dir='meshes', verbose=True):
+    """
+    Toutes les etapes, pour chaque solveur Python et chaque taille
+
+    Args:
+        sizes: Nombres de triangles vises (ex. [1e3, 1e4, 1e5])
+        solvers: Pipelines a mesurer (cles de PIPELINES)
+        solver, solver_options: Solveur lineaire et options (precond, tol...)
+        cache: Lecture par le cache binaire .npz au lieu du texte
+        repeat: Repetitions de chaque cas (temps minimal, pic maximal)
+
+    Returns:
+        Liste de dicts {'solver', 'mesh', 'nv', 'nt', 'error', 'stages'}
+    """
+    results = []
+    for mesh_file in benchmark_meshes(sizes, mesh_dir):
+        for name in solvers:
+            stages = {}
+            for _ in range(repeat):
+                record, info = PIPELINES[name](mesh_file, solver, solver_options, cache)
+                for stage, m in record.items():
+                    best = stages.setdefault(stage, dict(m))
+                    best['time'] = min(best['time'], m['time'])
+                    if m['peak_mb'] is not None:
+                        best['peak_mb'] = max(best['peak_mb'], m['peak_mb'])
+                    if m['delta_mb'] is not None:
+                        best['delta_mb'] = max(best['delta_mb'], m['delta_mb'])
+                gc.collect()
+            result = {'solver': name, 'mesh': os.path.basename(mesh_file), **info,
+                      'stages': stages}
+            results.append(result)
+            if verbose:
+                print(format_case(result))
+    return results
+
+
+def format_case(result):
+    """Une ligne par cas : temps (ms) et pic memoire (Mo) de chaque etape"""
+    cells = []
+    for stage in STAGES:
+        m = result['stages'].get(stage)
+        if m is None:
+            continue
+        mem = m['delta_mb'] if m['delta_mb'] is not None else m['peak_mb']
+        cells.append(f"{stage} {1e3 * m['time']:.1f} ms/{mem:.0f} Mo")
+    total = sum(m['time'] for m in result['stages'].values())
+    return (f"  {result['solver']:<17} nt = {result['nt']:>9} : total {total:8.3f} s | "
+            + ", ".join(cells))
+
+
+def format_table(results):
+    """Tableau des temps par etape (s) et du pic memoire maximal (Mo)"""
+    header = (f"{'solveur':<17} {'nt':>9} " + " ".join(f"{s:>10}" for s in STAGES)
+              + f" {'total':>10} {'pic Mo':>8}")
+    lines = [header, "-" * len(header)]
+    for r in results:
+        times = [r['stages'][s]['time'] if s in r['stages'] else float('nan') for s in STAGES]
+        peak = max((m['peak_mb'] or 0.0) for m in r['stages'].values())
+        lines.append(f"{r['solver']:<17} {r['nt']:>9} "
+                     + " ".join(f"{t:>10.4f}" for t in times)
+                     + f" {np.nansum(times):>10.4f} {peak:>8.0f}")
+    return "\n".join(lines)
+
+
+# ============================================================================
+# HISTORIQUE ET REFERENCE
+# ============================================================================
+
+def _git_commit():
+    """Commit git courant (None hors depot)"""
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                             text=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+                             timeout=10)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def make_run(results, solver='direct', solver_options=None, cache=False, repeat=1):
+    """Enregistrement d'une execution (mesures et contexte)"""
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': _git_commit(),
+        'host': platform.node(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'scipy': scipy.__version__,
+        'solver': solver,
+        'solver_options': solver_options or {},
+        'cache': cache,
+        'repeat': repeat,
+        'memory': 'stage' if _reset_peak_rss() else 'cumulative',
+        'results': results,
+    }
+
+
+def _load_json(filename, default):
+    if not os.path.exists(filename):
+        return default
+    with open(filename) as f:
+        return json.load(f)
+
+
+def _write_json(filename, data):
+    os.makedirs(os.path.dirname(filename) or '.', exist_ok=True)
+    tmp = filename + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(data, f, indent=1)
+    os.replace(tmp, filename)
+
+
+def append_history(run, filename=HISTORY_FILE):
+    """Ajoute l'execution a l'historique JSON (liste d'executions)"""
+    history = _load_json(filename, [])
+    history.append(run)
+    _write_json(filename, history)
+    return len(history)
+
+
+# Configuration d'une execution : les mesures ne sont comparables qu'a configuration egale
+RUN_CONFIG_KEYS = ('solver', 'solver_options', 'cache')
+
+
+def baseline_mismatch(run, baseline):
+    """
+    Differences de configuration entre run et baseline
+
+    Returns:
+        dict {cle: (valeur de run, valeur de la reference)}, vide si comparables
+    """
+    defaults = {'solver': 'direct', 'solver_options': {}, 'cache': False}
+    return {key: (run.get(key, defaults[key]), baseline.get(key, defaults[key]))
+            for key in RUN_CONFIG_KEYS
+            if run.get(key, defaults[key]) != baseline.get(key, defaults[key])}
+
+
+def compare_to_baseline(run, baseline, time_tol=0.25, memory_tol=0.10, min_time=1e-2,
+                        min_memory=2.0):
+    """
+    Regressions de run par rapport a baseline (memes solveur, nt et etape)
+
+    Les deux executions doivent avoir la meme configuration (solveur
+    lineaire, options, cache : voir baseline_mismatch).
+
+    Une etape regresse si son temps depasse la reference de plus de
+    time_tol x reference ET de plus de min_time secondes (bruit de mesure) ;
+    de meme pour le pic memoire (delta_mb si mesure par etape, sinon
+    peak_mb) avec memory_tol et min_memory Mo.
+
+    Returns:
+        Liste de dicts {'solver', 'nt', 'stage', 'metric', 'value', 'reference', 'ratio'}
+    """
+    reference = {(r['solver'], r['nt']): r['stages'] for r in baseline['results']}
+    mem_key = 'delta_mb' if run.get('memory') == 'stage' == baseline.get('memory') else 'peak_mb'
+
+    regressions = []
+    for r in run['results']:
+        ref_stages = reference.get((r['solver'], r['nt']))
+        if ref_stages is None:
+            continue
+        for stage, m in r['stages'].items():
+            ref = ref_stages.get(stage)
+            if ref is None:
+                continue
+            checks = [('time', m['time'], ref['time'],
+                       m['time'] - ref['time'] > max(time_tol * ref['time'], min_time))]
+            if m.get(mem_key) is not None and ref.get(mem_key) is not None:
+                checks.append((mem_key, m[mem_key], ref[mem_key],
+                               m[mem_key] - ref[mem_key] > max(memory_tol * ref[mem_key],
+                                                                min_memory)))
+            for metric, value, ref_value, worse in checks:
+                if worse:
+                    regressions.append({
+                        'solver': r['solver'], 'nt': r['nt'], 'stage': stage,
+                        'metric': metric, 'value': value, 'reference': ref_value,
+                        'ratio': value / ref_value if ref_value > 0 else float('inf')})
+    return regressions
+
+
+def format_regressions(regressions):
+    if not regressions:
+        return "Aucune regression par rapport a la reference"
+    lines = [f"{len(regressions)} REGRESSION(S) :"]
+    for g in regressions:
+        unit = 's' if g['metric'] == 'time' else 'Mo'
+        lines.append(f"  {g['solver']:<17} nt = {g['nt']:>9} {g['stage']:<10} {g['metric']:<9}"
+                     f" {g['value']:.4g} {unit} (reference {g['reference']:.4g} {unit},"
+                     f" x{g['ratio']:.2f})")
+    return "\n".join(lines)
+
+
+def main(sizes=(1e3, 1e4, 1e5), solvers=SOLVERS, solver='direct', solver_options=None,
+         cache=False, repeat=3, history=HISTORY_FILE, baseline=BASELINE_FILE,
+         save_baseline=False, time_tol=0.25, memory_tol=0.10, min_time=1e-2, min_memory=2.0):
+    """
+    Execute la suite, l'ajoute a l'historique et la compare a la reference
+
+    Returns:
+        0 sans regression, 1 sinon
+    """
+    print(f"Benchmark EF-P1 : {', '.join(solvers)} ; tailles {', '.join(f'{s:g}' for s in sizes)} "
+          f"triangles ; solveur {solver} {solver_options or ''}")
+    results = run_suite(sizes, solvers, solver, solver_options, cache, repeat)
+    run = make_run(results, solver, solver_options, cache, repeat)
+
+    print("\n" + format_table(results))
+    n = append_history(run, history)
+    print(f"\nHistorique : {history} ({n} executions)")
+
+    if save_baseline:
+        _write_json(baseline, run)
+        print(f"Reference enregistree : {baseline}")
+        return 0
+
+    reference = _load_json(baseline, None)
+    if reference is None:
+        print(f"Pas de reference ({baseline}) : --save-baseline pour en creer une")
+        return 0
+    print(f"Reference : {baseline} (commit {reference.get('commit')}, {reference.get('timestamp')})")
+    mismatch = baseline_mismatch(run, reference)
+    if mismatch:
+        print("Configuration differente de la reference, pas de comparaison : "
+              + ", ".join(f"{key} {value!r} (reference {ref!r})"
+                          for key, (value, ref) in mismatch.items()))
+        return 0
+    regressions = compare_to_baseline(run, reference, time_tol, memory_tol, min_time, min_memory)
+    print(format_regressions(regressions))
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmarks du pipeline EF-P1 par etape')
+    parser.add_argument('--sizes', type=float, nargs='+', default=[1e3, 1e4, 1e5],
+                        help='Nombres de triangles vises (defaut : 1e3 1e4 1e5)')
+    parser.add_argument('--solvers', nargs='+', choices=SOLVERS, default=list(SOLVERS),
+                        help='Pipelines mesures (defaut : les deux)')
+    parser.add_argument('--solver', choices=['direct', 'umfpack', 'cg'], default='direct',
+                        help='Solveur lineaire (defaut : direct)')
+    parser.add_argument('--precond', choices=PRECONDITIONERS, default=None,
+                        help='Preconditionneur du gradient conjugue')
+    parser.add_argument('--cache', action='store_true',
+                        help='Lecture par le cache binaire .npz (au lieu du texte .msh)')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Repetitions de chaque cas, temps minimal retenu (defaut : 3)')
+    parser.add_argument('--history', default=HISTORY_FILE, help=f'Historique JSON ({HISTORY_FILE})')
+    parser.add_argument('--baseline', default=BASELINE_FILE, help=f'Reference JSON ({BASELINE_FILE})')
+    parser.add_argument('--save-baseline', action='store_true',
+                        help="Enregistre cette execution comme reference")
+    parser.add_argument('--time-tol', type=float, default=0.25,
+                        help='Tolerance relative sur les temps (defaut : 0.25)')
+    parser.add_argument('--memory-tol', type=float, default=0.10,
+                        help='Tolerance relative sur la memoire (defaut : 0.10)')
+    parser.add_argument('--min-time', type=float, default=1e-2,
+                        help='Ecart de temps (s) en dessous duquel rien n\'est signale')
+    parser.add_argument('--min-memory', type=float, default=2.0,
+                        help='Ecart memoire (Mo) en dessous duquel rien n\'est signale')
+    args = parser.parse_args()
+    if args.precond == 'schwarz' and 'bonus_assemblage' in args.solvers:
+        # Systeme reduit aux noeuds libres : pas de partition du maillage associee
+        parser.error("--precond schwarz : pipeline validation_pen uniquement "
+                     "(--solvers validation_pen)")
+    if args.precond == 'gmg':
+        # Maillages rect_NxN independants : pas de hierarchie multigrille
+        parser.error("--precond gmg : non disponible (validation_pen.py ou exercice6_convergence.py)")
+
+    options = {'precond': args.precond} if args.precond else {}
+    sys.exit(main(args.sizes, args.solvers, args.solver, options, args.cache, args.repeat,
+                  args.history, args.baseline, args.save_baseline,
+                  args.time_tol, args.memory_tol, args.min_time, args.min_memory))
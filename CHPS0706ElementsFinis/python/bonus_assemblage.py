@@ -5,21 +5,31 @@ BONUS : Assemblage manuel EF-P1 en Python
 
 Script qui fait tout en Python (sans FreeFem++ pour la resolution) :
 - Lecture maillages .msh
-- Assemblage manuel triangle par triangle
+- Assemblage manuel triangle par triangle (ou vectorisé sur tous les triangles)
 - Resolution systeme lineaire
 - Calcul erreur H1
 
 Usage:
     python bonus_assemblage.py meshes/m1.msh meshes/m2.msh meshes/m3.msh meshes/m4.msh
+    python bonus_assemblage.py --solver=cg --precond=amg meshes/m4.msh
 """
 
 import sys
 import numpy as np
 import scipy.sparse as sp
-import scipy.sparse.linalg as spla
 import matplotlib.pyplot as plt
 from pathlib import Path
 
+sys.path.append(str(Path(__file__).parent))
+
+from mesh_io import read_msh
+from mesh_topology import get_topology
+from utils import compute_mesh_metrics, barycentric_gradients
+from error_norms import compute_error_norms
+from solvers import solve_linear_system
+from renumbering import (compute_ordering, renumber_mesh, matrix_profile_stats,
+                         format_ordering_report)
+
 # Solution exacte et second membre
 
 def u_exact(x, y):
@@ -60,7 +70,7 @@ def f_source(x, y):
 
 # Lecture maillages FreeFem++ (.msh)
 
-def read_freefem_mesh(filename):
+def read_freefem_mesh(filename, cache=False):
     """
     Lecture d'un maillage FreeFem++ au format .msh
 
@@ -70,55 +80,36 @@ def read_freefem_mesh(filename):
     Puis : triangles (i1 i2 i3 label)
     Puis : arêtes bord (i1 i2 label)
 
+    La lecture est déléguée au lecteur commun mesh_io.read_msh
+    (cache binaire optionnel avec cache=True).
+
     Returns:
         dict avec 'vertices', 'triangles', 'edges', 'dirichlet_nodes'
     """
-    with open(filename, 'r') as f:
-        # Ligne 1 : nv nt nbe
-        first_line = f.readline().strip().split()
-        nv = int(first_line[0])
-        nt = int(first_line[1])
-        nbe = int(first_line[2])
-
-        # Lecture des sommets
-        vertices = np.zeros((nv, 2))  # x, y
-        for i in range(nv):
-            line = f.readline().strip().split()
-            vertices[i] = [float(line[0]), float(line[1])]
-
-        # Lecture des triangles (indices 1-based → 0-based)
-        triangles = np.zeros((nt, 3), dtype=int)
-        for i in range(nt):
-            line = f.readline().strip().split()
-            triangles[i] = [int(line[0])-1, int(line[1])-1, int(line[2])-1]
-
-        # Lecture des arêtes de bord
-        edges = []
-        dirichlet_nodes = set()
-        for i in range(nbe):
-            line = f.readline().strip().split()
-            i1, i2, label = int(line[0])-1, int(line[1])-1, int(line[2])
-            edges.append((i1, i2, label))
-            # Label 1 = Dirichlet (x=0 et x=4)
-            if label == 1:
-                dirichlet_nodes.add(i1)
-                dirichlet_nodes.add(i2)
-
-    # Fallback si aucun noeud Dirichlet détecté : x=0 ou x=4
+    mesh = read_msh(filename, cache=cache)
+    vertices = mesh['vertices']
+    triangles = mesh['triangles']
+    edges = np.column_stack([mesh['edges'], mesh['edge_labels']])
+    topology = get_topology(mesh)
+
+    # Label 1 = Dirichlet (x=0 et x=4)
+    dirichlet_nodes = topology.label_nodes({1})
+
+    # Fallback si aucun noeud Dirichlet détecté : sommets du bord en x=0 ou x=4
     if len(dirichlet_nodes) == 0:
-        tol = 1e-8
-        for i, (x, y) in enumerate(vertices):
-            if abs(x - 0.0) < tol or abs(x - 4.0) < tol:
-                dirichlet_nodes.add(i)
+        x = vertices[:, 0]
+        on_side = (np.abs(x - 0.0) < 1e-8) | (np.abs(x - 4.0) < 1e-8)
+        dirichlet_nodes = np.flatnonzero(topology.boundary_node_mask & on_side)
 
     return {
         'vertices': vertices,
         'triangles': triangles,
         'edges': edges,
-        'dirichlet_nodes': sorted(list(dirichlet_nodes)),
-        'nv': nv,
-        'nt': nt,
-        'nbe': nbe
+        'dirichlet_nodes': dirichlet_nodes.tolist(),
+        'topology': topology,
+        'nv': mesh['nv'],
+        'nt': mesh['nt'],
+        'nbe': mesh['nbe']
     }
 
 # Qualite et pas du maillage
@@ -152,37 +143,10 @@ def mesh_quality_and_step(vertices, triangles):
     Returns:
         (Q, h)
     """
-    Q_list = []
-    h_list = []
-
-    for tri in triangles:
-        p0 = vertices[tri[0]]
-        p1 = vertices[tri[1]]
-        p2 = vertices[tri[2]]
-
-        # Aire
-        A = triangle_area(p0, p1, p2)
-
-        # Arêtes
-        d01, d12, d20 = edge_lengths(p0, p1, p2)
-        P = d01 + d12 + d20  # Périmètre
-
-        # Diamètre (plus grande arête)
-        h_T = max(d01, d12, d20)
-
-        # Rayon inscrit
-        r_T = 2.0 * A / P if P > 0 else 1e-16
+    # Calcul vectorise sur tous les triangles (utils.compute_mesh_metrics)
+    metrics = compute_mesh_metrics(vertices, triangles)
 
-        # Qualité
-        Q_T = (np.sqrt(3.0) / 6.0) * (h_T / r_T) if r_T > 0 else float('inf')
-
-        Q_list.append(Q_T)
-        h_list.append(h_T)
-
-    Q = max(Q_list)
-    h = max(h_list)
-
-    return Q, h
+    return metrics['Q'], metrics['h']
 
 # Assemblage de la matrice de rigidite (methode manuelle)
 
@@ -271,6 +235,50 @@ def assemble_stiffness_and_load(vertices, triangles, f_func):
     return A, F
 
 
+def assemble_stiffness_and_load_vectorized(vertices, triangles, f_func):
+    """
+    Assemblage vectorisé de A et F (même résultat que assemble_stiffness_and_load)
+
+    Méthode : tous les triangles en un seul passage
+    1. Gradients P1 par formule fermée (barycentric_gradients, sans inverse)
+    2. Matrices locales K_T = Aire * G G^T pour tous les T (nt × 3 × 3)
+    3. Vecteurs locaux F_T = Aire/3 * f(sommets), f évaluée une seule fois
+    4. Triplets COO dans des tableaux préalloués int32/float64 (9·nt entrées)
+
+    Args:
+        vertices: Coordonnées des sommets (nv × 2)
+        triangles: Connectivité (nt × 3)
+        f_func: Fonction source f(x, y), acceptant des tableaux NumPy
+
+    Returns:
+        (A, F) : matrice de rigidité (sparse CSR) et vecteur de charge
+    """
+    nv = vertices.shape[0]
+    nt = triangles.shape[0]
+
+    grads, areas = barycentric_gradients(vertices, triangles)
+
+    # Triplets COO préalloués : mémoire O(9·nt)
+    rows = np.empty((nt, 3, 3), dtype=np.int32)
+    cols = np.empty((nt, 3, 3), dtype=np.int32)
+    vals = np.empty((nt, 3, 3), dtype=np.float64)
+
+    tri = triangles[:, :3].astype(np.int32, copy=False)
+    rows[:] = tri[:, :, None]
+    cols[:] = tri[:, None, :]
+    np.matmul(grads, grads.transpose(0, 2, 1), out=vals)
+    vals *= areas[:, None, None]
+
+    # Vecteur de charge : f aux sommets, une évaluation par sommet
+    f_nodes = f_func(vertices[:, 0], vertices[:, 1])
+    F_T = (areas / 3.0)[:, None] * f_nodes[tri]
+    F = np.bincount(tri.ravel(), weights=F_T.ravel(), minlength=nv)
+
+    A = sp.csr_matrix((vals.ravel(), (rows.ravel(), cols.ravel())), shape=(nv, nv))
+
+    return A, F
+
+
 def apply_dirichlet_strong(A, F, dirichlet_nodes, vertices, u_exact_func):
     """
     Application des conditions de Dirichlet par élimination de lignes/colonnes
@@ -311,9 +319,68 @@ def apply_dirichlet_strong(A, F, dirichlet_nodes, vertices, u_exact_func):
 
     return A, F
 
+def reduce_dirichlet_system(A, F, dirichlet_nodes, vertices, u_exact_func):
+    """
+    Élimination de Dirichlet par relèvement : système réduit aux inconnues libres
+
+    Méthode :
+    1. Partition des inconnues : libres (L) et imposées (D), u_D = u_exact(x_D)
+    2. Système réduit : A_LL u_L = F_L - A_LD u_D
+    3. A_LL reste symétrique définie positive (gradient conjugué utilisable)
+
+    Coût O(nnz) : deux extractions de sous-matrices CSR et un produit
+    matrice-vecteur, sans modification de structure de A.
+
+    Args:
+        A: Matrice de rigidité (CSR)
+        F: Vecteur de charge
+        dirichlet_nodes: Liste des indices de noeuds Dirichlet
+        vertices: Coordonnées des sommets
+        u_exact_func: Fonction u_exact(x, y), acceptant des tableaux NumPy
+
+    Returns:
+        (A_LL, F_L, free_nodes, u_D) : système réduit, indices des noeuds libres
+        et vecteur complet (nv,) contenant les valeurs imposées (0 ailleurs)
+    """
+    A = sp.csr_matrix(A)
+    nv = A.shape[0]
+
+    is_dirichlet = np.zeros(nv, dtype=bool)
+    is_dirichlet[np.asarray(dirichlet_nodes, dtype=int)] = True
+    free_nodes = np.flatnonzero(~is_dirichlet)
+    fixed_nodes = np.flatnonzero(is_dirichlet)
+
+    # Valeurs imposées (relèvement)
+    u_D = np.zeros(nv)
+    u_D[fixed_nodes] = u_exact_func(vertices[fixed_nodes, 0], vertices[fixed_nodes, 1])
+
+    # Lignes libres, puis colonnes libres / imposées
+    A_L = A[free_nodes, :]
+    A_LL = A_L[:, free_nodes]
+    F_L = F[free_nodes] - A_L[:, fixed_nodes] @ u_D[fixed_nodes]
+
+    return A_LL.tocsr(), F_L, free_nodes, u_D
+
+
+def lift_dirichlet_solution(u_free, free_nodes, u_D):
+    """
+    Reconstruction de la solution complète : u = u_D + prolongement de u_L
+
+    Args:
+        u_free: Solution du système réduit (inconnues libres)
+        free_nodes: Indices des noeuds libres
+        u_D: Vecteur des valeurs imposées (sortie de reduce_dirichlet_system)
+
+    Returns:
+        Solution complète (nv,)
+    """
+    uh = u_D.copy()
+    uh[free_nodes] = u_free
+    return uh
+
 # Calcul de l'erreur en semi-norme H1
 
-def compute_H1_semi_error(vertices, triangles, uh, grad_u_exact_func):
+def compute_H1_semi_error(vertices, triangles, uh, grad_u_exact_func, n_points=1):
     """
     Calcul de l'erreur en semi-norme H¹
 
@@ -321,51 +388,24 @@ def compute_H1_semi_error(vertices, triangles, uh, grad_u_exact_func):
 
     Pour les éléments P1, grad(uh) est constant par triangle.
     On calcule donc la somme sur les triangles :
-        error² = Σ_T Aire_T * |grad_exact(centroïde_T) - grad_uh_T|²
+        error² = Σ_T Aire_T * Σ_q w_q |grad_exact(x_q) - grad_uh_T|²
+
+    Calcul vectorisé sur tous les triangles (error_norms.compute_error_norms).
+    Avec n_points=1 (défaut), x_q est le centroïde du triangle.
 
     Args:
         vertices: Coordonnées des sommets
         triangles: Connectivité
         uh: Solution numérique (vecteur des valeurs aux noeuds)
         grad_u_exact_func: Fonction retournant (du/dx, du/dy)
+        n_points: Points de quadrature de Gauss (1, 3, 6 ou 7)
 
     Returns:
         Erreur en semi-norme H¹
     """
-    error_squared = 0.0
-
-    for tri in triangles:
-        # Sommets
-        i0, i1, i2 = tri[0], tri[1], tri[2]
-        p0 = vertices[i0]
-        p1 = vertices[i1]
-        p2 = vertices[i2]
-
-        # Aire
-        A_tri = triangle_area(p0, p1, p2)
-
-        # Calcul du gradient de uh (constant sur le triangle)
-        M = np.array([[1.0, p0[0], p0[1]],
-                      [1.0, p1[0], p1[1]],
-                      [1.0, p2[0], p2[1]]])
-        M_inv = np.linalg.inv(M)
-        grads = M_inv[1:3, :]  # grad λ_i
-
-        # grad uh = Σ uh_i * grad λ_i
-        uh_values = np.array([uh[i0], uh[i1], uh[i2]])
-        grad_uh = grads.dot(uh_values)  # Shape (2,)
-
-        # Gradient exact évalué au centroïde du triangle
-        xc = (p0[0] + p1[0] + p2[0]) / 3.0
-        yc = (p0[1] + p1[1] + p2[1]) / 3.0
-        du_dx_exact, du_dy_exact = grad_u_exact_func(xc, yc)
-        grad_exact = np.array([du_dx_exact, du_dy_exact])
-
-        # Contribution à l'erreur
-        diff = grad_exact - grad_uh
-        error_squared += A_tri * np.dot(diff, diff)
-
-    return np.sqrt(error_squared)
+    norms = compute_error_norms(vertices, triangles, uh,
+                                grad_u_exact_func=grad_u_exact_func, n_points=n_points)
+    return norms['H1_semi']
 
 # Etude de convergence
 
@@ -392,14 +432,21 @@ def main():
     """
     Main : résolution pour plusieurs maillages et étude de convergence
     """
-    if len(sys.argv) < 2:
-        print("Usage: python bonus_assemblage.py mesh1.msh mesh2.msh ...")
+    # Options : --solver=direct|umfpack|cg, --precond=none|jacobi|ilu|amg
+    # et --renumber=none|rcm|nd
+    options = dict(arg[2:].split('=', 1) for arg in sys.argv[1:] if arg.startswith('--'))
+    solver = options.get('solver', 'direct')
+    precond = options.get('precond', 'jacobi')
+    renumber = options.get('renumber', 'none')
+    mesh_files = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+
+    if len(mesh_files) < 1:
+        print("Usage: python bonus_assemblage.py [--solver=cg] [--precond=amg] [--renumber=rcm] "
+              "mesh1.msh mesh2.msh ...")
         print("\nExemple:")
         print("  python bonus_assemblage.py meshes/m1.msh meshes/m2.msh meshes/m3.msh meshes/m4.msh")
         sys.exit(1)
 
-    mesh_files = sys.argv[1:]
-
     print("=" * 90)
     print("SOLVEUR ÉLÉMENTS FINIS P1 STANDALONE - CHPS0706")
     print("=" * 90)
@@ -420,19 +467,36 @@ def main():
 
         print(f"  Sommets : {mesh['nv']}, Triangles : {mesh['nt']}, Noeuds Dirichlet : {len(dirichlet_nodes)}")
 
+        # Renumérotation optionnelle des sommets (inv : ancien -> nouvel indice)
+        perm = compute_ordering(vertices, triangles, renumber)
+        if perm is not None:
+            vertices, triangles, _, inv = renumber_mesh(vertices, triangles, mesh['edges'], perm)
+            dirichlet_nodes = inv[np.asarray(dirichlet_nodes, dtype=int)]
+
         # Calcul de Q et h
         Q, h = mesh_quality_and_step(vertices, triangles)
         print(f"  Qualité Q = {Q:.8e}")
         print(f"  Pas h     = {h:.8e}")
 
-        # Assemblage
-        A, F = assemble_stiffness_and_load(vertices, triangles, f_source)
-
-        # Application de Dirichlet
-        A, F = apply_dirichlet_strong(A, F, dirichlet_nodes, vertices, u_exact)
-
-        # Résolution
-        uh = spla.spsolve(A.tocsr(), F)
+        # Assemblage (vectorisé, sans inversion par triangle)
+        A, F = assemble_stiffness_and_load_vectorized(vertices, triangles, f_source)
+
+        # Application de Dirichlet (système réduit aux noeuds libres)
+        A_LL, F_L, free_nodes, u_D = reduce_dirichlet_system(A, F, dirichlet_nodes, vertices, u_exact)
+
+        if perm is not None:
+            # Système réduit dans la numérotation d'origine (A_origine = A[inv][:, inv])
+            A_LL_orig = reduce_dirichlet_system(A[inv][:, inv], F[inv], mesh['dirichlet_nodes'],
+                                                mesh['vertices'], u_exact)[0]
+            print(format_ordering_report(matrix_profile_stats(A_LL_orig),
+                                         matrix_profile_stats(A_LL), renumber))
+
+        # Résolution (SPD : solveur direct ou gradient conjugué préconditionné)
+        info = solve_linear_system(A_LL, F_L, method=solver, precond=precond)
+        uh = lift_dirichlet_solution(info['solution'], free_nodes, u_D)
+        if solver == 'cg':
+            print(f"  CG ({precond}) : {info['iterations']} itérations, "
+                  f"résidu relatif {info['residuals'][-1]:.2e}")
 
         # Calcul de l'erreur H1
         eh = compute_H1_semi_error(vertices, triangles, uh, grad_u_exact)
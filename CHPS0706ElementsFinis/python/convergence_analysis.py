@@ -223,27 +223,38 @@ def generate_convergence_table(h_values, Q_values, errors, orders, method='stand
     print(f"Tableau sauvegarde : {output_file}\n")
 
 
-def analyze_convergence(mesh_analysis_results, method='standard'):
+def analyze_convergence(mesh_analysis_results, method='standard', solve_results=None):
     """
     Analyse complete de convergence
 
     Args:
         mesh_analysis_results: Resultats de l'analyse des maillages
         method: 'standard' ou 'penalized'
+        solve_results: Resultats structures du backend Python
+                       (python_backend.run_python_backend()[method]) ; si
+                       fournis, les erreurs, h et Q en sont tires directement
+                       au lieu des fichiers results/m*_error*.txt
     """
     print("\n" + "="*70)
     print(f"ANALYSE DE CONVERGENCE - Exercice 4 ({method.upper()})")
     print("="*70)
     print()
 
-    # Extraction h et Q
-    h_values = [res['h'] for res in mesh_analysis_results]
-    Q_values = [res['Q'] for res in mesh_analysis_results]
-
-    # Lecture des erreurs
-    print("Lecture des erreurs...")
-    errors = read_errors(method)
-    print(f"Erreurs lues : {errors}\n")
+    if solve_results is not None:
+        # Resultats transmis en memoire (backend Python)
+        h_values = [res['h'] if res is not None else None for res in solve_results]
+        Q_values = [res['Q'] if res is not None else None for res in solve_results]
+        errors = [res['error_H1'] if res is not None else None for res in solve_results]
+        print(f"Erreurs (backend Python) : {errors}\n")
+    else:
+        # Extraction h et Q
+        h_values = [res['h'] for res in mesh_analysis_results]
+        Q_values = [res['Q'] for res in mesh_analysis_results]
+
+        # Lecture des erreurs
+        print("Lecture des erreurs...")
+        errors = read_errors(method)
+        print(f"Erreurs lues : {errors}\n")
 
     # Calcul des ordres
     print("Calcul des ordres de convergence...")
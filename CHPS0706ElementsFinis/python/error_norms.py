@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Normes d'erreur EF-P1 vectorisees (L2, semi-norme H1, norme energie)
+
+Toutes les contributions elementaires sont calculees en une seule fois :
+- points de quadrature de Gauss de tous les triangles empiles (nt, nq, 2)
+- solution exacte et gradient exact evalues UNE fois sur ces tableaux
+- u_h et grad u_h reconstruits a partir des coordonnees barycentriques
+
+Quadratures disponibles sur le triangle (cle = nombre de points) :
+    1 point  : barycentre, exacte pour les polynomes de degre 1
+    3 points : Strang-Fix, degre 2
+    6 points : Dunavant, degre 4
+    7 points : Radon, degre 5
+"""
+
+import os
+import sys
+import numpy as np
+from typing import Callable, Dict, Tuple
+
+sys.path.append(os.path.dirname(__file__))
+
+from utils import barycentric_gradients
+
+
+def _permutations(a: float, b: float) -> list:
+    """Les 3 points (a, a, b), (a, b, a), (b, a, a) en coordonnees barycentriques"""
+    return [(b, a, a), (a, b, a), (a, a, b)]
+
+
+_SQRT15 = np.sqrt(15.0)
+
+# Coordonnees barycentriques (nq, 3) et poids (nq,) normalises (somme = 1)
+QUADRATURES = {
+    1: (np.array([(1.0 / 3.0, 1.0 / 3.0, 1.0 / 3.0)]),
+        np.array([1.0])),
+    3: (np.array(_permutations(1.0 / 6.0, 2.0 / 3.0)),
+        np.full(3, 1.0 / 3.0)),
+    6: (np.array(_permutations(0.445948490915965, 0.108103018168070)
+                 + _permutations(0.091576213509771, 0.816847572980459)),
+        np.array([0.223381589678011] * 3 + [0.109951743655322] * 3)),
+    7: (np.array([(1.0 / 3.0, 1.0 / 3.0, 1.0 / 3.0)]
+                 + _permutations((6.0 - _SQRT15) / 21.0, (9.0 + 2.0 * _SQRT15) / 21.0)
+                 + _permutations((6.0 + _SQRT15) / 21.0, (9.0 - 2.0 * _SQRT15) / 21.0)),
+        np.array([9.0 / 40.0]
+                 + [(155.0 - _SQRT15) / 1200.0] * 3
+                 + [(155.0 + _SQRT15) / 1200.0] * 3)),
+}
+
+
+def quadrature_rule(n_points: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Regle de quadrature de Gauss sur le triangle
+
+    Args:
+        n_points: Nombre de points (1, 3, 6 ou 7)
+
+    Returns:
+        (bary, weights) : coordonnees barycentriques (nq, 3) et poids (nq,)
+    """
+    if n_points not in QUADRATURES:
+        raise ValueError(f"Quadrature a {n_points} points non disponible "
+                         f"(choix : {sorted(QUADRATURES)})")
+    return QUADRATURES[n_points]
+
+
+def quadrature_points(vertices: np.ndarray, triangles: np.ndarray,
+                      bary: np.ndarray) -> np.ndarray:
+    """Points de quadrature physiques de tous les triangles, tableau (nt, nq, 2)"""
+    p = vertices[triangles[:, :3], :2]          # (nt, 3, 2)
+    return np.einsum('qi,tid->tqd', bary, p)
+
+
+def interpolate_exact(vertices: np.ndarray, u_exact_func: Callable) -> np.ndarray:
+    """Interpolee nodale r_h(u) = [u(x_1), ..., u(x_N)], evaluee en un appel"""
+    return u_exact_func(vertices[:, 0], vertices[:, 1])
+
+
+def energy_norm_error(Uh: np.ndarray, vertices: np.ndarray, K,
+                      u_exact_func: Callable) -> float:
+    """
+    Erreur en norme energie e_h = sqrt((U - U^h)^T K (U - U^h))
+
+    Args:
+        Uh: Solution EF-P1 aux sommets
+        vertices: Coordonnees des sommets
+        K: Matrice de rigidite (ou tout operateur supportant K @ v)
+        u_exact_func: Solution exacte u(x, y)
+    """
+    diff = interpolate_exact(vertices, u_exact_func) - Uh
+    return float(np.sqrt(np.abs(diff @ (K @ diff))))
+
+
+def compute_error_norms(vertices: np.ndarray, triangles: np.ndarray, uh: np.ndarray,
+                        u_exact_func: Callable = None, grad_u_exact_func: Callable = None,
+                        n_points: int = 3, K=None) -> Dict:
+    """
+    Normes d'erreur de la solution P1 u_h sur tout le maillage
+
+        ||u - u_h||_{L2}^2  = Σ_T |T| Σ_q w_q (u(x_q) - u_h(x_q))^2
+        |u - u_h|_{H1}^2    = Σ_T |T| Σ_q w_q |grad u(x_q) - grad u_h|_T|^2
+
+    Args:
+        vertices: Coordonnees des sommets (nv x 2)
+        triangles: Connectivite (nt x 3)
+        uh: Valeurs nodales de la solution EF-P1
+        u_exact_func: u(x, y) acceptant des tableaux (None : pas de norme L2)
+        grad_u_exact_func: grad u(x, y) -> (du_dx, du_dy) (None : pas de H1)
+        n_points: Nombre de points de quadrature (1, 3, 6 ou 7)
+        K: Matrice de rigidite pour la norme energie (optionnel)
+
+    Returns:
+        dict avec 'L2', 'H1_semi', 'H1' (si L2 et H1 disponibles), 'energy'
+        (si K fourni) et les contributions elementaires au carre
+        'L2_T', 'H1_semi_T' (tableaux (nt,))
+    """
+    bary, weights = quadrature_rule(n_points)
+    tri = triangles[:, :3]
+
+    grads, areas = barycentric_gradients(vertices, tri)
+    xq = quadrature_points(vertices, tri, bary)          # (nt, nq, 2)
+    x, y = xq[..., 0], xq[..., 1]
+
+    uh_T = uh[tri]                                       # (nt, 3)
+    results = {}
+
+    if u_exact_func is not None:
+        uh_q = uh_T @ bary.T                             # (nt, nq)
+        err = u_exact_func(x, y) - uh_q
+        results['L2_T'] = areas * (err**2 @ weights)
+        results['L2'] = float(np.sqrt(results['L2_T'].sum()))
+
+    if grad_u_exact_func is not None:
+        grad_uh = np.einsum('ti,tid->td', uh_T, grads)   # (nt, 2), constant par T
+        du_dx, du_dy = grad_u_exact_func(x, y)
+        ex = du_dx - grad_uh[:, 0:1]
+        ey = du_dy - grad_uh[:, 1:2]
+        results['H1_semi_T'] = areas * ((ex**2 + ey**2) @ weights)
+        results['H1_semi'] = float(np.sqrt(results['H1_semi_T'].sum()))
+
+    if 'L2' in results and 'H1_semi' in results:
+        results['H1'] = float(np.sqrt(results['L2']**2 + results['H1_semi']**2))
+
+    if K is not None and u_exact_func is not None:
+        results['energy'] = energy_norm_error(uh, vertices, K, u_exact_func)
+
+    return results
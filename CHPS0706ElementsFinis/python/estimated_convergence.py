@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Convergence estimee sans solution exacte (differences successives et
+extrapolation de Richardson)
+
+Solutions u_1, ..., u_K sur des maillages de pas h_k = h_1 / r^(k-1) (r = 2).
+Chaque u_k est transferee sur le maillage le plus fin :
+    - 'nested' : hierarchie de raffinements rouges du premier maillage
+                 (multigrid.MeshHierarchy), transfert par les prolongements P
+    - 'locate' : maillages quelconques (fichiers m1 ... mK), transfert par
+                 localisation des sommets fins (point_location.PointLocator)
+Pour des maillages emboites, l'interpolee P1 fine d'une fonction P1
+grossiere est la fonction elle-meme : les normes sont exactes.
+
+Differences successives d_k = u_{k+1} - u_k, calculees en une fois sur le
+tableau (K, N) des solutions transferees, mesurees avec les matrices de
+masse M (L2) et de rigidite K (semi-norme H1) du maillage fin :
+
+    ||d_k||^2 = diag(D M D^T),   |d_k|^2 = diag(D K D^T)
+
+Si ||u - u_k|| ~ C h_k^p :
+    ordre observe       p_k = ln(||d_k|| / ||d_{k+1}||) / ln(r)
+    erreur L2 estimee   ||u - u_k|| ~ ||d_k|| / (1 - r^(-p))
+    erreur H1 estimee   |u - u_k|   ~ |d_k| / sqrt(1 - r^(-2p))
+    limite extrapolee   u_inf = u_K + (u_K - u_{K-1}) / (r^p - 1)
+                        (nodale, et pour des grandeurs scalaires Q(u_k),
+                        p tire de trois niveaux)
+
+En semi-norme H1 (norme d'energie), l'orthogonalite de Galerkin sur des
+espaces emboites donne |u - u_k|^2 = |u - u_{k+1}|^2 + |d_k|^2 : les
+erreurs successives ne sont pas alignees et l'estimation L2 (1 - r^(-p))
+surestimerait l'erreur H1 d'un facteur ~ 1.7 pour p = 1.
+
+L'extrapolation nodale n'a de sens qu'aux sommets communs aux deux derniers
+maillages : aux autres sommets, u_{K-1} transferee porte en plus l'erreur
+d'interpolation P1 grossiere, qui n'a pas le meme developpement en h.
+
+Usage :
+    python estimated_convergence.py meshes/m1.msh meshes/m2.msh meshes/m3.msh meshes/m4.msh
+    python estimated_convergence.py meshes/m1.msh --nested 5     (m1 + 5 raffinements)
+"""
+
+import os
+import sys
+import time
+import numpy as np
+from functools import partial
+
+sys.path.append(os.path.dirname(__file__))
+
+from mesh_io import read_msh
+from solvers import solve_linear_system
+from validation_pen import (assemblage_EF_P1_vectorise, assemblage_masse_P1,
+                            fct_kappa, fct_f, fct_alpha, fct_uE)
+
+
+# ============================================================================
+# ORDRES OBSERVES ET EXTRAPOLATION
+# ============================================================================
+
+def observed_orders(differences, ratio=2.0):
+    """p_k = ln(d_k / d_{k+1}) / ln(r) pour une suite de normes de differences"""
+    d = np.asarray(differences, dtype=float)
+    return np.log(d[:-1] / d[1:]) / np.log(ratio)
+
+
+def richardson_extrapolate(values, ratio=2.0, order=None):
+    """
+    Extrapolation de Richardson d'une suite Q_1, ..., Q_K (scalaires ou
+    tableaux de meme forme, par exemple des valeurs nodales)
+
+    Args:
+        values: Suite (K, ...) des grandeurs calculees sur h_1 > ... > h_K
+        ratio: Rapport de raffinement r = h_k / h_{k+1}
+        order: Ordre p (None : ordre observe sur les trois derniers niveaux,
+               grandeurs scalaires uniquement)
+
+    Returns:
+        (p, limite) : Q_inf = Q_K + (Q_K - Q_{K-1}) / (r^p - 1)
+    """
+    Q = np.asarray(values, dtype=float)
+    if order is None:
+        if Q.ndim != 1 or len(Q) < 3:
+            raise ValueError("Ordre observe : trois grandeurs scalaires au moins")
+        order = np.log(abs((Q[-2] - Q[-3]) / (Q[-1] - Q[-2]))) / np.log(ratio)
+    return float(order), Q[-1] + (Q[-1] - Q[-2]) / (ratio**order - 1.0)
+
+
+# ============================================================================
+# SOLUTIONS ET TRANSFERT SUR LE MAILLAGE FIN
+# ============================================================================
+
+def solve_penalized(mesh, solver='direct', **solver_options):
+    """
+    Probleme penalise de validation_pen sur un maillage (dict read_msh) -> (Uh, K)
+
+    solver, solver_options : comme validation_pen.main (precond, tol, maxiter)
+    """
+    edges = np.column_stack([mesh['edges'], mesh['edge_labels']])
+    A, F, K = assemblage_EF_P1_vectorise(mesh['vertices'], mesh['triangles'], edges, {1},
+                                         fct_kappa, fct_f, fct_alpha, fct_uE, verbose=False)
+    if solver_options.get('precond') == 'schwarz':
+        from schwarz import schwarz_options
+        solver_options = {**schwarz_options(mesh, {1}), **solver_options}
+    return solve_linear_system(A, F, method=solver, **solver_options)['solution'], K
+
+
+def nested_sequence(coarse_mesh, n_refinements, solve=solve_penalized):
+    """
+    Solutions sur la hierarchie de raffinements rouges de coarse_mesh
+
+    Returns:
+        (meshes, solutions, U_fine, K_fine, common) : maillages de la
+        hierarchie, solutions sur chaque niveau, tableau (K, nv_fin) des
+        solutions prolongees sur le maillage le plus fin, sa matrice de
+        rigidite et le masque des sommets fins deja sommets de l'avant-dernier
+        niveau
+    """
+    from multigrid import MeshHierarchy
+
+    hierarchy = MeshHierarchy(coarse_mesh, n_refinements)
+    meshes = hierarchy.levels
+    U_fine = np.empty((len(meshes), meshes[-1]['nv']))
+    solutions = []
+    for l, mesh in enumerate(meshes):
+        U, K = solve(mesh)
+        solutions.append(U)
+        U_fine[l] = hierarchy.prolongate(U, l)
+    # red_refine garde les sommets grossiers en tete
+    common = np.arange(meshes[-1]['nv']) < meshes[-2]['nv'] if len(meshes) > 1 else None
+    return meshes, solutions, U_fine, K, common
+
+
+def located_sequence(meshes, solve=solve_penalized):
+    """
+    Solutions sur des maillages quelconques, transferees sur le dernier par
+    localisation des sommets fins (interpolation P1)
+
+    Returns:
+        (solutions, U_fine, K_fine, common) comme nested_sequence (sommets
+        communs : ligne de P reduite a un coefficient 1)
+    """
+    from point_location import PointLocator
+
+    fine_vertices = meshes[-1]['vertices']
+    U_fine = np.empty((len(meshes), len(fine_vertices)))
+    solutions, common = [], None
+    for l, mesh in enumerate(meshes):
+        U, K = solve(mesh)
+        solutions.append(U)
+        if l == len(meshes) - 1:
+            U_fine[l] = U
+        else:
+            P = PointLocator.from_mesh(mesh).interpolation_matrix(fine_vertices)
+            U_fine[l] = P @ U
+            if l == len(meshes) - 2:
+                common = P.max(axis=1).toarray().ravel() > 1.0 - 1e-8
+    return solutions, U_fine, K, common
+
+
+def successive_differences(U_fine, M, K):
+    """
+    Normes L2 et H1 (semi) des differences d_k = u_{k+1} - u_k sur le
+    maillage fin, toutes en une fois
+
+    Returns:
+        (L2, H1) : tableaux (K - 1,)
+    """
+    D = np.diff(U_fine, axis=0)                     # (K - 1, N)
+    L2 = np.sqrt(np.abs(np.einsum('kn,nk->k', D, M @ D.T)))
+    H1 = np.sqrt(np.abs(np.einsum('kn,nk->k', D, K @ D.T)))
+    return L2, H1
+
+
+def estimate_convergence(U_fine, M, K, ratio=2.0):
+    """
+    Ordres observes, erreurs estimees de chaque niveau et limite extrapolee
+
+    Returns:
+        dict avec 'diff_L2', 'diff_H1', 'order_L2', 'order_H1' (par paire),
+        'p_L2', 'p_H1' (derniers ordres), 'est_L2', 'est_H1' (erreur estimee
+        des niveaux 1 .. K-1) et 'U_extrapolated' (nodale, ordre p_L2,
+        valable aux sommets communs aux deux derniers maillages)
+    """
+    L2, H1 = successive_differences(U_fine, M, K)
+    order_L2, order_H1 = observed_orders(L2, ratio), observed_orders(H1, ratio)
+    p_L2 = order_L2[-1] if len(order_L2) else 2.0
+    p_H1 = order_H1[-1] if len(order_H1) else 1.0
+
+    _, U_ext = richardson_extrapolate(U_fine[-2:], ratio, p_L2)
+    return {
+        'diff_L2': L2, 'diff_H1': H1,
+        'order_L2': order_L2, 'order_H1': order_H1,
+        'p_L2': p_L2, 'p_H1': p_H1,
+        'est_L2': L2 / (1.0 - ratio**-p_L2),
+        'est_H1': H1 / np.sqrt(1.0 - ratio**(-2.0 * p_H1)),
+        'U_extrapolated': U_ext,
+    }
+
+
+def format_estimate_table(names, est, exact=None):
+    """Tableau des differences, ordres observes et erreurs estimees (et exactes)"""
+    lines = [f"{'maillage':<12} {'||d_k||_L2':>12} {'p_L2':>7} {'|d_k|_H1':>12} {'p_H1':>7} "
+             f"{'est. L2':>11} {'est. H1':>11}"
+             + (f" {'exacte L2':>11} {'exacte H1':>11}" if exact else "")]
+    n = len(est['diff_L2'])
+    for k, name in enumerate(names):
+        if k < n:
+            pl = f"{est['order_L2'][k]:.3f}" if k < n - 1 else "-"
+            ph = f"{est['order_H1'][k]:.3f}" if k < n - 1 else "-"
+            line = (f"{name:<12} {est['diff_L2'][k]:>12.4e} {pl:>7} {est['diff_H1'][k]:>12.4e} "
+                    f"{ph:>7} {est['est_L2'][k]:>11.4e} {est['est_H1'][k]:>11.4e}")
+        else:
+            line = f"{name:<12} {'-':>12} {'-':>7} {'-':>12} {'-':>7} {'-':>11} {'-':>11}"
+        if exact:
+            line += f" {exact[k]['L2']:>11.4e} {exact[k]['H1_semi']:>11.4e}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def main(mesh_files, nested=None, check_exact=True, solver='direct', **solver_options):
+    """
+    Convergence estimee sur une suite de maillages
+
+    Args:
+        mesh_files: Maillages du plus grossier au plus fin (mode 'locate'),
+                    ou le seul maillage grossier si nested est donne
+        nested: Nombre de raffinements rouges du premier maillage (mode 'nested')
+        check_exact: Comparer aux erreurs exactes de validation_pen (cas test)
+        solver, solver_options: Solveur lineaire et options (voir solve_penalized)
+    """
+    t0 = time.perf_counter()
+    solve = partial(solve_penalized, solver=solver, **solver_options)
+    if nested:
+        meshes, solutions, U_fine, K, common = nested_sequence(read_msh(mesh_files[0]), nested,
+                                                               solve)
+        names = [f"{os.path.basename(mesh_files[0])}+{l}r" for l in range(len(meshes))]
+    else:
+        meshes = [read_msh(f, cache=True) for f in mesh_files]
+        solutions, U_fine, K, common = located_sequence(meshes, solve)
+        names = [os.path.basename(f) for f in mesh_files]
+    fine = meshes[-1]
+    M = assemblage_masse_P1(fine['vertices'], fine['triangles'])
+
+    est = estimate_convergence(U_fine, M, K)
+    elapsed = time.perf_counter() - t0
+
+    exact = None
+    if check_exact:
+        from error_norms import compute_error_norms
+        from validation_pen import fct_u, grad_u_exact
+        exact = [compute_error_norms(m['vertices'], m['triangles'], U, fct_u, grad_u_exact, n_points=7)
+                 for m, U in zip(meshes, solutions)]
+
+    print(f"Convergence estimee ({'emboites' if nested else 'localisation'}, "
+          f"{len(meshes)} maillages, fin : {fine['nv']} sommets, {elapsed:.2f} s)")
+    print(format_estimate_table(names, est, exact))
+    print(f"\nOrdres observes (derniere paire) : p_L2 = {est['p_L2']:.3f}, p_H1 = {est['p_H1']:.3f}")
+
+    # Grandeur scalaire : Q(u_k) = ||u_k||^2_L2 (extrapolation a 3 niveaux ;
+    # la moyenne de u ne convient pas ici, elle vaut 1 par symetrie)
+    Q = np.einsum('kn,nk->k', U_fine, M @ U_fine.T)
+    if len(Q) >= 3 and Q[-1] != Q[-2]:
+        p_Q, limit = richardson_extrapolate(Q)
+        line = (f"||u_h||^2_L2 : derniere valeur {Q[-1]:.10f}, extrapolee {limit:.10f} "
+                f"(ordre observe {p_Q:.3f})")
+        if check_exact:
+            from error_norms import quadrature_rule, quadrature_points
+            from validation_pen import fct_u, triangle_area
+            bary, w = quadrature_rule(7)
+            V, T = fine['vertices'], fine['triangles'][:, :3]
+            pts = quadrature_points(V, T, bary)
+            area = triangle_area(*V[T[:, 0], :2].T, *V[T[:, 1], :2].T, *V[T[:, 2], :2].T)
+            u2 = fct_u(pts[..., 0], pts[..., 1])**2
+            line += f", exacte {np.sum(area * (u2 @ w)):.10f}"
+        print(line)
+
+    if check_exact and common is not None:
+        from validation_pen import fct_u
+        u_nodes = fct_u(fine['vertices'][common, 0], fine['vertices'][common, 1])
+        print(f"Sommets communs ({common.sum()}) : max|u - u_K| = "
+              f"{np.abs(u_nodes - U_fine[-1, common]).max():.3e}, max|u - u_extrapolee| = "
+              f"{np.abs(u_nodes - est['U_extrapolated'][common]).max():.3e}")
+    return est
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Convergence estimee sans solution exacte')
+    parser.add_argument('meshes', nargs='*',
+                        default=['meshes/m1.msh', 'meshes/m2.msh', 'meshes/m3.msh', 'meshes/m4.msh'],
+                        help='Maillages du plus grossier au plus fin')
+    parser.add_argument('--nested', type=int, default=None, metavar='N',
+                        help='N raffinements rouges du premier maillage au lieu des fichiers')
+    parser.add_argument('--no-exact', action='store_true',
+                        help='Ne pas comparer aux erreurs exactes')
+    args = parser.parse_args()
+
+    main(args.meshes, args.nested, not args.no_exact)
@@ -22,6 +22,11 @@ structurés, phénomène connu pour les éléments finis P1)
 
 Usage :
     python exercice6_convergence.py
+    python exercice6_convergence.py --workers 4      (maillages en parallele)
+    python exercice6_convergence.py --levels 1 8     (m1 ... m8, generes si absents)
+    python exercice6_convergence.py --order 2        (elements P2, p2_elements.py)
+    python exercice6_convergence.py --solver cg --precond gmg
+                                     (multigrille : maillages precedents = niveaux grossiers)
 
 Sorties :
     - results/exercice6_table.txt : Tableau de convergence avec ordre p
@@ -34,50 +39,147 @@ import numpy as np
 import matplotlib.pyplot as plt
 import sys
 import os
+import time
+import multiprocessing as mp
 
 sys.path.insert(0, os.path.dirname(__file__))
 
 from validation_pen import main as solve_fem
+from utils import peak_rss_mb
+from solvers import SOLVERS, PRECONDITIONERS
 
 
-def analyze_convergence(mesh_files):
+def _solve_mesh(task):
+    """
+    Resolution d'un maillage (execute dans un processus du pool)
+
+    Args:
+        task: (index, mesh_file, solve_options) ; solve_options['element_order']
+              choisit validation_pen.main (1, defaut) ou p2_elements.main (2)
+
+    Returns:
+        (index, resultat) : seules les grandeurs scalaires sont renvoyees,
+        pour ne pas transferer U^h et les matrices entre processus
+    """
+    index, mesh_file, solve_options = task
+    solve_options = dict(solve_options)
+    element_order = solve_options.pop('element_order', 1)
+    solve = solve_fem
+    if element_order == 2:
+        from p2_elements import main as solve
+
+    t0 = time.perf_counter()
+    result = solve(mesh_file, verbose=False, **solve_options)
+    wall_time = time.perf_counter() - t0
+
+    return index, {
+        'mesh': mesh_file,
+        'nv': result['nv'],
+        'ndof': result.get('ndof', result['nv']),
+        'element_order': element_order,
+        'nt': result['nt'],
+        'h': result['h'],
+        'Q': result['Q'],
+        'error_H1': result['error_H1'],
+        'solver': result['solver'],
+        'iterations': result['iterations'],
+        'converged': result['converged'],
+        'solve_time': result['solve_time'],
+        'wall_time': wall_time,
+        'peak_rss_mb': peak_rss_mb(),
+        'pid': os.getpid()
+    }
+
+
+def analyze_convergence(mesh_files, workers=1, **solve_options):
     """
     Analyse de convergence sur plusieurs maillages
 
+    Chaque maillage est un calcul independant : avec workers > 1, les
+    resolutions sont reparties sur un pool de processus et les resultats
+    sont affiches au fur et a mesure qu'ils arrivent. La liste renvoyee
+    reste dans l'ordre de mesh_files (tableau et graphique inchanges).
+
+    En mode parallele, chaque processus ne traite qu'un maillage
+    (maxtasksperchild=1) : 'peak_rss_mb' est alors le pic memoire de ce
+    seul maillage. En sequentiel, c'est le pic du processus depuis le debut.
+
     Args:
         mesh_files: Liste des fichiers maillages (m1.msh, m2.msh, m3.msh, m4.msh)
+        workers: Nombre de processus (1 : resolution sequentielle)
+        solve_options: Options transmises a validation_pen.main
+                       (solver='direct'|'umfpack'|'cg', precond, tol, maxiter ;
+                       element_order=2 : p2_elements.main ; avec precond='gmg',
+                       les maillages precedents de mesh_files sont les niveaux
+                       grossiers de chaque resolution)
 
     Returns:
-        dict avec les resultats de convergence
+        Liste des resultats (dicts), dans l'ordre de mesh_files
     """
-    results = []
-
     print("\n" + "="*80)
     print("EXERCICE 6 : ANALYSE DE CONVERGENCE NUMERIQUE")
     print("="*80)
 
-    # Resolution sur chaque maillage
-    for i, mesh_file in enumerate(mesh_files, 1):
-        print(f"\n[{i}/{len(mesh_files)}] Resolution sur {mesh_file}...")
-
+    tasks = []
+    for i, mesh_file in enumerate(mesh_files):
         if not os.path.exists(mesh_file):
-            print(f"   ERREUR: Maillage {mesh_file} non trouve!")
+            print(f"\n   ERREUR: Maillage {mesh_file} non trouve!")
             continue
+        options = solve_options
+        if solve_options.get('precond') == 'gmg':
+            # Niveaux grossiers de la multigrille : maillages precedents de la liste
+            options = dict(solve_options, coarse_meshes=[task[1] for task in tasks])
+        tasks.append((i, mesh_file, options))
+
+    if workers > 1:
+        print(f"\nResolution de {len(tasks)} maillages sur {workers} processus...")
+
+    def report(done, index, result):
+        print(f"\n[{done}/{len(tasks)}] {result['mesh']} : N = {result['ndof']}, "
+              f"h = {result['h']:.6f}, e_h = {result['error_H1']:.6e}")
+        rss = result['peak_rss_mb']
+        print(f"   solveur {result['solver']} ({result['iterations']} it., "
+              f"{result['solve_time']:.3f} s), temps total {result['wall_time']:.3f} s"
+              + (f", pic RSS {rss:.1f} Mo" if rss is not None else ""))
+        if not result['converged']:
+            print(f"   [WARN] solveur {result['solver']} NON converge : e_h non fiable")
+
+    collected = {}
+    if workers > 1 and len(tasks) > 1:
+        with mp.Pool(processes=min(workers, len(tasks)), maxtasksperchild=1) as pool:
+            for done, (index, result) in enumerate(pool.imap_unordered(_solve_mesh, tasks), 1):
+                collected[index] = result
+                report(done, index, result)
+    else:
+        for done, task in enumerate(tasks, 1):
+            print(f"\n[{done}/{len(tasks)}] Resolution sur {task[1]}...")
+            index, result = _solve_mesh(task)
+            collected[index] = result
+            report(done, index, result)
+
+    return [collected[i] for i in sorted(collected)]
+
+
+def generate_run_statistics(results):
+    """
+    Tableau des couts par maillage : temps de resolution, temps total
+    (lecture + assemblage + resolution + erreur) et pic memoire RSS
 
-        result = solve_fem(mesh_file, verbose=False)
-
-        results.append({
-            'mesh': mesh_file,
-            'nv': result['nv'],
-            'nt': result['nt'],
-            'h': result['h'],
-            'Q': result['Q'],
-            'error_H1': result['error_H1']
-        })
-
-        print(f"   N = {result['nv']}, h = {result['h']:.6f}, e_h = {result['error_H1']:.6e}")
-
-    return results
+    Returns:
+        str: Tableau formate
+    """
+    lines = []
+    lines.append(f"{'Maillage':<15} {'N ddl':<12} {'Solveur (s)':<14} {'Total (s)':<12} {'Pic RSS (Mo)':<14}")
+    lines.append("-"*70)
+    for res in results:
+        rss = res.get('peak_rss_mb')
+        rss_str = f"{rss:.1f}" if rss is not None else "-"
+        lines.append(f"{os.path.basename(res['mesh']):<15} {res['ndof']:<12} "
+                     f"{res['solve_time']:<14.4f} {res['wall_time']:<12.4f} {rss_str:<14}")
+    lines.append("-"*70)
+    lines.append(f"{'Somme':<28} {sum(r['solve_time'] for r in results):<14.4f} "
+                 f"{sum(r['wall_time'] for r in results):<12.4f}")
+    return "\n".join(lines)
 
 
 def compute_convergence_orders(results):
@@ -104,7 +206,7 @@ def compute_convergence_orders(results):
     return orders
 
 
-def generate_convergence_table(results, orders, output_file=None):
+def generate_convergence_table(results, orders, output_file=None, element_order=1):
     """
     Generate tableau de convergence formate
 
@@ -112,23 +214,25 @@ def generate_convergence_table(results, orders, output_file=None):
         results: Liste des resultats de convergence
         orders: Liste des ordres de convergence
         output_file: Fichier de sortie (optionnel)
+        element_order: Degre k des elements (1 : P1, 2 : P2)
 
     Returns:
         str: Tableau formate
     """
     table = []
     table.append("="*100)
-    table.append("TABLEAU DE CONVERGENCE - EXERCICE 6 (Python validation_pen.py)")
+    table.append("TABLEAU DE CONVERGENCE - EXERCICE 6 (Python validation_pen.py)" if element_order == 1
+                 else f"TABLEAU DE CONVERGENCE - EXERCICE 6 (Python p2_elements.py, P{element_order})")
     table.append("="*100)
     table.append("")
 
-    header = f"{'Maillage':<15} {'N sommets':<12} {'Q':<20} {'h':<20} {'e_h (energie)':<20} {'Ordre p':<15}"
+    header = f"{'Maillage':<15} {'N sommets' if element_order == 1 else 'N ddl':<12} {'Q':<20} {'h':<20} {'e_h (energie)':<20} {'Ordre p':<15}"
     table.append(header)
     table.append("-"*100)
 
     for i, res in enumerate(results):
         mesh_name = os.path.basename(res['mesh'])
-        nv = res['nv']
+        nv = res.get('ndof', res['nv'])
         Q = res['Q']
         h = res['h']
         error = res['error_H1']
@@ -139,9 +243,13 @@ def generate_convergence_table(results, orders, output_file=None):
         else:
             line = f"{mesh_name:<15} {nv:<12} {Q:<20.16f} {h:<20.16f} {error:<20.16e} {'-':<15}"
 
+        if not res.get('converged', True):
+            line = line.rstrip() + "  (*)"
         table.append(line)
 
     table.append("-"*100)
+    if not all(res.get('converged', True) for res in results):
+        table.append("(*) Solveur iteratif NON converge (maxiter atteint) : e_h et p non fiables")
     table.append("")
 
     table.append("Ordres de convergence (10 decimales) :")
@@ -159,13 +267,17 @@ def generate_convergence_table(results, orders, output_file=None):
         table.append("  L'erreur calculee est la NORME ENERGIE : e_h = sqrt((U - U^h)^T K (U - U^h))")
         table.append("  Cette norme differe de la semi-norme H^1 classique.")
         table.append("")
-        if 0.9 <= p_mean <= 1.1:
-            table.append("Convergence : p ~ 1")
-            table.append("  L'erreur en norme energie decroit comme O(h).")
-        elif 1.9 <= p_mean <= 2.1:
-            table.append("Super-convergence observee : p ~ 2")
+        k = element_order
+        if k - 0.1 <= p_mean <= k + 0.1:
+            table.append(f"Convergence : p ~ {k}")
+            table.append("  L'erreur en norme energie decroit comme " + ("O(h)." if k == 1 else f"O(h^{k})."))
+        elif k + 0.9 <= p_mean <= k + 1.1:
+            table.append(f"Super-convergence observee : p ~ {k + 1}")
             table.append("  Phenomene connu pour la norme energie sur maillages structures uniformes.")
-            table.append("  Conforme a la theorie des elements finis P1.")
+            table.append(f"  Conforme a la theorie des elements finis P{k}.")
+        elif k >= 2 and k < p_mean < k + 1:
+            table.append(f"Super-convergence partielle : {k} < p < {k + 1}")
+            table.append(f"  L'erreur I_h u - u_h converge plus vite que l'erreur d'interpolation O(h^{k}).")
         else:
             table.append(f"Ordre de convergence inattendu : p ~ {p_mean:.2f}")
 
@@ -182,7 +294,7 @@ def generate_convergence_table(results, orders, output_file=None):
     return table_str
 
 
-def plot_convergence(results, orders, output_file=None):
+def plot_convergence(results, orders, output_file=None, element_order=1):
     """
     Graphique de convergence log-log
 
@@ -190,7 +302,9 @@ def plot_convergence(results, orders, output_file=None):
         results: Liste des resultats de convergence
         orders: Liste des ordres de convergence
         output_file: Fichier de sortie (optionnel)
+        element_order: Degre k des elements (droites O(h^k) et O(h^(k+1)))
     """
+    k = element_order
 
     h_values = np.array([res['h'] for res in results])
     error_values = np.array([res['error_H1'] for res in results])
@@ -203,17 +317,20 @@ def plot_convergence(results, orders, output_file=None):
     h_ref = h_values[0]
     e_ref = error_values[0]
     h_theory = np.array([h_ref, h_values[-1]])
-    e_theory_h1 = e_ref * (h_theory / h_ref)**1.0
+    e_theory_h1 = e_ref * (h_theory / h_ref)**float(k)
     plt.loglog(h_theory, e_theory_h1, '--', linewidth=2,
-               label='Theorie O(h) - P1', color='red', alpha=0.7)
+               label=f"Theorie O(h{'' if k == 1 else f'^{k}'}) - P{k}", color='red', alpha=0.7)
 
-    e_theory_h2 = e_ref * (h_theory / h_ref)**2.0
+    e_theory_h2 = e_ref * (h_theory / h_ref)**float(k + 1)
     plt.loglog(h_theory, e_theory_h2, ':', linewidth=2,
-               label='Super-convergence O(h²)', color='green', alpha=0.7)
+               label='Super-convergence O(h²)' if k == 1 else f'Super-convergence O(h^{k + 1})',
+               color='green', alpha=0.7)
 
     plt.xlabel('Pas de maillage h', fontsize=12)
     plt.ylabel('Erreur en norme energie $\\|u_h - r_h(u)\\|_K$', fontsize=12)
-    plt.title('Convergence numerique - Exercice 6 (Python validation_pen.py)', fontsize=14, fontweight='bold')
+    plt.title('Convergence numerique - Exercice 6 (Python validation_pen.py)' if k == 1
+              else f'Convergence numerique - Exercice 6 (Python p2_elements.py, P{k})',
+              fontsize=14, fontweight='bold')
     plt.grid(True, which='both', alpha=0.3)
     plt.legend(fontsize=11)
 
@@ -236,16 +353,62 @@ def plot_convergence(results, orders, output_file=None):
 
 def main():
     """Fonction principale"""
-
-    mesh_files = [
-        'meshes/m1.msh',
-        'meshes/m2.msh',
-        'meshes/m3.msh',
-        'meshes/m4.msh'
-    ]
-
-
-    results = analyze_convergence(mesh_files)
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Analyse de convergence EF-P1 (Exercice 6)')
+    parser.add_argument('--solver', choices=SOLVERS, default='direct',
+                        help='Solveur lineaire (defaut : direct)')
+    parser.add_argument('--precond', choices=PRECONDITIONERS, default='jacobi',
+                        help='Preconditionneur du gradient conjugue (defaut : jacobi)')
+    parser.add_argument('--tol', type=float, default=1e-10,
+                        help='Tolerance sur le residu relatif (defaut : 1e-10)')
+    parser.add_argument('--maxiter', type=int, default=None,
+                        help="Nombre maximal d'iterations")
+    parser.add_argument('-j', '--workers', type=int, default=1,
+                        help='Nombre de processus pour resoudre les maillages en parallele '
+                             '(defaut : 1, sequentiel ; 0 : tous les coeurs)')
+    parser.add_argument('--order', type=int, choices=[1, 2], default=1,
+                        help='Degre des elements finis (1 : P1, validation_pen ; 2 : P2, p2_elements)')
+    parser.add_argument('--levels', type=int, nargs=2, metavar=('K_MIN', 'K_MAX'),
+                        help='Maillages m<K_MIN> ... m<K_MAX> (generes par mesh_generator '
+                             's\'ils manquent, ex. --levels 1 10)')
+    parser.add_argument('--estimated', action='store_true',
+                        help='Convergence estimee sans solution exacte (differences successives '
+                             'et Richardson, estimated_convergence) ; P1 uniquement')
+    parser.add_argument('meshes', nargs='*',
+                        default=['meshes/m1.msh', 'meshes/m2.msh', 'meshes/m3.msh', 'meshes/m4.msh'],
+                        help='Maillages, du plus grossier au plus fin (defaut : m1 a m4)')
+    args = parser.parse_args()
+    if args.precond in ('schwarz', 'gmg') and args.order != 1:
+        parser.error(f"--precond {args.precond} : elements P1 uniquement "
+                     "(partition ou hierarchie des sommets du maillage)")
+    if args.estimated and args.order != 1:
+        parser.error("--estimated : elements P1 uniquement (transfert et matrice de masse P1)")
+    if args.estimated and args.precond == 'gmg':
+        parser.error("--estimated : preconditionneur 'gmg' non disponible "
+                     "(pas de hierarchie par maillage)")
+
+    workers = args.workers if args.workers > 0 else os.cpu_count()
+
+    mesh_files = args.meshes
+    cache = False
+    if args.levels:
+        from mesh_generator import generate_convergence_meshes
+        k_min, k_max = args.levels
+        mesh_files = generate_convergence_meshes(range(k_min, k_max + 1), 'meshes')
+        cache = True
+
+    if args.estimated:
+        from estimated_convergence import main as estimated_main
+        estimated_main(mesh_files, solver=args.solver, precond=args.precond,
+                       tol=args.tol, maxiter=args.maxiter)
+        return 0
+
+    t0 = time.perf_counter()
+    results = analyze_convergence(mesh_files, workers=workers, solver=args.solver,
+                                  precond=args.precond, tol=args.tol, maxiter=args.maxiter,
+                                  cache=cache, element_order=args.order)
+    elapsed = time.perf_counter() - t0
 
     if not results:
         print("\nERREUR: Aucun resultat obtenu!")
@@ -265,21 +428,26 @@ def main():
         p_mean = np.mean(orders)
         print(f"\n  Ordre moyen : p ~ {p_mean:.4f}")
 
+    print("\n" + "="*80)
+    print(f"COUTS PAR MAILLAGE ({workers} processus, temps ecoule {elapsed:.3f} s)")
+    print("="*80)
+    print(generate_run_statistics(results))
 
     print("\n" + "="*80)
     print("GENERATION DU TABLEAU")
     print("="*80)
 
-    output_table = 'results/exercice6_table.txt'
-    table_str = generate_convergence_table(results, orders, output_table)
+    suffix = '' if args.order == 1 else f'_P{args.order}'
+    output_table = f'results/exercice6_table{suffix}.txt'
+    table_str = generate_convergence_table(results, orders, output_table, element_order=args.order)
     print("\n" + table_str)
 
     print("\n" + "="*80)
     print("GENERATION DU GRAPHIQUE")
     print("="*80)
 
-    output_plot = 'results/exercice6_plot.png'
-    plot_convergence(results, orders, output_plot)
+    output_plot = f'results/exercice6_plot{suffix}.png'
+    plot_convergence(results, orders, output_plot, element_order=args.order)
 
 
     print("\n" + "="*80)
@@ -289,14 +457,22 @@ def main():
     print(f"  - Tableau  : {output_table}")
     print(f"  - Graphique: {output_plot}")
 
+    not_converged = [os.path.basename(res['mesh']) for res in results if not res['converged']]
+    if not_converged:
+        print(f"\n[WARN] Solveur NON converge sur {', '.join(not_converged)} : "
+              "augmenter --maxiter ou changer --precond")
+
     if orders:
         p_mean = np.mean(orders)
-        if 0.9 <= p_mean <= 1.1:
-            print(f"\n[OK] Resultats convenables : ordre de convergence p ~ {p_mean:.2f} ~ 1")
-            print("  Conforme a la theorie pour des elements P1.")
-        elif 1.8 <= p_mean <= 2.2:
-            print(f"\n[OK] Super-convergence observee : p ~ {p_mean:.2f} ~ 2")
+        k = args.order
+        if k - 0.1 <= p_mean <= k + 0.1:
+            print(f"\n[OK] Resultats convenables : ordre de convergence p ~ {p_mean:.2f} ~ {k}")
+            print(f"  Conforme a la theorie pour des elements P{k}.")
+        elif k + 0.8 <= p_mean <= k + 1.2:
+            print(f"\n[OK] Super-convergence observee : p ~ {p_mean:.2f} ~ {k + 1}")
             print("  Possible sur maillages structures uniformes.")
+        elif k >= 2 and k < p_mean < k + 1:
+            print(f"\n[OK] Super-convergence partielle : {k} < p ~ {p_mean:.2f} < {k + 1}")
         else:
             print(f"\n[WARN] Ordre de convergence inattendu : p ~ {p_mean:.2f}")
 
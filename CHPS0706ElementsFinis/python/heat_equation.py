@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Equation de la chaleur instationnaire EF-P1 par θ-schema
+
+    M dU/dt + A U = F,   A = K(κ) + B(α) (rigidite + Fourier-Robin penalise)
+
+avec la matrice de masse P1 assemblee par lots :
+
+    m^l = |T_l| / 12 [2 1 1; 1 2 1; 1 1 2]
+
+θ-schema de pas Δt (θ = 1 : Euler implicite, θ = 1/2 : Crank-Nicolson) :
+
+    (M + θ Δt A) U^{n+1} = (M - (1 - θ) Δt A) U^n + Δt F
+
+La matrice de gauche est factorisee UNE fois (splu) ; chaque pas ne coute
+qu'un produit par la matrice de droite (pre-assemblee) et deux descentes-
+remontees triangulaires. Les instantanes sont ecrits au fil de l'eau dans
+un fichier .npy (SnapshotWriter), relu en memoire projetee par
+np.load(..., mmap_mode='r') : la memoire vive ne depend pas du nombre de
+pas (ecriture par blocs via un descripteur de fichier, pas de pages
+projetees modifiees qui s'accumuleraient dans le RSS).
+
+Remarque : avec α = 1e8, les modes de bord ont Δt λ >> 1. Crank-Nicolson
+n'amortit pas ces modes (facteur d'amplification -> -1) et les valeurs
+Dirichlet oscillent ; Euler implicite (defaut) les amortit en un pas.
+
+Usage :
+    python heat_equation.py meshes/m5.msh --dt 1e-2 --steps 2000 --save-every 10
+"""
+
+import os
+import sys
+import time
+import numpy as np
+import scipy.sparse.linalg as spla
+
+sys.path.append(os.path.dirname(__file__))
+
+from validation_pen import (assemblage_EF_P1_vectorise, assemblage_masse_P1, read_freefem_mesh,
+                            fct_kappa, fct_f, fct_alpha, fct_uE)
+from utils import peak_rss_mb
+
+
+# Schemas usuels du θ-schema
+THETA_SCHEMES = {
+    'euler': 1.0,
+    'crank_nicolson': 0.5,
+}
+
+
+class SnapshotWriter:
+    """
+    Tableau .npy (n_snapshots, n) ecrit ligne a ligne sans le garder en memoire
+
+    Le fichier (en-tete et taille) est cree par np.lib.format.open_memmap,
+    puis les lignes sont ecrites par blocs de buffer_rows a leur position.
+
+    Args:
+        filename: Fichier .npy
+        shape: (n_snapshots, n)
+        buffer_rows: Lignes gardees en memoire avant ecriture
+    """
+
+    def __init__(self, filename, shape, buffer_rows=16):
+        os.makedirs(os.path.dirname(filename) or '.', exist_ok=True)
+        array = np.lib.format.open_memmap(filename, mode='w+', dtype=np.float64, shape=shape)
+        self.offset = array.offset
+        del array
+        self.filename = filename
+        self.row_bytes = shape[1] * 8
+        self.buffer = np.empty((buffer_rows, shape[1]))
+        self.start, self.count = 0, 0
+        self.file = open(filename, 'r+b')
+
+    def write(self, row):
+        """Ajoute la ligne suivante"""
+        self.buffer[self.count] = row
+        self.count += 1
+        if self.count == len(self.buffer):
+            self.flush()
+
+    def flush(self):
+        if self.count:
+            self.file.seek(self.offset + self.start * self.row_bytes)
+            self.file.write(self.buffer[:self.count].tobytes())
+            self.start += self.count
+            self.count = 0
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class HeatSolver:
+    """
+    θ-schema a pas constant, matrice M + θ Δt A factorisee une fois
+
+    Args:
+        vertices, triangles, edges, boundary_edges: maillage (comme
+            assemblage_EF_P1_vectorise)
+        dt: Pas de temps Δt
+        theta: θ dans [0.5, 1] ou nom de THETA_SCHEMES
+        kappa_func, f_func, alpha_func, uE_func: donnees du probleme
+            (par defaut celles de validation_pen, source stationnaire)
+    """
+
+    def __init__(self, vertices, triangles, edges, boundary_edges, dt, theta='euler',
+                 kappa_func=fct_kappa, f_func=fct_f, alpha_func=fct_alpha, uE_func=fct_uE):
+        self.theta = THETA_SCHEMES[theta] if isinstance(theta, str) else float(theta)
+        if not 0.5 <= self.theta <= 1.0:
+            raise ValueError(f"θ = {self.theta} : schema non inconditionnellement stable "
+                             "(θ dans [0.5, 1])")
+        self.dt = float(dt)
+
+        t0 = time.perf_counter()
+        self.A, self.F, self.K = assemblage_EF_P1_vectorise(
+            vertices, triangles, edges, boundary_edges,
+            kappa_func, f_func, alpha_func, uE_func, verbose=False)
+        self.M = assemblage_masse_P1(vertices, triangles)
+        self.assembly_time = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        lhs = (self.M + (self.theta * self.dt) * self.A).tocsc()
+        self.lu = spla.splu(lhs)
+        self.rhs_matrix = (self.M - ((1.0 - self.theta) * self.dt) * self.A).tocsr()
+        self.dtF = self.dt * self.F
+        self.factor_time = time.perf_counter() - t0
+
+    @property
+    def n(self):
+        return self.A.shape[0]
+
+    def step(self, U):
+        """Un pas de temps U^n -> U^{n+1}"""
+        return self.lu.solve(self.rhs_matrix @ U + self.dtF)
+
+    def run(self, U0, n_steps, snapshots=None, save_every=1, verbose=True):
+        """
+        n_steps pas a partir de U0
+
+        Args:
+            U0: Condition initiale (vecteur nv, ou scalaire)
+            n_steps: Nombre de pas de temps
+            snapshots: Fichier .npy des instantanes (None : aucun), tableau
+                       (n_steps // save_every + 1, nv) ecrit au fil de l'eau ;
+                       les instants sont dans <nom>.times.npy
+            save_every: Ecrire un instantane tous les save_every pas (>= 1)
+
+        Returns:
+            dict avec 'U' (etat final), 't', 'n_steps', 'step_time' (moyen),
+            'snapshots' (chemin) et 'n_snapshots'
+        """
+        if save_every < 1:
+            raise ValueError(f"save_every doit etre >= 1 (recu {save_every})")
+        U = np.broadcast_to(np.asarray(U0, dtype=float), (self.n,)).copy()
+
+        store = None
+        n_snap = n_steps // save_every + 1
+        if snapshots is not None:
+            store = SnapshotWriter(snapshots, (n_snap, self.n))
+            store.write(U)
+
+        t0 = time.perf_counter()
+        try:
+            for n in range(1, n_steps + 1):
+                U = self.step(U)
+                if store is not None and n % save_every == 0:
+                    store.write(U)
+                    if verbose and (n // save_every) % max(1, n_snap // 10) == 0:
+                        print(f"  pas {n:>7}/{n_steps} : t = {n * self.dt:.4g}, "
+                              f"max|U| = {np.abs(U).max():.6f}")
+        finally:
+            if store is not None:
+                store.close()
+        elapsed = time.perf_counter() - t0
+
+        if store is not None:
+            np.save(os.path.splitext(snapshots)[0] + '.times.npy',
+                    self.dt * save_every * np.arange(n_snap))
+
+        return {'U': U, 't': n_steps * self.dt, 'n_steps': n_steps,
+                'step_time': elapsed / max(n_steps, 1), 'total_time': elapsed,
+                'snapshots': snapshots, 'n_snapshots': n_snap if snapshots else 0}
+
+
+def main(mesh_file, dt=1e-2, n_steps=1000, theta='euler', save_every=10,
+         snapshots='results/heat_snapshots.npy', U0=0.0):
+    """
+    Resolution instationnaire puis comparaison a la solution stationnaire
+    (U^n -> A^{-1} F quand t -> infini)
+    """
+    mesh = read_freefem_mesh(mesh_file, cache=True)
+    print(f"Maillage {mesh_file} : {mesh['nv']} sommets, {mesh['nt']} triangles")
+
+    solver = HeatSolver(mesh['vertices'], mesh['triangles'], mesh['edges'],
+                        mesh['dirichlet_labels'], dt, theta)
+    print(f"  θ = {solver.theta}, Δt = {dt}, {n_steps} pas (t final {n_steps * dt:.4g})")
+    print(f"  assemblage K, A, M : {solver.assembly_time:.3f} s, "
+          f"factorisation M + θΔtA : {solver.factor_time:.3f} s")
+
+    rss_before = peak_rss_mb()
+    result = solver.run(U0, n_steps, snapshots, save_every)
+    rss_after = peak_rss_mb()
+
+    U_steady = spla.spsolve(solver.A.tocsc(), solver.F)
+    diff = result['U'] - U_steady
+    ecart = float(np.sqrt(abs(diff @ (solver.K @ diff))))
+
+    print(f"  {n_steps} pas en {result['total_time']:.3f} s "
+          f"({1e3 * result['step_time']:.3f} ms/pas)")
+    if snapshots:
+        size = os.path.getsize(snapshots) / 1e6
+        print(f"  {result['n_snapshots']} instantanes ecrits dans {snapshots} ({size:.1f} Mo sur disque)")
+    if rss_after is not None:
+        print(f"  pic RSS : {rss_before:.1f} Mo avant la boucle, {rss_after:.1f} Mo apres")
+    print(f"  ||U(t) - U_stationnaire||_K = {ecart:.3e}")
+    return result
+
+
+if __name__ == "__main__":
+    import argparse
+
+    def positive_int(text):
+        value = int(text)
+        if value < 1:
+            raise argparse.ArgumentTypeError(f"entier >= 1 attendu (recu {text})")
+        return value
+
+    parser = argparse.ArgumentParser(description='Equation de la chaleur EF-P1 (θ-schema)')
+    parser.add_argument('mesh', nargs='?', default='meshes/m4.msh', help='Maillage .msh')
+    parser.add_argument('--dt', type=float, default=1e-2, help='Pas de temps (defaut : 1e-2)')
+    parser.add_argument('--steps', type=int, default=1000, help='Nombre de pas (defaut : 1000)')
+    parser.add_argument('--theta', default='euler',
+                        help="θ (nombre dans [0.5, 1]) ou 'euler' / 'crank_nicolson'")
+    parser.add_argument('--save-every', type=positive_int, default=10,
+                        help='Un instantane tous les N pas (defaut : 10)')
+    parser.add_argument('--output', default='results/heat_snapshots.npy',
+                        help='Fichier .npy des instantanes (memmap)')
+    args = parser.parse_args()
+
+    theta = args.theta if args.theta in THETA_SCHEMES else float(args.theta)
+    main(args.mesh, args.dt, args.steps, theta, args.save_every, args.output)
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Operateur EF-P1 sans matrice (matrix-free) pour les maillages tres fins
+
+La matrice de rigidite elementaire (Annexe) s'ecrit, avec les vecteurs
+aretes opposees d_0 = P2 - P3, d_1 = P3 - P1, d_2 = P1 - P2 (Σ d_i = 0) :
+
+    k^l_ij = κ_l / (4 |T_l|) d_i · d_j = g_i · g_j,   g_i = sqrt(κ_l / (4 |T_l|)) d_i
+
+Le produit y = K u se calcule donc triangle par triangle sans stocker K :
+
+    s_l = Σ_j g_j u_j  (vecteur de R^2),   y_i += g_i · s_l
+
+(gather u[triangles], calcul vectorise, scatter par np.bincount). Seuls
+g_0 et g_1 sont stockes (g_2 = -g_0 - g_1) : 32 octets par triangle plus
+12 pour la connectivite, contre ~84 octets par triangle pour les CSR de A
+et K (7 coefficients + indices par ligne, nv ~ nt/2) et surtout ~150
+octets par triangle de triplets COO pendant l'assemblage. Les termes de bord Fourier-Robin p^a = α L/6 [2 1; 1 2]
+ne demandent qu'un coefficient par arete Dirichlet.
+
+L'operateur est un scipy LinearOperator : il s'utilise avec le gradient
+conjugue de solvers.py (preconditionneur 'none' ou 'jacobi', grace a
+diagonal()) et avec error_norms.energy_norm_error (K @ v).
+"""
+
+import os
+import sys
+import copy
+import numpy as np
+import scipy.sparse.linalg as spla
+
+sys.path.append(os.path.dirname(__file__))
+
+from mesh_topology import select_edges
+from validation_pen import (_eval_par_lot, triangle_area, coeffelem_P1_source_vect,
+                            coeffelem_P1_transf_vect)
+
+
+# Triangles traites par lot dans matvec (borne les tableaux temporaires)
+CHUNK_TRIANGLES = 1 << 20
+
+
+class P1Operator(spla.LinearOperator):
+    """
+    A = K(κ) + B(α) applique sans assemblage
+
+    Args:
+        vertices: (nv, >=2) coordonnees des sommets
+        triangles: (nt, >=3) connectivite
+        edges: (nbe, 3) aretes de bord i1 i2 label (None : pas de terme de bord)
+        boundary_edges: labels des aretes Fourier-Robin (penalisation)
+        kappa_func: κ(x, y) ou constante, evaluee au barycentre
+        alpha_func: α(x, y) ou constante, evaluee au milieu des aretes
+                    (None : operateur de rigidite K seul)
+    """
+
+    def __init__(self, vertices, triangles, edges=None, boundary_edges=(),
+                 kappa_func=1.0, alpha_func=None, chunk=CHUNK_TRIANGLES):
+        vertices = np.asarray(vertices, dtype=float)[:, :2]
+        nv = len(vertices)
+        super().__init__(dtype=np.float64, shape=(nv, nv))
+
+        # Connectivite et facteurs g_0, g_1 stockes par composante (3, nt) et
+        # (4, nt) : lignes contigues pour les operations vectorisees de matvec
+        self.triangles = np.ascontiguousarray(np.asarray(triangles)[:, :3].T)
+        self.chunk = chunk
+        kappa = kappa_func if callable(kappa_func) else (lambda x, y: kappa_func)
+
+        nt = self.triangles.shape[1]
+        self.G = np.empty((4, nt))
+        for start in range(0, nt, chunk):
+            P = vertices[self.triangles[:, start:start + chunk]]        # (3, n, 2)
+            area = triangle_area(P[0, :, 0], P[0, :, 1], P[1, :, 0], P[1, :, 1],
+                                 P[2, :, 0], P[2, :, 1])
+            kappa_vals = _eval_par_lot(kappa, P[:, :, 0].mean(axis=0), P[:, :, 1].mean(axis=0))
+            scale = np.sqrt(kappa_vals / (4.0 * area))
+            self.G[0:2, start:start + chunk] = scale * (P[1] - P[2]).T
+            self.G[2:4, start:start + chunk] = scale * (P[2] - P[0]).T
+
+        # Termes de bord : w_a = α_a L_a / 6
+        self.boundary = np.empty((0, 2), dtype=int)
+        self.w = np.empty(0)
+        if alpha_func is not None and edges is not None:
+            alpha = alpha_func if callable(alpha_func) else (lambda x, y: alpha_func)
+            self.boundary = select_edges(edges, boundary_edges)
+            Q = vertices[self.boundary]
+            length = np.hypot(Q[:, 1, 0] - Q[:, 0, 0], Q[:, 1, 1] - Q[:, 0, 1])
+            self.w = _eval_par_lot(alpha, Q[:, :, 0].mean(axis=1), Q[:, :, 1].mean(axis=1)) \
+                * length / 6.0
+
+    @property
+    def nbytes(self):
+        """Memoire stockee par l'operateur (facteurs et connectivite)"""
+        return self.G.nbytes + self.triangles.nbytes + self.w.nbytes + self.boundary.nbytes
+
+    def stiffness(self):
+        """Operateur de rigidite K seul, partageant les facteurs geometriques"""
+        K = copy.copy(self)
+        K.boundary, K.w = self.boundary[:0], self.w[:0]
+        return K
+
+    def _matvec(self, u):
+        u = np.ravel(u)
+        nv = self.shape[0]
+        y = np.zeros(nv)
+
+        for start in range(0, self.triangles.shape[1], self.chunk):
+            t0, t1, t2 = self.triangles[:, start:start + self.chunk]
+            g0x, g0y, g1x, g1y = self.G[:, start:start + self.chunk]
+            u2 = u[t2]
+            a = u[t0] - u2
+            b = u[t1] - u2
+            sx = g0x * a
+            sx += g1x * b
+            sy = g0y * a
+            sy += g1y * b
+            y0 = g0x * sx
+            y0 += g0y * sy
+            y1 = g1x * sx
+            y1 += g1y * sy
+            y += np.bincount(t0, weights=y0, minlength=nv)
+            y += np.bincount(t1, weights=y1, minlength=nv)
+            y0 += y1
+            y -= np.bincount(t2, weights=y0, minlength=nv)         # g_2 = -g_0 - g_1
+
+        if len(self.w):
+            i, j = self.boundary[:, 0], self.boundary[:, 1]
+            yA = np.column_stack([self.w * (2.0 * u[i] + u[j]), self.w * (u[i] + 2.0 * u[j])])
+            y += np.bincount(self.boundary.ravel(), weights=yA.ravel(), minlength=nv)
+
+        return y
+
+    def _rmatvec(self, u):
+        return self._matvec(u)
+
+    def diagonal(self):
+        """Diagonale de A (preconditionneur de Jacobi)"""
+        nv = self.shape[0]
+        g0x, g0y, g1x, g1y = self.G
+        t0, t1, t2 = self.triangles
+        d = np.bincount(t0, weights=g0x**2 + g0y**2, minlength=nv)
+        d += np.bincount(t1, weights=g1x**2 + g1y**2, minlength=nv)
+        d += np.bincount(t2, weights=(g0x + g1x)**2 + (g0y + g1y)**2, minlength=nv)
+        if len(self.w):
+            d += np.bincount(self.boundary.ravel(), weights=np.repeat(2.0 * self.w, 2),
+                             minlength=nv)
+        return d
+
+
+def assemblage_EF_P1_sans_matrice(vertices, triangles, edges, boundary_edges,
+                                  kappa_func, f_func, alpha_func, uE_func):
+    """
+    Equivalent sans matrice de assemblage_EF_P1_vectorise
+
+    Returns:
+        A: P1Operator (rigidite + termes de bord)
+        F: Second membre assemble (vecteur, comme en mode 'vectorise')
+        K: P1Operator de rigidite seule (norme energie), partageant les
+           facteurs geometriques de A
+    """
+    A = P1Operator(vertices, triangles, edges, boundary_edges, kappa_func, alpha_func)
+    K = A.stiffness()
+
+    vertices = np.asarray(vertices, dtype=float)[:, :2]
+    nv = len(vertices)
+    F = np.zeros(nv)
+    for start in range(0, A.triangles.shape[1], A.chunk):
+        tri = A.triangles[:, start:start + A.chunk].T
+        F += np.bincount(tri.ravel(), weights=coeffelem_P1_source_vect(vertices[tri], f_func).ravel(),
+                         minlength=nv)
+    if len(A.boundary):
+        coords_A = vertices[A.boundary]
+        alpha = alpha_func if callable(alpha_func) else (lambda x, y: alpha_func)
+        alpha_vals = _eval_par_lot(alpha, coords_A[:, :, 0].mean(axis=1),
+                                   coords_A[:, :, 1].mean(axis=1))
+        e = coeffelem_P1_transf_vect(coords_A, alpha_vals, uE_func)
+        F += np.bincount(A.boundary.ravel(), weights=e.ravel(), minlength=nv)
+
+    return A, F, K
@@ -9,7 +9,7 @@ import sys
 import os
 sys.path.append(os.path.dirname(__file__))
 
-from utils import read_freefem_mesh, compute_mesh_characteristics
+from utils import read_freefem_mesh, compute_mesh_metrics, mesh_quality_summary
 
 
 def analyze_all_meshes():
@@ -41,14 +41,17 @@ def analyze_all_meshes():
         # Lecture du maillage
         mesh_data = read_freefem_mesh(mesh_path)
 
-        # Calcul Q et h
-        Q_max, h = compute_mesh_characteristics(mesh_data)
+        # Calcul Q et h (vectorise sur tous les triangles)
+        metrics = compute_mesh_metrics(mesh_data['vertices'], mesh_data['triangles'])
+        summary = mesh_quality_summary(metrics)
+        Q_max, h = metrics['Q'], metrics['h']
 
         results.append({
             'name': mesh_name,
             'N': mesh_data['nv'],
             'Q': Q_max,
-            'h': h
+            'h': h,
+            'summary': summary
         })
 
         print(f"Maillage {mesh_name}.msh:")
@@ -56,6 +59,10 @@ def analyze_all_meshes():
         print(f"  - Triangles       : {mesh_data['nt']}")
         print(f"  - Qualite Q       : {Q_max:.16f}")
         print(f"  - Pas h           : {h:.16f}")
+        print("  - Quantiles Q_T   : " +
+              ", ".join(f"q{100*q:g}={v:.4f}" for q, v in summary['Q_quantiles'].items()))
+        print(f"  - Q_T moyen       : {summary['Q_mean']:.4f}"
+              f" (degeneres : {summary['n_degenerate']})")
         print()
 
     # Sauvegarde
@@ -71,7 +78,10 @@ def analyze_all_meshes():
                 f.write(f"{res['name']}.msh:\n")
                 f.write(f"  N = {res['N']}\n")
                 f.write(f"  Q = {res['Q']:.16f}\n")
-                f.write(f"  h = {res['h']:.16f}\n\n")
+                f.write(f"  h = {res['h']:.16f}\n")
+                for q, v in res['summary']['Q_quantiles'].items():
+                    f.write(f"  Q_T quantile {q:g} = {v:.16f}\n")
+                f.write("\n")
 
     print(f"Resultats sauvegardes dans {output_file}")
 
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Generation vectorisee de maillages structures de Ω = ]0,4[ × ]0,2[
+
+Remplace generate_meshes.edp (FreeFem++) pour des niveaux arbitrairement
+fins : m_k est la grille nx × ny = 2^(k+1) × 2^(k+1), soit m1 (4×4) a
+m4 (32×32) comme l'etude de convergence, puis m5 ... m10 (2048×2048,
+8.4 millions de triangles).
+
+Numerotation et labels identiques aux maillages du sujet (meshes/m1..m4) :
+    - sommets ligne par ligne, k = j (nx+1) + i, en (i Lx/nx, j Ly/ny)
+    - chaque cellule coupee par la diagonale (i,j)-(i+1,j+1) :
+      triangles (bg, bd, hd) et (bg, hd, hg), label 0
+    - aretes de bord : label 1 sur x=0 et x=4 (Dirichlet),
+                       label 2 sur y=0 et y=2 (Neumann)
+    - sommets : label 1 sur x=0 et x=4 (coins compris), 2 sur y=0 et y=2,
+                0 a l'interieur
+
+Tous les tableaux sont construits sans boucle Python, directement dans les
+types de mesh_io.read_msh (float64 / int32) : ~200 Mo pour 10^7 triangles.
+
+Usage :
+    python mesh_generator.py --levels 5 10           (meshes/m5.msh ... m10.msh)
+    python mesh_generator.py --nx 100 --ny 50 -o meshes/rect.msh
+"""
+
+import os
+import sys
+import time
+import numpy as np
+from typing import Dict
+
+sys.path.append(os.path.dirname(__file__))
+
+from mesh_io import write_msh
+
+
+# Domaine Ω = ]0,Lx[ × ]0,Ly[
+LX, LY = 4.0, 2.0
+
+# Labels de bord (convention des maillages du sujet)
+LABEL_DIRICHLET = 1    # x = 0 et x = Lx
+LABEL_NEUMANN = 2      # y = 0 et y = Ly
+
+
+def level_size(level: int) -> int:
+    """Nombre d'intervalles par direction du maillage m<level> (m1 : 4, m2 : 8...)"""
+    return 2 ** (level + 1)
+
+
+def structured_mesh(nx: int, ny: int, Lx: float = LX, Ly: float = LY) -> Dict:
+    """
+    Maillage structure nx × ny de ]0,Lx[ × ]0,Ly[ (2 nx ny triangles)
+
+    Returns:
+        dict au format de mesh_io.read_msh ('vertices', 'vertex_labels',
+        'triangles', 'triangle_labels', 'edges', 'edge_labels', 'nv', 'nt', 'nbe')
+    """
+    if nx < 1 or ny < 1:
+        raise ValueError(f"nx et ny doivent etre >= 1 (nx={nx}, ny={ny})")
+
+    nvx = nx + 1
+    nv = nvx * (ny + 1)
+    nt = 2 * nx * ny
+
+    # Sommets : k = j*(nx+1) + i
+    vertices = np.empty((nv, 2), dtype=np.float64)
+    grid = vertices.reshape(ny + 1, nvx, 2)
+    grid[:, :, 0] = np.arange(nvx) * (Lx / nx)
+    grid[:, :, 1] = (np.arange(ny + 1) * (Ly / ny))[:, None]
+    grid[:, nx, 0] = Lx                      # bords exacts
+    grid[ny, :, 1] = Ly
+
+    vertex_labels = np.zeros((ny + 1, nvx), dtype=np.int32)
+    vertex_labels[[0, ny], :] = LABEL_NEUMANN
+    vertex_labels[:, [0, nx]] = LABEL_DIRICHLET
+    vertex_labels = vertex_labels.ravel()
+
+    # Triangles : 2 par cellule, cellules ligne par ligne
+    bg = (np.arange(ny, dtype=np.int32)[:, None] * nvx
+          + np.arange(nx, dtype=np.int32)[None, :]).ravel()
+    triangles = np.empty((nx * ny, 2, 3), dtype=np.int32)
+    triangles[:, 0, 0] = bg
+    triangles[:, 0, 1] = bg + 1
+    triangles[:, 0, 2] = bg + nvx + 1
+    triangles[:, 1, 0] = bg
+    triangles[:, 1, 1] = bg + nvx + 1
+    triangles[:, 1, 2] = bg + nvx
+    triangles = triangles.reshape(nt, 3)
+    del bg
+
+    # Aretes de bord : x=0 et x=Lx alternees par ligne, puis y=0 et y=Ly
+    j = np.arange(ny, dtype=np.int32) * nvx
+    left = np.stack([j, j + nvx], axis=1)
+    right = left + nx
+    vertical = np.stack([left, right], axis=1).reshape(-1, 2)
+
+    i = np.arange(nx, dtype=np.int32)
+    bottom = np.stack([i, i + 1], axis=1)
+    top = bottom + ny * nvx
+    horizontal = np.concatenate([bottom, top])
+
+    edges = np.concatenate([vertical, horizontal])
+    edge_labels = np.concatenate([np.full(2 * ny, LABEL_DIRICHLET, dtype=np.int32),
+                                  np.full(2 * nx, LABEL_NEUMANN, dtype=np.int32)])
+
+    return {
+        'vertices': vertices,
+        'vertex_labels': vertex_labels,
+        'triangles': triangles,
+        'triangle_labels': np.zeros(nt, dtype=np.int32),
+        'edges': edges,
+        'edge_labels': edge_labels,
+        'nv': nv,
+        'nt': nt,
+        'nbe': len(edges)
+    }
+
+
+def generate_mesh(filename: str, nx: int, ny: int = None, cache: bool = True,
+                  verbose: bool = True) -> Dict:
+    """
+    Genere et ecrit le maillage nx × ny (ny = nx par defaut) dans filename
+
+    Args:
+        filename: Fichier .msh de sortie (dossier cree si besoin)
+        cache: Ecrit aussi le cache binaire <filename>.npz, relu ensuite par
+               read_msh(..., cache=True) sans analyse du texte
+
+    Returns:
+        Le maillage (dict au format de mesh_io.read_msh)
+    """
+    ny = nx if ny is None else ny
+
+    t0 = time.perf_counter()
+    mesh = structured_mesh(nx, ny)
+    t1 = time.perf_counter()
+
+    directory = os.path.dirname(filename)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    write_msh(filename, mesh, cache=cache)
+    t2 = time.perf_counter()
+
+    if verbose:
+        print(f"  {filename} : {nx}x{ny}, {mesh['nv']} sommets, {mesh['nt']} triangles "
+              f"(generation {t1 - t0:.3f} s, ecriture {t2 - t1:.3f} s)")
+
+    return mesh
+
+
+def generate_convergence_meshes(levels=range(1, 5), directory: str = 'meshes',
+                                cache: bool = True, overwrite: bool = False) -> list:
+    """
+    Genere la suite m<k>.msh (k dans levels) de l'etude de convergence
+
+    Args:
+        levels: Niveaux k (m_k : 2^(k+1) × 2^(k+1) intervalles)
+        directory: Dossier de sortie
+        overwrite: Si False, les maillages deja presents sont conserves
+
+    Returns:
+        Liste des fichiers, dans l'ordre de levels
+    """
+    files = []
+    for k in levels:
+        filename = os.path.join(directory, f'm{k}.msh')
+        if overwrite or not os.path.exists(filename):
+            generate_mesh(filename, level_size(k), cache=cache)
+        files.append(filename)
+    return files
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Maillages structures de ]0,4[ x ]0,2[')
+    parser.add_argument('--levels', type=int, nargs=2, metavar=('K_MIN', 'K_MAX'),
+                        help='Genere m<K_MIN>.msh ... m<K_MAX>.msh (m_k : 2^(k+1) intervalles)')
+    parser.add_argument('--nx', type=int, help='Intervalles en x')
+    parser.add_argument('--ny', type=int, help='Intervalles en y (defaut : nx)')
+    parser.add_argument('-o', '--output', default=None, help='Fichier de sortie (avec --nx)')
+    parser.add_argument('--dir', default='meshes', help='Dossier de sortie (defaut : meshes)')
+    parser.add_argument('--no-cache', action='store_true', help="Pas de cache binaire .npz")
+    parser.add_argument('--overwrite', action='store_true', help='Regenere les maillages existants')
+    args = parser.parse_args()
+
+    if args.nx is not None:
+        output = args.output or os.path.join(args.dir, f'rect_{args.nx}x{args.ny or args.nx}.msh')
+        generate_mesh(output, args.nx, args.ny, cache=not args.no_cache)
+    else:
+        k_min, k_max = args.levels or (1, 4)
+        generate_convergence_meshes(range(k_min, k_max + 1), args.dir,
+                                    cache=not args.no_cache, overwrite=args.overwrite)
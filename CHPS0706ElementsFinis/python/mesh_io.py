@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Lecture rapide des maillages FreeFem++ (.msh) - lecteur commun
+
+Un seul lecteur pour tous les scripts (utils, validation_pen, bonus_assemblage) :
+- Chaque section est lue en bloc (np.loadtxt, parseur C) directement en
+  tableaux types, sans boucle Python ligne par ligne
+- Cache binaire optionnel a cote du maillage (<fichier>.msh.npz), reutilise
+  tant que la taille et la date de modification du .msh sont inchangees
+- Ecriture (write_msh) par blocs de lignes formates en un seul appel
+
+Format .msh :
+    Ligne 1 : nv nt nbe
+    nv lignes : x y label (sommets)
+    nt lignes : i1 i2 i3 label (triangles, indices 1-based)
+    nbe lignes : i1 i2 label (aretes bord, indices 1-based)
+"""
+
+import os
+import tempfile
+import numpy as np
+from itertools import chain
+from typing import Dict
+
+
+CACHE_SUFFIX = '.npz'
+
+# Nombre de lignes formatees par ecriture (borne la memoire de write_msh)
+WRITE_CHUNK_ROWS = 200000
+
+# Tableaux stockes dans le cache binaire
+_MESH_ARRAYS = ('vertices', 'vertex_labels', 'triangles', 'triangle_labels',
+                'edges', 'edge_labels')
+
+
+def _source_signature(filename: str) -> np.ndarray:
+    """Signature (taille, mtime en ns) du fichier .msh pour valider le cache"""
+    st = os.stat(filename)
+    return np.array([st.st_size, st.st_mtime_ns], dtype=np.int64)
+
+
+def _read_block(f, nrows: int, ncols: int, dtype) -> np.ndarray:
+    """Lit nrows lignes de ncols valeurs en un seul appel (parseur C de NumPy)"""
+    if nrows == 0:
+        return np.empty((0, ncols), dtype=dtype)
+
+    block = np.loadtxt(f, dtype=dtype, max_rows=nrows, ndmin=2)
+
+    if block.shape != (nrows, ncols):
+        raise ValueError(f"Section de maillage invalide : {block.shape} lu, "
+                         f"{(nrows, ncols)} attendu")
+    return block
+
+
+def _parse_msh(filename: str) -> Dict:
+    """
+    Analyse complete d'un fichier .msh en tableaux NumPy
+
+    Chaque section (sommets, triangles, aretes) est lue en bloc directement
+    dans un tableau type, sans boucle Python ligne par ligne.
+    """
+    with open(filename, 'r') as f:
+        header = f.readline().split()
+        if len(header) < 3:
+            raise ValueError(f"Entete de maillage invalide dans {filename}")
+        nv, nt, nbe = (int(v) for v in header[:3])
+
+        vert_block = _read_block(f, nv, 3, np.float64)
+        tri_block = _read_block(f, nt, 4, np.int64)
+        edge_block = _read_block(f, nbe, 3, np.int64)
+
+    # Indices 1-based -> 0-based
+    return {
+        'vertices': np.ascontiguousarray(vert_block[:, :2]),
+        'vertex_labels': vert_block[:, 2].astype(np.int32),
+        'triangles': (tri_block[:, :3] - 1).astype(np.int32),
+        'triangle_labels': tri_block[:, 3].astype(np.int32),
+        'edges': (edge_block[:, :2] - 1).astype(np.int32),
+        'edge_labels': edge_block[:, 2].astype(np.int32),
+    }
+
+
+def cache_path(filename: str) -> str:
+    """Chemin du cache binaire associe a un maillage .msh"""
+    return str(filename) + CACHE_SUFFIX
+
+
+def _load_cache(filename: str):
+    """Charge le cache s'il existe et correspond au .msh courant, sinon None"""
+    path = cache_path(filename)
+    if not os.path.exists(path):
+        return None
+
+    try:
+        with np.load(path) as npz:
+            if not np.array_equal(npz['source'], _source_signature(filename)):
+                return None
+            return {name: npz[name] for name in _MESH_ARRAYS}
+    except (OSError, KeyError, ValueError):
+        # Cache illisible ou incomplet : on relit le .msh
+        return None
+
+
+def _write_cache(filename: str, mesh: Dict) -> None:
+    """Ecrit le cache binaire (ecriture atomique via un fichier temporaire)"""
+    path = cache_path(filename)
+    # Nom unique : deux processus qui ecrivent le meme cache ne partagent
+    # pas le fichier temporaire (os.replace reste atomique, meme repertoire)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            np.savez(f, source=_source_signature(filename),
+                     **{name: mesh[name] for name in _MESH_ARRAYS})
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def _write_rows(f, fmt: str, columns) -> None:
+    """
+    Ecrit les lignes fmt % (c0[k], c1[k], ...) par blocs de WRITE_CHUNK_ROWS
+
+    Chaque bloc est formate en un seul appel (fmt * n) % valeurs, soit
+    environ 5 fois plus vite que np.savetxt (une operation par ligne).
+    """
+    n = len(columns[0])
+    for start in range(0, n, WRITE_CHUNK_ROWS):
+        block = [c[start:start + WRITE_CHUNK_ROWS].tolist() for c in columns]
+        f.write((fmt * len(block[0])) % tuple(chain.from_iterable(zip(*block))))
+
+
+def write_msh(filename: str, mesh: Dict, cache: bool = False) -> None:
+    """
+    Ecriture d'un maillage au format .msh de FreeFem++ (indices 1-based)
+
+    Les coordonnees sont ecrites avec 17 chiffres significatifs : la relecture
+    par read_msh redonne exactement les memes tableaux.
+
+    Args:
+        filename: Chemin du fichier .msh
+        mesh: dict au format de read_msh ('vertices', 'vertex_labels',
+              'triangles', 'triangle_labels', 'edges', 'edge_labels')
+        cache: Si True, ecrit aussi le cache binaire <filename>.npz (valide
+               pour le .msh qui vient d'etre ecrit : pas de relecture texte)
+    """
+    V, T, E = mesh['vertices'], mesh['triangles'], mesh['edges']
+
+    with open(filename, 'w') as f:
+        f.write(f"{len(V)} {len(T)} {len(E)}\n")
+        _write_rows(f, "%.17g %.17g %d\n", [V[:, 0], V[:, 1], mesh['vertex_labels']])
+        _write_rows(f, "%d %d %d %d\n", [T[:, 0] + 1, T[:, 1] + 1, T[:, 2] + 1,
+                                          mesh['triangle_labels']])
+        _write_rows(f, "%d %d %d\n", [E[:, 0] + 1, E[:, 1] + 1, mesh['edge_labels']])
+
+    if cache:
+        _write_cache(filename, mesh)
+
+
+def read_msh(filename: str, cache: bool = False) -> Dict:
+    """
+    Lecture d'un maillage FreeFem++ au format .msh
+
+    Args:
+        filename: Chemin vers le fichier .msh
+        cache: Si True, utilise/ecrit le cache binaire <filename>.npz
+               (invalide automatiquement si le .msh change de taille ou de date)
+
+    Returns:
+        dict avec :
+            'vertices'        : (nv, 2) float64, coordonnees x, y
+            'vertex_labels'   : (nv,) int32
+            'triangles'       : (nt, 3) int32, indices 0-based
+            'triangle_labels' : (nt,) int32
+            'edges'           : (nbe, 2) int32, aretes de bord, indices 0-based
+            'edge_labels'     : (nbe,) int32
+            'nv', 'nt', 'nbe' : tailles
+    """
+    mesh = _load_cache(filename) if cache else None
+
+    if mesh is None:
+        mesh = _parse_msh(filename)
+        if cache:
+            try:
+                _write_cache(filename, mesh)
+            except OSError as e:
+                print(f"Attention : cache {cache_path(filename)} non ecrit ({e})")
+
+    mesh['nv'] = len(mesh['vertices'])
+    mesh['nt'] = len(mesh['triangles'])
+    mesh['nbe'] = len(mesh['edges'])
+
+    return mesh
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Topologie d'un maillage de triangles, construite une fois et mise en cache
+
+Toutes les structures sont calculees sans boucle Python, en O(nt log nt)
+(un tri des cles d'aretes lo * nv + hi), a la premiere demande :
+
+    vertex_triangles    CSR sommet -> triangles (indptr, indices)
+    edges               aretes uniques (ne, 2), lo < hi, triees par cle
+    triangle_edges      (nt, 3) : arete locale k = (sommet k, sommet k+1 mod 3)
+    edge_triangles      (ne, 2) : triangles de part et d'autre, -1 au bord
+    triangle_neighbors  (nt, 3) : voisin a travers l'arete locale k, -1 au bord
+    boundary_edge_mask  (ne,)   : aretes n'ayant qu'un triangle
+    boundary_node_mask  (nv,)   : sommets des aretes de bord
+    edge_labels         (ne,)   : label de l'arete de bord du fichier .msh, 0 sinon
+
+Les aretes de bord etiquetees du fichier (mesh['edges'], mesh['edge_labels'])
+sont conservees dans leur ordre pour select_edges / label_nodes, afin que
+les assemblages qui les parcourent gardent le meme ordre de sommation.
+
+Usage :
+    topo = get_topology(mesh)              # cache dans mesh['topology']
+    dirichlet_nodes = topo.label_nodes({1})
+"""
+
+import numpy as np
+import scipy.sparse as sp
+from functools import cached_property
+from typing import Dict
+
+
+def select_edges(edges: np.ndarray, labels) -> np.ndarray:
+    """
+    Aretes (i1, i2) dont le label est dans labels, dans l'ordre du fichier
+
+    Args:
+        edges: array (nbe, 3) : i1 i2 label
+        labels: ensemble de labels (ex. {1} pour Dirichlet)
+    """
+    edges = np.asarray(edges, dtype=int).reshape(-1, 3)
+    return edges[np.isin(edges[:, 2], list(labels))][:, :2]
+
+
+class MeshTopology:
+    """
+    Index topologique d'un maillage (structures calculees a la demande)
+
+    Args:
+        vertices: (nv, >=2) coordonnees (None : nv = max(triangles) + 1, pour
+                  les seules requetes de graphe)
+        triangles: (nt, >=3) connectivite
+        boundary_edges: (nbe, 2) aretes de bord du fichier (optionnel)
+        boundary_labels: (nbe,) labels de ces aretes (optionnel)
+    """
+
+    def __init__(self, vertices, triangles, boundary_edges=None, boundary_labels=None):
+        self.vertices = None if vertices is None else np.asarray(vertices)
+        self.triangles = np.asarray(triangles)[:, :3]
+        self.nv = int(self.triangles.max()) + 1 if vertices is None else len(self.vertices)
+        self.nt = len(self.triangles)
+        self.file_edges = (np.empty((0, 2), dtype=np.int64) if boundary_edges is None
+                           else np.asarray(boundary_edges)[:, :2].astype(np.int64))
+        self.file_labels = (np.zeros(len(self.file_edges), dtype=np.int32) if boundary_labels is None
+                            else np.asarray(boundary_labels))
+
+    @classmethod
+    def from_mesh(cls, mesh: Dict):
+        """Depuis un dict au format mesh_io.read_msh"""
+        return cls(mesh['vertices'], mesh['triangles'], mesh.get('edges'), mesh.get('edge_labels'))
+
+    # ------------------------------------------------------------------
+    # Sommets -> triangles
+    # ------------------------------------------------------------------
+
+    @cached_property
+    def vertex_triangles(self):
+        """(indptr, indices) : triangles de sommet i = indices[indptr[i]:indptr[i+1]]"""
+        flat = self.triangles.ravel()
+        order = np.argsort(flat, kind='stable')
+        indptr = np.zeros(self.nv + 1, dtype=np.int64)
+        np.cumsum(np.bincount(flat, minlength=self.nv), out=indptr[1:])
+        return indptr, (order // 3).astype(np.int64)
+
+    # ------------------------------------------------------------------
+    # Aretes
+    # ------------------------------------------------------------------
+
+    def _edge_keys(self, pairs: np.ndarray) -> np.ndarray:
+        pairs = np.asarray(pairs, dtype=np.int64)
+        return pairs.min(axis=1) * self.nv + pairs.max(axis=1)
+
+    @cached_property
+    def _edge_index(self):
+        """Cles uniques des aretes et numero d'arete de chaque arete locale"""
+        T = self.triangles.astype(np.int64)
+        local = np.stack([T[:, [0, 1]], T[:, [1, 2]], T[:, [2, 0]]], axis=1).reshape(-1, 2)
+        keys, inverse = np.unique(self._edge_keys(local), return_inverse=True)
+        return keys, inverse.reshape(self.nt, 3)
+
+    @cached_property
+    def edges(self) -> np.ndarray:
+        """Aretes uniques (ne, 2), lo < hi, triees par lo * nv + hi"""
+        keys = self._edge_index[0]
+        return np.stack([keys // self.nv, keys % self.nv], axis=1)
+
+    @property
+    def n_edges(self) -> int:
+        return len(self._edge_index[0])
+
+    @property
+    def triangle_edges(self) -> np.ndarray:
+        """(nt, 3) : numero de l'arete locale k = (k, k+1 mod 3) de chaque triangle"""
+        return self._edge_index[1]
+
+    def edge_index(self, pairs) -> np.ndarray:
+        """Numeros des aretes (i, j) donnees (ordre des sommets indifferent)"""
+        keys = self._edge_index[0]
+        query = self._edge_keys(np.reshape(pairs, (-1, 2)))
+        idx = np.minimum(np.searchsorted(keys, query), len(keys) - 1)
+        if np.any(keys[idx] != query):
+            raise ValueError("Arete absente du maillage")
+        return idx
+
+    @cached_property
+    def edge_triangles(self) -> np.ndarray:
+        """(ne, 2) : les deux triangles de chaque arete (-1 pour une arete de bord)"""
+        flat = self.triangle_edges.ravel()
+        order = np.argsort(flat, kind='stable')
+        owner = order // 3
+        count = np.bincount(flat, minlength=self.n_edges)
+        first = np.concatenate([[0], np.cumsum(count)[:-1]])
+
+        et = np.full((self.n_edges, 2), -1, dtype=np.int64)
+        et[:, 0] = owner[first]
+        inner = count == 2
+        et[inner, 1] = owner[first[inner] + 1]
+        return et
+
+    @cached_property
+    def triangle_neighbors(self) -> np.ndarray:
+        """(nt, 3) : triangle voisin a travers l'arete locale k (-1 au bord)"""
+        et = self.edge_triangles[self.triangle_edges]                  # (nt, 3, 2)
+        me = np.arange(self.nt)[:, None]
+        return np.where(et[:, :, 0] == me, et[:, :, 1], et[:, :, 0])
+
+    def triangle_graph(self) -> sp.csr_matrix:
+        """Graphe dual (triangles voisins par une arete) en CSR symetrique"""
+        inner = self.edge_triangles[:, 1] >= 0
+        i, j = self.edge_triangles[inner, 0], self.edge_triangles[inner, 1]
+        return sp.csr_matrix((np.ones(2 * len(i), dtype=np.int8),
+                              (np.concatenate([i, j]), np.concatenate([j, i]))),
+                             shape=(self.nt, self.nt))
+
+    def vertex_graph(self) -> sp.csr_matrix:
+        """Graphe des sommets (aretes du maillage) en CSR symetrique, sans diagonale"""
+        i, j = self.edges[:, 0], self.edges[:, 1]
+        return sp.csr_matrix((np.ones(2 * len(i), dtype=np.int8),
+                              (np.concatenate([i, j]), np.concatenate([j, i]))),
+                             shape=(self.nv, self.nv))
+
+    # ------------------------------------------------------------------
+    # Bord
+    # ------------------------------------------------------------------
+
+    @cached_property
+    def boundary_edge_mask(self) -> np.ndarray:
+        """(ne,) : aretes n'appartenant qu'a un triangle"""
+        return self.edge_triangles[:, 1] < 0
+
+    @cached_property
+    def boundary_node_mask(self) -> np.ndarray:
+        """(nv,) : sommets du bord"""
+        mask = np.zeros(self.nv, dtype=bool)
+        mask[self.edges[self.boundary_edge_mask].ravel()] = True
+        return mask
+
+    @cached_property
+    def edge_labels(self) -> np.ndarray:
+        """(ne,) : label de l'arete de bord du fichier, 0 pour les autres"""
+        labels = np.zeros(self.n_edges, dtype=np.int32)
+        if len(self.file_edges):
+            labels[self.edge_index(self.file_edges)] = self.file_labels
+        return labels
+
+    def select_edges(self, labels) -> np.ndarray:
+        """Aretes de bord du fichier dont le label est dans labels (ordre du fichier)"""
+        return self.file_edges[np.isin(self.file_labels, list(labels))]
+
+    def label_nodes(self, labels) -> np.ndarray:
+        """Sommets (tries) des aretes de bord dont le label est dans labels"""
+        return np.unique(self.select_edges(labels))
+
+    def label_node_mask(self, labels) -> np.ndarray:
+        """(nv,) : sommets des aretes de bord dont le label est dans labels"""
+        mask = np.zeros(self.nv, dtype=bool)
+        mask[self.select_edges(labels).ravel()] = True
+        return mask
+
+
+def get_topology(mesh: Dict) -> MeshTopology:
+    """Topologie du maillage, construite au premier appel puis gardee dans mesh['topology']"""
+    if 'topology' not in mesh:
+        mesh['topology'] = MeshTopology.from_mesh(mesh)
+    return mesh['topology']
@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Multigrille geometrique sur une hierarchie de maillages raffines (rouge)
+
+Les maillages de l'etude de convergence sont des divisions successives de h
+par 2 : c'est exactement une hierarchie multigrille. Ce module :
+- raffine un maillage .msh par raffinement rouge (1 triangle -> 4, milieux
+  des aretes), en conservant les labels de bord
+- garde les operateurs de prolongement P (niveau grossier -> niveau fin)
+- resout le probleme P1 penalise de validation_pen par cycles V ou F
+  (lisseur de Jacobi amorti, operateurs grossiers de Galerkin P^T A P),
+  seuls ou comme preconditionneur du gradient conjugue
+- construit les prolongements d'une suite de maillages .msh quelconques
+  (m1, ..., m_{k-1} vers m_k) par localisation des sommets fins : c'est le
+  preconditionneur 'gmg' de solvers.py / validation_pen.main
+
+Usage :
+    python multigrid.py meshes/m1.msh --levels 7 --cycle V
+"""
+
+import os
+import sys
+import time
+import numpy as np
+import scipy.sparse as sp
+import scipy.sparse.linalg as spla
+from typing import Dict, List
+
+sys.path.append(os.path.dirname(__file__))
+
+from mesh_io import read_msh
+from mesh_topology import get_topology
+
+
+# ============================================================================
+# RAFFINEMENT ROUGE ET HIERARCHIE DE MAILLAGES
+# ============================================================================
+
+def red_refine(mesh: Dict):
+    """
+    Raffinement rouge : chaque triangle (a, b, c) est coupe en 4
+
+        (a, m_ab, m_ca), (m_ab, b, m_bc), (m_ca, m_bc, c), (m_ab, m_bc, m_ca)
+
+    ou m_xy est le milieu de l'arete xy (un seul nouveau sommet par arete).
+    Les 4 enfants du triangle l sont les triangles 4l .. 4l+3 du maillage fin.
+
+    Args:
+        mesh: dict au format mesh_io.read_msh
+
+    Returns:
+        (fine_mesh, P) : maillage raffine (meme format) et prolongement P1
+                         P (nv_fin x nv_grossier), identite sur les anciens
+                         sommets, moyenne des 2 extremites sur les milieux
+    """
+    V = mesh['vertices']
+    T = mesh['triangles'].astype(np.int64)
+    nv = len(V)
+
+    # Un milieu par arete unique ; aretes locales (0,1), (1,2), (2,0)
+    topology = get_topology(mesh)
+    edge_lo, edge_hi = topology.edges[:, 0], topology.edges[:, 1]
+    n_new = topology.n_edges
+
+    mid = nv + topology.triangle_edges
+    m_ab, m_bc, m_ca = mid[:, 0], mid[:, 1], mid[:, 2]
+    a, b, c = T[:, 0], T[:, 1], T[:, 2]
+
+    children = np.stack([
+        np.stack([a, m_ab, m_ca], axis=1),
+        np.stack([m_ab, b, m_bc], axis=1),
+        np.stack([m_ca, m_bc, c], axis=1),
+        np.stack([m_ab, m_bc, m_ca], axis=1),
+    ], axis=1).reshape(-1, 3)
+
+    vertices = np.vstack([V, 0.5 * (V[edge_lo] + V[edge_hi])])
+
+    # Aretes de bord : chaque arete (i, j) devient (i, m) et (m, j)
+    E = mesh['edges'].astype(np.int64)
+    e_mid = nv + topology.edge_index(E)
+    edges = np.stack([np.stack([E[:, 0], e_mid], axis=1),
+                      np.stack([e_mid, E[:, 1]], axis=1)], axis=1).reshape(-1, 2)
+    edge_labels = np.repeat(mesh['edge_labels'], 2)
+
+    # Labels des nouveaux sommets : label de l'arete de bord, 0 a l'interieur
+    vertex_labels = np.concatenate([mesh['vertex_labels'],
+                                    np.zeros(n_new, dtype=np.int32)])
+    vertex_labels[e_mid] = mesh['edge_labels']
+
+    fine = {
+        'vertices': vertices,
+        'vertex_labels': vertex_labels,
+        'triangles': children.astype(np.int32),
+        'triangle_labels': np.repeat(mesh['triangle_labels'], 4),
+        'edges': edges.astype(np.int32),
+        'edge_labels': edge_labels,
+        'nv': len(vertices),
+        'nt': len(children),
+        'nbe': len(edges)
+    }
+
+    rows = np.concatenate([np.arange(nv), nv + np.arange(n_new), nv + np.arange(n_new)])
+    cols = np.concatenate([np.arange(nv), edge_lo, edge_hi])
+    vals = np.concatenate([np.ones(nv), np.full(2 * n_new, 0.5)])
+    P = sp.csr_matrix((vals, (rows, cols)), shape=(len(vertices), nv))
+
+    return fine, P
+
+
+class MeshHierarchy:
+    """
+    Hierarchie de maillages emboites obtenue par raffinements rouges successifs
+
+    Attributs :
+        levels: maillages du plus grossier (0) au plus fin (-1)
+        prolongations: prolongations[l] : niveau l -> niveau l+1
+        parents: parents[l][k] = triangle du niveau l contenant le triangle k
+                 du niveau l+1
+    """
+
+    def __init__(self, coarse_mesh: Dict, n_refinements: int = 0):
+        self.levels = [coarse_mesh]
+        self.prolongations = []
+        self.parents = []
+        for _ in range(n_refinements):
+            self.refine()
+
+    @classmethod
+    def from_file(cls, filename: str, n_refinements: int = 0, cache: bool = False):
+        """Hierarchie construite a partir d'un fichier .msh (niveau grossier)"""
+        return cls(read_msh(filename, cache=cache), n_refinements)
+
+    def refine(self) -> Dict:
+        """Ajoute un niveau par raffinement rouge du maillage le plus fin"""
+        fine, P = red_refine(self.levels[-1])
+        self.levels.append(fine)
+        self.prolongations.append(P)
+        self.parents.append(np.repeat(np.arange(self.levels[-2]['nt']), 4))
+        return fine
+
+    @property
+    def finest(self) -> Dict:
+        return self.levels[-1]
+
+    @property
+    def n_levels(self) -> int:
+        return len(self.levels)
+
+    def prolongate(self, u: np.ndarray, from_level: int, to_level: int = None) -> np.ndarray:
+        """Interpolation P1 d'un champ nodal du niveau from_level vers to_level"""
+        to_level = self.n_levels - 1 if to_level is None else to_level
+        for l in range(from_level, to_level):
+            u = self.prolongations[l] @ u
+        return u
+
+
+def mesh_prolongations(coarse_meshes, fine_vertices, cache: bool = False) -> List:
+    """
+    Prolongements P1 d'une suite de maillages grossiers vers les sommets fins
+
+    Les maillages ne sont pas forcement emboites : chaque P_l interpole le
+    niveau l aux sommets du niveau l+1 (point_location.PointLocator). Pour
+    des raffinements rouges, P_l est le prolongement de red_refine.
+
+    Args:
+        coarse_meshes: Maillages (fichiers .msh ou dicts read_msh), du plus
+                       grossier au plus fin, tous plus grossiers que le fin
+        fine_vertices: Sommets (nv, 2) du maillage du systeme (numerotation
+                       du systeme, apres une eventuelle renumerotation)
+        cache: Lecture des fichiers par le cache binaire .npz
+
+    Returns:
+        Liste des prolongements, niveau 0 (le plus grossier) -> niveau 1, ...
+        (liste vide sans maillage grossier : un seul niveau, resolu par LU)
+    """
+    from point_location import PointLocator
+
+    meshes = [read_msh(m, cache=cache) if isinstance(m, str) else m for m in coarse_meshes]
+    targets = [m['vertices'] for m in meshes[1:]] + [fine_vertices]
+    return [PointLocator.from_mesh(m).interpolation_matrix(np.asarray(t, dtype=float)[:, :2])
+            for m, t in zip(meshes, targets)]
+
+
+# ============================================================================
+# SOLVEUR MULTIGRILLE
+# ============================================================================
+
+class GeometricMultigrid:
+    """
+    Multigrille geometrique pour un systeme SPD A_fin U = F
+
+    - Operateurs grossiers de Galerkin : A_l = P_l^T A_{l+1} P_l
+    - Lisseur : Jacobi amorti (omega), nu1 pre- et nu2 post-lissages
+    - Niveau le plus grossier : factorisation LU creuse (splu)
+    """
+
+    def __init__(self, A, prolongations: List, nu1: int = 2, nu2: int = 2,
+                 omega: float = 2.0 / 3.0):
+        self.P = list(prolongations)
+        self.nu1, self.nu2, self.omega = nu1, nu2, omega
+
+        self.A = [sp.csr_matrix(A)]
+        for P in reversed(self.P):
+            self.A.insert(0, (P.T @ self.A[0] @ P).tocsr())
+
+        self.inv_diag = [1.0 / Al.diagonal() for Al in self.A]
+        self.coarse_lu = spla.splu(sp.csc_matrix(self.A[0]))
+
+    def _smooth(self, l: int, b: np.ndarray, x: np.ndarray, nu: int) -> np.ndarray:
+        for _ in range(nu):
+            x = x + self.omega * self.inv_diag[l] * (b - self.A[l] @ x)
+        return x
+
+    def _cycle(self, l: int, b: np.ndarray, x: np.ndarray, kind: str) -> np.ndarray:
+        if l == 0:
+            return self.coarse_lu.solve(b)
+
+        x = self._smooth(l, b, x, self.nu1)
+        r_c = self.P[l - 1].T @ (b - self.A[l] @ x)
+
+        e_c = np.zeros(len(r_c))
+        if kind == 'F':
+            # F-cycle : F-cycle puis V-cycle sur le niveau grossier
+            e_c = self._cycle(l - 1, r_c, e_c, 'F')
+            e_c = self._cycle(l - 1, r_c, e_c, 'V')
+        else:
+            e_c = self._cycle(l - 1, r_c, e_c, 'V')
+
+        x = x + self.P[l - 1] @ e_c
+        return self._smooth(l, b, x, self.nu2)
+
+    def cycle(self, b: np.ndarray, x: np.ndarray = None, kind: str = 'V') -> np.ndarray:
+        """Un cycle multigrille ('V' ou 'F') sur le niveau le plus fin"""
+        if kind not in ('V', 'F'):
+            raise ValueError(f"Cycle inconnu : {kind!r} (attendu 'V' ou 'F')")
+        x = np.zeros(len(b)) if x is None else x
+        return self._cycle(len(self.A) - 1, b, x, kind)
+
+    def aspreconditioner(self, kind: str = 'V'):
+        """Un cycle a partir de 0 comme preconditionneur (LinearOperator SPD)"""
+        n = self.A[-1].shape[0]
+        return spla.LinearOperator((n, n), matvec=lambda r: self.cycle(r, kind=kind),
+                                   dtype=float)
+
+    def solve(self, F: np.ndarray, x0: np.ndarray = None, tol: float = 1e-10,
+              maxiter: int = 100, kind: str = 'V') -> Dict:
+        """
+        Iterations de cycles multigrille jusqu'a ||r||_D / ||F||_D <= tol
+        (residu pondere par l'inverse de la diagonale, comme solvers.py)
+
+        Returns:
+            dict avec 'solution', 'iterations', 'residuals', 'converged'
+        """
+        d = self.inv_diag[-1]
+        A = self.A[-1]
+        norm_F = np.sqrt(F @ (d * F)) or 1.0
+
+        x = np.zeros(len(F)) if x0 is None else np.array(x0, dtype=float)
+        r = F - A @ x
+        residuals = [np.sqrt(r @ (d * r)) / norm_F]
+
+        while residuals[-1] > tol and len(residuals) <= maxiter:
+            x = self.cycle(F, x, kind)
+            r = F - A @ x
+            residuals.append(np.sqrt(r @ (d * r)) / norm_F)
+
+        return {
+            'solution': x,
+            'iterations': len(residuals) - 1,
+            'residuals': np.array(residuals),
+            'converged': residuals[-1] <= tol
+        }
+
+
+# ============================================================================
+# PROBLEME P1 PENALISE (validation_pen) RESOLU PAR MULTIGRILLE
+# ============================================================================
+
+def solve_pen_multigrid(mesh_file: str, n_refinements: int, cycle: str = 'V',
+                        accel: str = 'cg', tol: float = 1e-10, verbose: bool = True) -> Dict:
+    """
+    Resolution du probleme de validation_pen sur le maillage mesh_file raffine
+    n_refinements fois, par multigrille geometrique
+
+    Args:
+        mesh_file: Maillage grossier (.msh)
+        n_refinements: Nombre de raffinements rouges
+        cycle: 'V' ou 'F'
+        accel: 'cg' (multigrille preconditionneur du gradient conjugue)
+               ou 'none' (iterations de cycles seules)
+        tol: Tolerance sur le residu relatif
+
+    Returns:
+        dict avec 'Uh', 'error_H1', 'nv', 'nt', 'iterations', 'residuals',
+        'assembly_time', 'setup_time', 'solve_time'
+    """
+    from validation_pen import (assemblage_EF_P1_vectorise, fct_kappa, fct_f,
+                                fct_alpha, fct_uE, fct_u)
+    from error_norms import energy_norm_error
+    from solvers import conjugate_gradient
+
+    hierarchy = MeshHierarchy.from_file(mesh_file, n_refinements)
+    fine = hierarchy.finest
+    edges = np.column_stack([fine['edges'], fine['edge_labels']])
+
+    t0 = time.perf_counter()
+    A, F, K = assemblage_EF_P1_vectorise(fine['vertices'], fine['triangles'], edges, {1},
+                                         fct_kappa, fct_f, fct_alpha, fct_uE, verbose=verbose)
+    t1 = time.perf_counter()
+    mg = GeometricMultigrid(A, hierarchy.prolongations)
+    t2 = time.perf_counter()
+
+    if accel == 'cg':
+        info = conjugate_gradient(A, F, M=mg.aspreconditioner(cycle), tol=tol)
+    else:
+        info = mg.solve(F, tol=tol, kind=cycle)
+    t3 = time.perf_counter()
+
+    Uh = info['solution']
+    error_H1 = energy_norm_error(Uh, fine['vertices'], K, fct_u)
+
+    if verbose:
+        print(f"  {fine['nv']} sommets, {info['iterations']} iterations ({cycle}-cycle, {accel}), "
+              f"e_h = {error_H1:.6e}")
+
+    return {
+        'Uh': Uh,
+        'error_H1': error_H1,
+        'nv': fine['nv'],
+        'nt': fine['nt'],
+        'iterations': info['iterations'],
+        'residuals': info['residuals'],
+        'converged': info['converged'],
+        'assembly_time': t1 - t0,
+        'setup_time': t2 - t1,
+        'solve_time': t3 - t2
+    }
+
+
+def benchmark_multigrid(mesh_file: str, max_refinements: int = 7, cycle: str = 'V',
+                        accel: str = 'cg', tol: float = 1e-10) -> List[Dict]:
+    """
+    Temps de resolution par degre de liberte du niveau 0 a max_refinements
+
+    Un solveur en O(N) donne un temps par DDL (et un nombre d'iterations)
+    quasi constant quand le maillage est raffine.
+    """
+    print("=" * 90)
+    print(f"BENCHMARK MULTIGRILLE GEOMETRIQUE - {mesh_file} ({cycle}-cycle, accel. {accel})")
+    print("=" * 90)
+    print(f"{'Raff.':<6} {'N sommets':<12} {'Iter.':<7} {'Setup (s)':<11} {'Resol. (s)':<11} "
+          f"{'us/DDL':<9} {'e_h':<14}")
+    print("-" * 90)
+
+    rows = []
+    for r in range(max_refinements + 1):
+        res = solve_pen_multigrid(mesh_file, r, cycle=cycle, accel=accel, tol=tol, verbose=False)
+        res['refinements'] = r
+        res['time_per_dof'] = (res['setup_time'] + res['solve_time']) / res['nv']
+        rows.append(res)
+        print(f"{r:<6} {res['nv']:<12} {res['iterations']:<7} {res['setup_time']:<11.4f} "
+              f"{res['solve_time']:<11.4f} {1e6 * res['time_per_dof']:<9.3f} {res['error_H1']:<14.6e}")
+
+    print("=" * 90)
+    return rows
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Multigrille geometrique EF-P1')
+    parser.add_argument('mesh', nargs='?', default='meshes/m1.msh',
+                        help='Maillage grossier (defaut : meshes/m1.msh)')
+    parser.add_argument('--levels', type=int, default=7,
+                        help='Nombre maximal de raffinements rouges (defaut : 7)')
+    parser.add_argument('--cycle', choices=['V', 'F'], default='V')
+    parser.add_argument('--accel', choices=['cg', 'none'], default='cg',
+                        help='Gradient conjugue preconditionne (cg) ou cycles seuls (none)')
+    parser.add_argument('--tol', type=float, default=1e-10)
+    args = parser.parse_args()
+
+    benchmark_multigrid(args.mesh, args.levels, cycle=args.cycle, accel=args.accel, tol=args.tol)
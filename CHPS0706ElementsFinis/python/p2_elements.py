@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Elements finis P2 (Lagrange quadratiques) vectorises pour le probleme penalise
+
+Degres de liberte : les nv sommets, puis un milieu par arete du maillage
+(nv + numero d'arete de MeshTopology). Ordre local sur le triangle
+(P1, P2, P3) : sommets 0, 1, 2 puis milieux des aretes (0,1), (1,2), (2,0).
+
+Fonctions de base en coordonnees barycentriques :
+    sommet i         : φ_i  = λ_i (2 λ_i - 1),   ∇φ_i  = (4 λ_i - 1) ∇λ_i
+    milieu de (i, j) : φ_ij = 4 λ_i λ_j,         ∇φ_ij = 4 (λ_j ∇λ_i + λ_i ∇λ_j)
+
+Les nt matrices 6 x 6 et seconds membres sont calcules en un seul passage
+par quadrature (einsum sur des tableaux (nt, nq, 6, 2)) :
+    rigidite : 3 points (exacte, ∇φ·∇φ de degre 2), κ au barycentre
+    source   : 6 points (degre 4)
+    bord Fourier-Robin : Gauss 3 points sur l'arete (i, j, milieu)
+puis assembles par triplets COO comme en P1 (validation_pen).
+
+Usage :
+    python p2_elements.py meshes/m3.msh
+    python p2_elements.py --benchmark --levels 1 6     (temps pour une erreur P1 vs P2)
+"""
+
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.append(os.path.dirname(__file__))
+
+from mesh_topology import MeshTopology, select_edges
+from utils import barycentric_gradients, compute_mesh_metrics
+from error_norms import quadrature_rule, quadrature_points, energy_norm_error
+from solvers import solve_linear_system
+from validation_pen import (_eval_par_lot, _triplets_coo, _coo_vers_csr, read_freefem_mesh,
+                            fct_u, fct_uE, fct_f, fct_kappa, fct_alpha, grad_u_exact)
+
+
+# Aretes locales (sommets) associees aux milieux 3, 4, 5
+_LOCAL_EDGES = ((0, 1), (1, 2), (2, 0))
+
+# Gauss 3 points sur [0, 1] (aretes de bord)
+_GAUSS_1D = (np.array([0.5 - 0.5 * np.sqrt(0.6), 0.5, 0.5 + 0.5 * np.sqrt(0.6)]),
+             np.array([5.0, 8.0, 5.0]) / 18.0)
+
+
+# ============================================================================
+# FONCTIONS DE BASE P2
+# ============================================================================
+
+def p2_basis(bary):
+    """
+    Fonctions de base P2 et derivees par rapport aux λ aux points bary (nq, 3)
+
+    Returns:
+        (phi, dphi) : valeurs (nq, 6) et derivees ∂φ/∂λ_k (nq, 6, 3)
+    """
+    nq = len(bary)
+    phi = np.empty((nq, 6))
+    dphi = np.zeros((nq, 6, 3))
+    for i in range(3):
+        phi[:, i] = bary[:, i] * (2.0 * bary[:, i] - 1.0)
+        dphi[:, i, i] = 4.0 * bary[:, i] - 1.0
+    for a, (i, j) in enumerate(_LOCAL_EDGES, start=3):
+        phi[:, a] = 4.0 * bary[:, i] * bary[:, j]
+        dphi[:, a, i] = 4.0 * bary[:, j]
+        dphi[:, a, j] = 4.0 * bary[:, i]
+    return phi, dphi
+
+
+def p2_gradients(grads_lambda, dphi):
+    """Gradients physiques ∇φ (nt, nq, 6, 2) a partir de ∇λ (nt, 3, 2)"""
+    return np.einsum('qak,tkd->tqad', dphi, grads_lambda)
+
+
+def p2_dofs(vertices, triangles, topology=None):
+    """
+    Numerotation des degres de liberte P2
+
+    Returns:
+        (dofs, coords, topology) : connectivite (nt, 6), coordonnees des
+        nv + ne noeuds (sommets puis milieux) et topologie du maillage
+    """
+    vertices = np.asarray(vertices, dtype=float)[:, :2]
+    tri = np.asarray(triangles)[:, :3]
+    topology = topology if topology is not None else MeshTopology(vertices, tri)
+    nv = len(vertices)
+
+    dofs = np.hstack([tri.astype(np.int64), nv + topology.triangle_edges])
+    E = topology.edges
+    coords = np.vstack([vertices, 0.5 * (vertices[E[:, 0]] + vertices[E[:, 1]])])
+    return dofs, coords, topology
+
+
+# ============================================================================
+# MATRICES ET VECTEURS ELEMENTAIRES (tous les elements a la fois)
+# ============================================================================
+
+def _element_gradients(coords_T):
+    """∇λ (nt, 3, 2) et aires (nt,) a partir des coordonnees (nt, 3, 2)"""
+    nt = len(coords_T)
+    return barycentric_gradients(coords_T.reshape(-1, 2), np.arange(3 * nt).reshape(nt, 3))
+
+
+def coeffelem_P2_rigid_vect(coords_T, kappa_vals):
+    """
+    Matrices de rigidite elementaires P2 (nt, 6, 6)
+
+    k^l_ab = κ_l ∫_T ∇φ_a · ∇φ_b, quadrature a 3 points (exacte)
+    """
+    bary, weights = quadrature_rule(3)
+    _, dphi = p2_basis(bary)
+    grads, areas = _element_gradients(coords_T)
+    G = p2_gradients(grads, dphi)
+    return (kappa_vals * areas)[:, None, None] * np.einsum('q,tqad,tqbd->tab', weights, G, G)
+
+
+def coeffelem_P2_source_vect(coords_T, f_func, n_points=6):
+    """Vecteurs sources elementaires P2 (nt, 6) : ∫_T f φ_a, quadrature a n_points"""
+    bary, weights = quadrature_rule(n_points)
+    phi, _ = p2_basis(bary)
+    xq = np.einsum('qi,tid->tqd', bary, coords_T)
+    f_q = _eval_par_lot(f_func, xq[..., 0], xq[..., 1])
+    _, areas = _element_gradients(coords_T)
+    return areas[:, None] * ((f_q * weights) @ phi)
+
+
+def coeffelem_P2_bord_vect(coords_A, alpha_vals, uE_func):
+    """
+    Termes de bord Fourier-Robin P2 sur les aretes (i, j, milieu)
+
+    Args:
+        coords_A: (na, 2, 2) extremites des aretes
+        alpha_vals: (na,) α au milieu de chaque arete
+        uE_func: uE(x, y)
+
+    Returns:
+        (p, e) : matrices de poids (na, 3, 3) α ∫_A φ_a φ_b et
+                 vecteurs (na, 3) α ∫_A uE φ_a (Gauss 3 points)
+    """
+    s, w = _GAUSS_1D
+    phi = np.column_stack([(1.0 - s) * (1.0 - 2.0 * s), s * (2.0 * s - 1.0), 4.0 * s * (1.0 - s)])
+    d = coords_A[:, 1] - coords_A[:, 0]
+    length = np.hypot(d[:, 0], d[:, 1])
+    xq = coords_A[:, None, 0] + s[None, :, None] * d[:, None, :]         # (na, 3, 2)
+    uE_q = _eval_par_lot(uE_func, xq[..., 0], xq[..., 1])
+
+    coef = alpha_vals * length
+    p = coef[:, None, None] * np.einsum('q,qa,qb->ab', w, phi, phi)[None]
+    e = coef[:, None] * ((uE_q * w) @ phi)
+    return p, e
+
+
+# ============================================================================
+# ASSEMBLAGE
+# ============================================================================
+
+def assemblage_EF_P2_vectorise(vertices, triangles, edges, boundary_edges,
+                               kappa_func, f_func, alpha_func, uE_func, verbose=True):
+    """
+    Assemblage EF-P2 par lots (memes arguments que assemblage_EF_P1_vectorise)
+
+    Returns:
+        A: Matrice assemblee (sparse CSR, nv + ne inconnues)
+        F: Second membre assemble
+        K: Matrice de rigidite (pour calcul erreur)
+        dofs: Connectivite P2 (nt, 6)
+        coords: Coordonnees des noeuds P2 (sommets puis milieux)
+    """
+    vertices = np.asarray(vertices, dtype=float)[:, :2]
+    triangles = np.asarray(triangles)[:, :3]
+    edges = np.asarray(edges, dtype=int).reshape(-1, 3)
+    topology = MeshTopology(vertices, triangles, edges[:, :2], edges[:, 2])
+    dofs, coords, topology = p2_dofs(vertices, triangles, topology)
+    n = len(coords)
+
+    if verbose:
+        print(f"  Assemblage volumique P2 ({len(triangles)} triangles, {n} inconnues, vectorise)...")
+
+    coords_T = vertices[triangles]
+    xG, yG = coords_T.mean(axis=1).T
+    k = coeffelem_P2_rigid_vect(coords_T, _eval_par_lot(kappa_func, xG, yG))
+    f = coeffelem_P2_source_vect(coords_T, f_func)
+
+    rows_T, cols_T, vals_T = _triplets_coo(dofs, k)
+    K = _coo_vers_csr(rows_T, cols_T, vals_T, n)
+
+    # Bord Fourier-Robin : aretes (i, j) et leur milieu
+    dirichlet = select_edges(edges, boundary_edges)
+    if verbose:
+        print(f"  Assemblage bord P2 ({len(dirichlet)} aretes Dirichlet, vectorise)...")
+
+    connect_A = np.column_stack([dirichlet, len(vertices) + topology.edge_index(dirichlet)])
+    coords_A = vertices[dirichlet]
+    xM, yM = coords_A.mean(axis=1).T
+    p, e = coeffelem_P2_bord_vect(coords_A, _eval_par_lot(alpha_func, xM, yM), uE_func)
+
+    rows_A, cols_A, vals_A = _triplets_coo(connect_A, p)
+    A = _coo_vers_csr(np.concatenate([rows_T, rows_A]), np.concatenate([cols_T, cols_A]),
+                      np.concatenate([vals_T, vals_A]), n)
+    F = np.bincount(np.concatenate([dofs.ravel(), connect_A.ravel()]),
+                    weights=np.concatenate([f.ravel(), e.ravel()]), minlength=n)
+
+    return A, F, K, dofs, coords
+
+
+# ============================================================================
+# ERREURS
+# ============================================================================
+
+def p2_error_norms(coords, dofs, Uh, u_exact_func=None, grad_u_exact_func=None, n_points=7):
+    """
+    Erreurs L2 et semi-norme H1 de la solution P2 (quadrature de Gauss)
+
+    Returns:
+        dict avec 'L2' et/ou 'H1_semi'
+    """
+    bary, weights = quadrature_rule(n_points)
+    phi, dphi = p2_basis(bary)
+    tri = dofs[:, :3]
+    grads, areas = barycentric_gradients(coords, tri)
+    xq = quadrature_points(coords, tri, bary)
+    U_T = Uh[dofs]                                          # (nt, 6)
+
+    results = {}
+    if u_exact_func is not None:
+        err = u_exact_func(xq[..., 0], xq[..., 1]) - U_T @ phi.T
+        results['L2'] = float(np.sqrt((areas * (err**2 @ weights)).sum()))
+    if grad_u_exact_func is not None:
+        grad_uh = np.einsum('ta,tqad->tqd', U_T, p2_gradients(grads, dphi))
+        du_dx, du_dy = grad_u_exact_func(xq[..., 0], xq[..., 1])
+        err2 = (du_dx - grad_uh[..., 0])**2 + (du_dy - grad_uh[..., 1])**2
+        results['H1_semi'] = float(np.sqrt((areas * (err2 @ weights)).sum()))
+    return results
+
+
+# ============================================================================
+# FONCTION PRINCIPALE
+# ============================================================================
+
+def main(mesh_file, verbose=True, cache=False, solver='direct', **solver_options):
+    """
+    Resolution du probleme penalise en P2 (meme interface que validation_pen.main)
+
+    'error_H1' est la norme energie sqrt((I_h u - U)^T K (I_h u - U)) avec
+    l'interpolee P2 I_h u (valeurs aux sommets et aux milieux) ;
+    'error_H1_semi' est la vraie semi-norme |u - u_h|_H1.
+
+    Returns:
+        dict avec Uh, error_H1, error_H1_semi, h, Q, nv, nt, ndof, ...
+    """
+    if verbose:
+        print(f"\n{'='*70}")
+        print("RESOLUTION EF-P2 avec PENALISATION")
+        print(f"{'='*70}")
+        print(f"Maillage : {mesh_file}")
+
+    mesh = read_freefem_mesh(mesh_file, cache=cache)
+    vertices, triangles = mesh['vertices'], mesh['triangles']
+
+    t0 = time.perf_counter()
+    A, F, K, dofs, coords = assemblage_EF_P2_vectorise(
+        vertices, triangles, mesh['edges'], mesh['dirichlet_labels'],
+        fct_kappa, fct_f, fct_alpha, fct_uE, verbose=verbose)
+    assembly_time = time.perf_counter() - t0
+
+    info = solve_linear_system(A, F, method=solver, **solver_options)
+    Uh = info['solution']
+
+    error_H1 = energy_norm_error(Uh, coords, K, fct_u)
+    error_semi = p2_error_norms(coords, dofs, Uh, None, grad_u_exact)['H1_semi']
+    metrics = compute_mesh_metrics(vertices, triangles)
+
+    if verbose:
+        print(f"  Inconnues P2 : {len(coords)} ({mesh['nv']} sommets + {len(coords) - mesh['nv']} milieux)")
+        print(f"  Matrice A    : {A.nnz} elements non-nuls")
+        print(f"  Erreur energie ||I_h u - u_h||_K : {error_H1:.16e}")
+        print(f"  Erreur |u - u_h|_H1              : {error_semi:.16e}")
+
+    return {
+        'Uh': Uh,
+        'error_H1': error_H1,
+        'error_H1_semi': error_semi,
+        'h': metrics['h'],
+        'Q': metrics['Q'],
+        'nv': mesh['nv'],
+        'nt': mesh['nt'],
+        'ndof': len(coords),
+        'mesh_file': mesh_file,
+        'solver': info['method'],
+        'iterations': info['iterations'],
+        'residuals': info['residuals'],
+        'converged': info['converged'],
+        'assembly_time': assembly_time,
+        'solve_time': info['setup_time'] + info['solve_time'],
+    }
+
+
+# ============================================================================
+# TEMPS POUR ATTEINDRE UNE ERREUR : P1 CONTRE P2
+# ============================================================================
+
+def _solve_p1(mesh):
+    from validation_pen import assemblage_EF_P1_vectorise
+    from error_norms import compute_error_norms
+
+    A, F, K = assemblage_EF_P1_vectorise(mesh['vertices'], mesh['triangles'], mesh['edges'],
+                                         mesh['dirichlet_labels'], fct_kappa, fct_f, fct_alpha,
+                                         fct_uE, verbose=False)
+    Uh = solve_linear_system(A, F, method='direct')['solution']
+    return len(Uh), compute_error_norms(mesh['vertices'], mesh['triangles'], Uh, None,
+                                        grad_u_exact, n_points=7)['H1_semi']
+
+
+def _solve_p2(mesh):
+    A, F, K, dofs, coords = assemblage_EF_P2_vectorise(
+        mesh['vertices'], mesh['triangles'], mesh['edges'], mesh['dirichlet_labels'],
+        fct_kappa, fct_f, fct_alpha, fct_uE, verbose=False)
+    Uh = solve_linear_system(A, F, method='direct')['solution']
+    return len(Uh), p2_error_norms(coords, dofs, Uh, None, grad_u_exact)['H1_semi']
+
+
+def _interpolate_loglog(x, y, target):
+    """x pour lequel y(x) = target (interpolation log-log, None si hors plage)"""
+    x, y = np.log(np.asarray(x, dtype=float)), np.log(np.asarray(y))
+    below = np.flatnonzero(y <= np.log(target))
+    if len(below) == 0 or below[0] == 0:
+        return None
+    k = below[0]
+    s = (np.log(target) - y[k - 1]) / (y[k] - y[k - 1])
+    return float(np.exp(x[k - 1] + s * (x[k] - x[k - 1])))
+
+
+def time_to_error_benchmark(mesh_files, targets=(1e-1, 1e-2, 1e-3), repeat=1):
+    """
+    Erreur |u - u_h|_H1, inconnues et temps (lecture exclue : assemblage +
+    resolution + erreur) en P1 et P2 sur les memes maillages, puis
+    inconnues et temps necessaires pour chaque erreur cible (interpolation
+    log-log entre maillages)
+
+    Returns:
+        dict {1: lignes P1, 2: lignes P2}, lignes = (mesh, ndof, erreur, temps)
+    """
+    rows = {1: [], 2: []}
+    print(f"{'Maillage':<10} {'ordre':>5} {'N ddl':>9} {'|u-u_h|_H1':>12} {'temps (s)':>10}")
+    for mesh_file in mesh_files:
+        mesh = read_freefem_mesh(mesh_file, cache=True)
+        for order, solve in ((1, _solve_p1), (2, _solve_p2)):
+            best = np.inf
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                ndof, err = solve(mesh)
+                best = min(best, time.perf_counter() - t0)
+            rows[order].append((os.path.basename(mesh_file), ndof, err, best))
+            print(f"{os.path.basename(mesh_file):<10} {'P' + str(order):>5} {ndof:>9} "
+                  f"{err:>12.4e} {best:>10.3f}")
+
+    print(f"\n{'cible':>10} {'N ddl P1':>10} {'N ddl P2':>10} {'t P1 (s)':>10} {'t P2 (s)':>10} "
+          f"{'gain t':>8}")
+    for target in targets:
+        vals = []
+        for order in (1, 2):
+            _, N, e, t = zip(*rows[order])
+            vals += [_interpolate_loglog(N, e, target), _interpolate_loglog(t, e, target)]
+        n1, t1, n2, t2 = vals
+        fmt = lambda v, f: f"{v:{f}}" if v is not None else "-"
+        gain = f"{t1 / t2:.1f}" if t1 is not None and t2 is not None else "-"
+        print(f"{target:>10.1e} {fmt(n1, '>10.0f'):>10} {fmt(n2, '>10.0f'):>10} "
+              f"{fmt(t1, '>10.3f'):>10} {fmt(t2, '>10.3f'):>10} {gain:>8}")
+    return rows
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Elements finis P2 (probleme penalise)')
+    parser.add_argument('mesh', nargs='?', default='meshes/m3.msh', help='Maillage .msh')
+    parser.add_argument('--benchmark', action='store_true',
+                        help='Temps pour atteindre une erreur, P1 contre P2')
+    parser.add_argument('--levels', type=int, nargs=2, default=[1, 6], metavar=('K_MIN', 'K_MAX'),
+                        help='Maillages m<K_MIN> ... m<K_MAX> du benchmark (defaut : 1 6)')
+    parser.add_argument('--targets', type=float, nargs='+', default=[1e-1, 1e-2, 1e-3],
+                        help='Erreurs |u - u_h|_H1 visees')
+    args = parser.parse_args()
+
+    if args.benchmark:
+        from mesh_generator import generate_convergence_meshes
+        files = generate_convergence_meshes(range(args.levels[0], args.levels[1] + 1), 'meshes')
+        time_to_error_benchmark(files, args.targets)
+    else:
+        main(args.mesh)
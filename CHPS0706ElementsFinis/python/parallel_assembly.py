@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Assemblage EF-P1 multi-processus en memoire partagee
+
+Les triangles sont decoupes en blocs contigus, un par tache. Chaque
+processus travailleur :
+- lit coordonnees et connectivite dans des segments
+  multiprocessing.shared_memory (aucune copie ni serialisation pickle du
+  maillage, seuls les noms des segments sont transmis)
+- calcule les k^l et f^l de son bloc (fonctions vectorisees de validation_pen)
+- reduit ses triplets COO en un bloc CSR partiel (doublons sommes localement)
+- ecrit ce bloc (data, indices, indptr) et son second membre partiel dans
+  des segments de sortie pre-alloues par le processus principal
+
+Le processus principal ne recoit que la taille de chaque bloc ; il relit
+les blocs CSR sans copie et les somme deux a deux (fusion de listes
+triees, O(nnz), sans le tri global des 9 nt triplets). Les termes de bord
+(quelques milliers d'aretes) sont assembles dans le processus principal.
+
+Les sommes sont faites dans un autre ordre que assemblage_EF_P1_vectorise :
+le resultat est identique aux arrondis pres (~1e-16 relatif).
+
+Usage (mesure d'acceleration) :
+    python parallel_assembly.py meshes/m9.msh --workers 1 2 4 8 16
+"""
+
+import os
+import sys
+import time
+import numpy as np
+import scipy.sparse as sp
+import multiprocessing as mp
+from multiprocessing import shared_memory
+
+sys.path.append(os.path.dirname(__file__))
+
+from mesh_topology import select_edges
+from validation_pen import (_eval_par_lot, _triplets_coo, _coo_vers_csr,
+                            coeffelem_P1_rigid_vect, coeffelem_P1_source_vect,
+                            coeffelem_P1_poids_vect, coeffelem_P1_transf_vect)
+
+
+# Etat des processus travailleurs (rempli par _init_worker)
+_worker = {}
+
+
+def _shared_array(shape, dtype, source=None):
+    """Tableau NumPy dans un nouveau segment de memoire partagee"""
+    nbytes = max(int(np.prod(shape)) * np.dtype(dtype).itemsize, 1)
+    shm = shared_memory.SharedMemory(create=True, size=nbytes)
+    array = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    if source is not None:
+        array[...] = source
+    return shm, array
+
+
+def _attach(spec):
+    """Vue NumPy d'un segment existant, spec = (nom, shape, dtype)"""
+    name, shape, dtype = spec
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+def _init_worker(specs, kappa_func, f_func):
+    """Rattache le processus travailleur aux segments d'entree et de sortie"""
+    for key, spec in specs.items():
+        shm, array = _attach(spec)
+        _worker[key] = array
+        _worker[f'_shm_{key}'] = shm           # garde le segment ouvert
+    _worker['kappa_func'] = kappa_func
+    _worker['f_func'] = f_func
+
+
+def _assemble_block(task):
+    """
+    Bloc de triangles [start, stop) -> bloc CSR partiel en memoire partagee
+
+    Le bloc i ecrit data/indices a partir de la position 9 * start (taille
+    maximale 9 * (stop - start)), son indptr dans la ligne i et son second
+    membre dans la ligne i de F.
+    """
+    i, start, stop = task
+    t0 = time.perf_counter()
+
+    vertices, triangles = _worker['vertices'], _worker['triangles'][start:stop]
+    nv = len(vertices)
+
+    coords_T = vertices[triangles]
+    xG = coords_T[:, :, 0].mean(axis=1)
+    yG = coords_T[:, :, 1].mean(axis=1)
+    k = coeffelem_P1_rigid_vect(coords_T, _eval_par_lot(_worker['kappa_func'], xG, yG))
+    f = coeffelem_P1_source_vect(coords_T, _worker['f_func'])
+
+    K = _coo_vers_csr(*_triplets_coo(triangles, k), nv)
+
+    offset = 9 * start
+    _worker['data'][offset:offset + K.nnz] = K.data
+    _worker['indices'][offset:offset + K.nnz] = K.indices
+    _worker['indptr'][i] = K.indptr
+    _worker['F'][i] = np.bincount(triangles.ravel(), weights=f.ravel(), minlength=nv)
+
+    return i, K.nnz, time.perf_counter() - t0, os.getpid()
+
+
+def _sum_blocks(blocks):
+    """Somme deux a deux des blocs CSR (arbre de reduction)"""
+    while len(blocks) > 1:
+        blocks = [blocks[j] + blocks[j + 1] if j + 1 < len(blocks) else blocks[j]
+                  for j in range(0, len(blocks), 2)]
+    return blocks[0]
+
+
+def assemblage_EF_P1_parallele(vertices, triangles, edges, boundary_edges,
+                               kappa_func, f_func, alpha_func, uE_func,
+                               workers=None, verbose=True):
+    """
+    Assemblage EF-P1 reparti sur plusieurs processus (memoire partagee)
+
+    Args:
+        memes arguments que assemblage_EF_P1_vectorise
+        workers: Nombre de processus (None : tous les coeurs). Avec la
+                 methode de demarrage 'spawn' (Windows, macOS), kappa_func et
+                 f_func doivent etre des fonctions de module (picklables).
+        verbose: Affichage des etapes et du temps par processus
+
+    Returns:
+        A, F, K comme assemblage_EF_P1_vectorise
+    """
+    vertices = np.ascontiguousarray(np.asarray(vertices, dtype=float)[:, :2])
+    triangles = np.ascontiguousarray(np.asarray(triangles)[:, :3], dtype=np.int32)
+    nv, nt = len(vertices), len(triangles)
+    workers = workers or os.cpu_count() or 1
+    n_tasks = max(1, min(workers, nt))
+
+    bounds = np.linspace(0, nt, n_tasks + 1).astype(int)
+    tasks = [(i, bounds[i], bounds[i + 1]) for i in range(n_tasks)]
+
+    if verbose:
+        print(f"  Assemblage volumique ({nt} triangles, {n_tasks} processus, memoire partagee)...")
+
+    segments = {}
+    try:
+        segments['vertices'] = _shared_array(vertices.shape, np.float64, vertices)
+        segments['triangles'] = _shared_array(triangles.shape, np.int32, triangles)
+        segments['data'] = _shared_array((9 * nt,), np.float64)
+        segments['indices'] = _shared_array((9 * nt,), np.int32)
+        segments['indptr'] = _shared_array((n_tasks, nv + 1), np.int32)
+        segments['F'] = _shared_array((n_tasks, nv), np.float64)
+        specs = {key: (shm.name, array.shape, array.dtype) for key, (shm, array) in segments.items()}
+
+        with mp.Pool(n_tasks, initializer=_init_worker,
+                     initargs=(specs, kappa_func, f_func)) as pool:
+            done = pool.map(_assemble_block, tasks)
+
+        if verbose:
+            for i, nnz, elapsed, pid in done:
+                print(f"    bloc {i} (pid {pid}) : {bounds[i + 1] - bounds[i]} triangles, "
+                      f"nnz {nnz}, {elapsed:.3f} s")
+
+        data, indices = segments['data'][1], segments['indices'][1]
+        indptr, F_parts = segments['indptr'][1], segments['F'][1]
+        blocks = []
+        for i, nnz, _, _ in done:
+            offset = 9 * bounds[i]
+            blocks.append(sp.csr_matrix((data[offset:offset + nnz], indices[offset:offset + nnz],
+                                         indptr[i]), shape=(nv, nv), copy=False))
+        K = _sum_blocks(blocks)
+        K = K.copy() if n_tasks == 1 else K         # detache K des segments
+        K.eliminate_zeros()
+        F = F_parts.sum(axis=0)
+        del blocks, data, indices, indptr, F_parts
+    finally:
+        for shm, _ in segments.values():
+            shm.close()
+            shm.unlink()
+
+    # Termes de bord Fourier-Robin (processus principal)
+    dirichlet = select_edges(edges, boundary_edges)
+    if verbose:
+        print(f"  Assemblage bord ({len(dirichlet)} aretes Dirichlet, vectorise)...")
+
+    coords_A = vertices[dirichlet]
+    alpha_vals = _eval_par_lot(alpha_func, coords_A[:, :, 0].mean(axis=1),
+                               coords_A[:, :, 1].mean(axis=1))
+    p = coeffelem_P1_poids_vect(coords_A, alpha_vals)
+    e = coeffelem_P1_transf_vect(coords_A, alpha_vals, uE_func)
+
+    A = K + _coo_vers_csr(*_triplets_coo(dirichlet, p), nv)
+    A.eliminate_zeros()
+    F += np.bincount(dirichlet.ravel(), weights=e.ravel(), minlength=nv)
+
+    return A, F, K
+
+
+def scaling_study(mesh_file, worker_counts=(1, 2, 4, 8, 16), repeat=3):
+    """
+    Temps d'assemblage en fonction du nombre de processus
+
+    Returns:
+        Liste de dicts {'workers', 'time', 'speedup', 'efficiency'}
+        (meilleur temps sur repeat essais)
+    """
+    from validation_pen import (read_freefem_mesh, assemblage_EF_P1_vectorise,
+                                fct_kappa, fct_f, fct_alpha, fct_uE)
+
+    mesh = read_freefem_mesh(mesh_file, cache=True)
+    args = (mesh['vertices'], mesh['triangles'], mesh['edges'], mesh['dirichlet_labels'],
+            fct_kappa, fct_f, fct_alpha, fct_uE)
+
+    t0 = time.perf_counter()
+    A_ref, F_ref, _ = assemblage_EF_P1_vectorise(*args, verbose=False)
+    t_seq = time.perf_counter() - t0
+
+    print(f"Maillage {mesh_file} : {mesh['nt']} triangles, {os.cpu_count()} coeur(s) disponible(s)")
+    print(f"  assemblage_EF_P1_vectorise (reference) : {t_seq:.3f} s")
+    print(f"  {'processus':>10} {'temps (s)':>10} {'acceleration':>13} {'efficacite':>11} {'ecart A':>10}")
+
+    rows = []
+    for n in worker_counts:
+        best = np.inf
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            A, F, _ = assemblage_EF_P1_parallele(*args, workers=n, verbose=False)
+            best = min(best, time.perf_counter() - t0)
+        if not rows:
+            t_one = best
+        ecart = abs(A - A_ref).max() / abs(A_ref).max()
+        rows.append({'workers': n, 'time': best, 'speedup': t_one / best,
+                     'efficiency': t_one / (best * n)})
+        print(f"  {n:>10} {best:>10.3f} {t_one / best:>13.2f} {t_one / (best * n):>11.2f} "
+              f"{ecart:>10.1e}")
+    return rows
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Assemblage EF-P1 multi-processus')
+    parser.add_argument('mesh', nargs='?', default='meshes/m7.msh', help='Maillage .msh')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8, 16],
+                        help='Nombres de processus a mesurer (defaut : 1 2 4 8 16)')
+    parser.add_argument('--repeat', type=int, default=3, help='Essais par mesure (meilleur temps)')
+    args = parser.parse_args()
+
+    scaling_study(args.mesh, args.workers, args.repeat)
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Balayage du parametre de penalisation α (Exercice 5) sans refactoriser
+
+Pour α(x,y) = α · a(x,y), le systeme penalise s'ecrit
+
+    (K + α B) U = F_vol + α G
+
+ou B (masse de bord) et G (transfert de bord) ne portent que sur les
+sommets Dirichlet b. En separant les sommets interieurs I :
+
+    K_II U_I + K_Ib U_b             = F_I
+    K_bI U_I + (K_bb + α B_bb) U_b  = F_b + α G_b
+
+et par complement de Schur S0 = K_bb - K_bI K_II^{-1} K_Ib :
+
+    (S0 + α B_bb) U_b = r0 + α G_b,   r0 = F_b - K_bI K_II^{-1} F_I
+    U_I = K_II^{-1} (F_I - K_Ib U_b)
+
+Une seule factorisation (K_II, independante de α) et un probleme aux
+valeurs propres generalise S0 V = B_bb V Λ (taille nb, nombre de sommets
+Dirichlet, ~ 2 sqrt(N)) donnent pour tout α :
+
+    U_b = V (Λ + α I)^{-1} V^T (r0 + α G_b)
+
+soit, par valeur de α, un produit dense nb × nb et une descente-remontee
+avec les facteurs de K_II, au lieu d'un assemblage et d'un spsolve.
+
+Usage :
+    python penalty_sweep.py meshes/m4.msh [n_alpha]
+"""
+
+import os
+import sys
+import time
+import numpy as np
+import scipy.linalg as la
+import scipy.sparse.linalg as spla
+import matplotlib.pyplot as plt
+
+sys.path.append(os.path.dirname(__file__))
+
+from assembler import P1Assembler
+from error_norms import interpolate_exact
+from validation_pen import read_freefem_mesh, fct_kappa, fct_f, fct_uE, fct_u
+
+
+class PenaltySweep:
+    """
+    Solutions U(α) du systeme penalise pour une famille α · a(x,y)
+
+    Usage :
+        sweep = PenaltySweep(vertices, triangles, edges, {1})
+        Uh = sweep.solve(1e8)
+    """
+
+    def __init__(self, vertices, triangles, edges, boundary_edges, kappa_func=fct_kappa,
+                 f_func=fct_f, uE_func=fct_uE, alpha_profile=1.0):
+        asm = P1Assembler(vertices, triangles, edges, boundary_edges)
+        self.vertices = vertices
+        self.nv = asm.nv
+
+        t0 = time.perf_counter()
+        profile = alpha_profile if callable(alpha_profile) else (lambda x, y: alpha_profile)
+        B = asm.matrix(0.0, profile)            # κ = 0 : termes de bord seuls
+        self.K = asm.stiffness(kappa_func)
+        F_vol = asm.load(f_func, lambda x, y: 0.0, uE_func)
+        G = asm.load(f_func, profile, uE_func) - F_vol
+
+        # Partition sommets Dirichlet b / autres I
+        self.b = np.unique(asm.boundary)
+        is_b = np.zeros(self.nv, dtype=bool)
+        is_b[self.b] = True
+        self.I = np.flatnonzero(~is_b)
+
+        K_II = self.K[self.I][:, self.I].tocsc()
+        self.K_Ib = self.K[self.I][:, self.b]
+        K_bb = self.K[self.b][:, self.b].toarray()
+        B_bb = B[self.b][:, self.b].toarray()
+        self.F_I = F_vol[self.I]
+        self.G_b = G[self.b]
+
+        # Factorisation unique de K_II, puis complement de Schur (dense, nb × nb)
+        self.lu = spla.splu(K_II)
+        Z = self.lu.solve(self.K_Ib.toarray())
+        S0 = K_bb - self.K_Ib.T @ Z
+        S0 = 0.5 * (S0 + S0.T)
+        del Z
+
+        r0 = F_vol[self.b] - self.K_Ib.T @ self.lu.solve(self.F_I)
+
+        # S0 V = B_bb V Λ avec V^T B_bb V = I
+        self.lam, self.V = la.eigh(S0, B_bb)
+        self.y0 = self.V.T @ r0
+        self.yg = self.V.T @ self.G_b
+        self.setup_time = time.perf_counter() - t0
+
+    def solve(self, alpha):
+        """Solution U(α) aux sommets (numerotation du maillage)"""
+        U_b = self.V @ ((self.y0 + alpha * self.yg) / (self.lam + alpha))
+        U = np.empty(self.nv)
+        U[self.b] = U_b
+        U[self.I] = self.lu.solve(self.F_I - self.K_Ib @ U_b)
+        return U
+
+    def sweep(self, alphas, u_exact_func=fct_u):
+        """
+        Erreurs pour chaque α
+
+        Returns:
+            dict avec 'alpha', 'error_energy' (||r_h(u) - U(α)||_K) et
+            'error_dirichlet' (max |u - U(α)| sur les sommets Dirichlet)
+        """
+        U_exact = interpolate_exact(self.vertices, u_exact_func)
+        e_K = np.empty(len(alphas))
+        e_D = np.empty(len(alphas))
+        for i, alpha in enumerate(alphas):
+            d = U_exact - self.solve(alpha)
+            e_K[i] = np.sqrt(abs(d @ (self.K @ d)))
+            e_D[i] = np.abs(d[self.b]).max()
+        return {'alpha': np.asarray(alphas), 'error_energy': e_K, 'error_dirichlet': e_D}
+
+
+def format_sweep_table(results, mesh_file):
+    """Tableau erreur vs α"""
+    lines = ["=" * 60,
+             f"Balayage de la penalisation α - {mesh_file}",
+             "=" * 60,
+             f"{'α':>12} {'||r_h(u) - U||_K':>20} {'max |u - U| (Dir.)':>22}",
+             "-" * 60]
+    for a, eK, eD in zip(results['alpha'], results['error_energy'], results['error_dirichlet']):
+        lines.append(f"{a:>12.4e} {eK:>20.10e} {eD:>22.4e}")
+    lines.append("=" * 60)
+    return "\n".join(lines)
+
+
+def plot_sweep(results, mesh_file, output_file=None):
+    """Graphique log-log de l'erreur en fonction de α"""
+    plt.figure(figsize=(10, 7))
+    plt.loglog(results['alpha'], results['error_energy'], '-', linewidth=2,
+               label='Erreur norme energie $\\|r_h(u) - u_h\\|_K$', color='blue')
+    plt.loglog(results['alpha'], results['error_dirichlet'], '--', linewidth=2,
+               label='Ecart Dirichlet $\\max_{\\Gamma_D} |u - u_h|$', color='red')
+    plt.axvline(1e8, color='gray', linestyle=':', label='α = 10$^8$ (validation_pen)')
+    plt.xlabel('Parametre de penalisation α', fontsize=12)
+    plt.ylabel('Erreur', fontsize=12)
+    plt.title(f'Influence de α - {os.path.basename(mesh_file)}', fontsize=14, fontweight='bold')
+    plt.grid(True, which='both', alpha=0.3)
+    plt.legend(fontsize=11)
+    plt.tight_layout()
+
+    if output_file:
+        os.makedirs(os.path.dirname(output_file), exist_ok=True)
+        plt.savefig(output_file, dpi=150, bbox_inches='tight')
+        print(f"Graphique sauvegarde : {output_file}")
+
+    plt.close()
+
+
+def main(mesh_file, n_alpha=200, alpha_min=1e-2, alpha_max=1e14, check=True):
+    """Balayage de n_alpha valeurs de α (echelle log) avec une seule factorisation"""
+    mesh = read_freefem_mesh(mesh_file, cache=True)
+    alphas = np.logspace(np.log10(alpha_min), np.log10(alpha_max), n_alpha)
+
+    sweep = PenaltySweep(mesh['vertices'], mesh['triangles'], mesh['edges'],
+                         mesh['dirichlet_labels'])
+    t0 = time.perf_counter()
+    results = sweep.sweep(alphas)
+    t_sweep = time.perf_counter() - t0
+
+    table = format_sweep_table(results, mesh_file)
+    print(table)
+    print(f"\nN = {sweep.nv}, {len(sweep.b)} sommets Dirichlet")
+    print(f"  Factorisation K_II + Schur + eigh : {sweep.setup_time:.3f} s (une fois)")
+    print(f"  Balayage de {n_alpha} valeurs      : {t_sweep:.3f} s "
+          f"({1e3 * t_sweep / n_alpha:.2f} ms par α)")
+
+    if check:
+        # Reference : assemblage complet + spsolve pour α = 10^8
+        from validation_pen import assemblage_EF_P1_vectorise
+        t0 = time.perf_counter()
+        A, F, _ = assemblage_EF_P1_vectorise(mesh['vertices'], mesh['triangles'], mesh['edges'],
+                                             mesh['dirichlet_labels'], fct_kappa, fct_f,
+                                             lambda x, y: 1e8, fct_uE, verbose=False)
+        U_ref = spla.spsolve(A.tocsc(), F)
+        t_ref = time.perf_counter() - t0
+        ecart = np.abs(sweep.solve(1e8) - U_ref).max() / np.abs(U_ref).max()
+        print(f"  Assemblage + spsolve (α = 1e8)    : {t_ref:.3f} s par α")
+        print(f"  Ecart relatif avec spsolve        : {ecart:.2e}")
+
+    os.makedirs('results', exist_ok=True)
+    with open('results/alpha_sweep_table.txt', 'w', encoding='utf-8') as f:
+        f.write(table)
+    plot_sweep(results, mesh_file, 'results/alpha_sweep_plot.png')
+
+    return results
+
+
+if __name__ == "__main__":
+    mesh_file = sys.argv[1] if len(sys.argv) > 1 else 'meshes/m4.msh'
+    n_alpha = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    main(mesh_file, n_alpha)
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Localisation de points dans un maillage de triangles et evaluation de u_h
+
+Index construit une fois par maillage : grille uniforme de cases
+(environ deux cases par triangle) sur la boite englobante, chaque triangle
+etant inscrit dans toutes les cases que coupe sa boite englobante. Les
+listes case -> triangles sont stockees en CSR (indptr, indices), construites
+sans boucle Python (np.repeat + tri par case).
+
+Localisation par lots : pour chaque point, on teste les candidats de sa
+case (k = 0, 1, ... ; une iteration vectorisee par rang k, typiquement 2 a
+6 iterations) avec les coordonnees barycentriques
+
+    (λ_1, λ_2) = J_T^{-1} (x - P_1),  λ_0 = 1 - λ_1 - λ_2,  x ∈ T  <=>  min λ >= -tol
+
+(coefficients affines λ_k = a_k x + b_k y + c_k precalcules par triangle et
+stockes par composante, tableau (6, nt) : un seul gather par test). Les points sont traites par blocs de
+CHUNK_POINTS pour borner la memoire (millions de points).
+
+Utilisations :
+    loc = PointLocator(vertices, triangles)
+    values = loc.evaluate(Uh, points)              # interpolee P1 (NaN hors maillage)
+    P = loc.interpolation_matrix(fine_vertices)    # transfert U_fin = P @ U_grossier
+    cross_mesh_error(coarse, Uc, fine, Uf)         # ||u_f - u_c|| sans solution exacte
+
+Usage :
+    python point_location.py meshes/m1.msh meshes/m2.msh meshes/m3.msh meshes/m4.msh
+    python point_location.py --benchmark meshes/m7.msh --points 1000000
+"""
+
+import os
+import sys
+import time
+import numpy as np
+import scipy.sparse as sp
+
+sys.path.append(os.path.dirname(__file__))
+
+from utils import barycentric_gradients
+from error_norms import quadrature_rule, quadrature_points
+
+
+# Points traites par bloc lors de la localisation
+CHUNK_POINTS = 1 << 20
+
+
+class PointLocator:
+    """
+    Index de localisation (grille de cases) sur un maillage de triangles
+
+    Args:
+        vertices: (nv, >=2) coordonnees
+        triangles: (nt, >=3) connectivite
+        cells_per_triangle: Nombre de cases de la grille par triangle
+        tol: Tolerance sur les coordonnees barycentriques (points sur les
+             aretes et le bord, arrondis)
+    """
+
+    def __init__(self, vertices, triangles, cells_per_triangle=2.0, tol=1e-10):
+        self.vertices = np.asarray(vertices, dtype=float)[:, :2]
+        self.triangles = np.asarray(triangles)[:, :3].astype(np.int64)
+        self.tol = tol
+        nt = len(self.triangles)
+
+        # λ_{1,2} = Jinv (x - P_1) = a x + b y + c : coefficients (a1, b1, c1, a2, b2, c2)
+        p = self.vertices[self.triangles]                          # (nt, 3, 2)
+        e1, e2 = p[:, 1] - p[:, 0], p[:, 2] - p[:, 0]
+        det = e1[:, 0] * e2[:, 1] - e2[:, 0] * e1[:, 1]
+        a1, b1 = e2[:, 1] / det, -e2[:, 0] / det
+        a2, b2 = -e1[:, 1] / det, e1[:, 0] / det
+        self.coef = np.stack([a1, b1, -(a1 * p[:, 0, 0] + b1 * p[:, 0, 1]),
+                              a2, b2, -(a2 * p[:, 0, 0] + b2 * p[:, 0, 1])])
+
+        # Grille : environ cells_per_triangle * nt cases de forme proche du carre
+        self.lower = self.vertices.min(axis=0)
+        extent = np.maximum(self.vertices.max(axis=0) - self.lower, 1e-300)
+        n_cells = max(1.0, cells_per_triangle * nt)
+        size = np.sqrt(extent[0] * extent[1] / n_cells)
+        self.shape = np.maximum(np.ceil(extent / size).astype(np.int64), 1)    # (nx, ny)
+        self.cell_size = extent / self.shape
+
+        lo = self._cell_coords(p.min(axis=1))
+        hi = self._cell_coords(p.max(axis=1))
+        span = hi - lo + 1
+        count = span[:, 0] * span[:, 1]
+        owner = np.repeat(np.arange(nt), count)
+        local = np.arange(count.sum()) - np.repeat(np.cumsum(count) - count, count)
+        sx = np.repeat(span[:, 0], count)
+        ix = np.repeat(lo[:, 0], count) + local % sx
+        iy = np.repeat(lo[:, 1], count) + local // sx
+        cell = iy * self.shape[0] + ix
+
+        order = np.argsort(cell, kind='stable')
+        self.cell_triangles = owner[order]
+        self.indptr = np.zeros(self.shape.prod() + 1, dtype=np.int64)
+        np.cumsum(np.bincount(cell, minlength=self.shape.prod()), out=self.indptr[1:])
+
+    @classmethod
+    def from_mesh(cls, mesh, **options):
+        """Depuis un dict au format mesh_io.read_msh / read_freefem_mesh"""
+        return cls(mesh['vertices'], mesh['triangles'], **options)
+
+    def _cell_coords(self, points):
+        ij = np.floor((points - self.lower) / self.cell_size).astype(np.int64)
+        return np.clip(ij, 0, self.shape - 1)
+
+    @property
+    def max_candidates(self):
+        """Nombre maximal de triangles par case"""
+        return int(np.diff(self.indptr).max())
+
+    def _barycentric(self, x, y, tri):
+        a1, b1, c1, a2, b2, c2 = self.coef[:, tri]
+        l1 = a1 * x + b1 * y + c1
+        l2 = a2 * x + b2 * y + c2
+        return 1.0 - l1 - l2, l1, l2
+
+    def _locate_chunk(self, points):
+        n = len(points)
+        found = np.full(n, -1, dtype=np.int64)
+        bary = np.zeros((n, 3))
+
+        inside_box = np.all((points >= self.lower - self.tol * self.cell_size)
+                            & (points <= self.lower + self.shape * self.cell_size
+                               + self.tol * self.cell_size), axis=1)
+        ij = self._cell_coords(points)
+        cell = ij[:, 1] * self.shape[0] + ij[:, 0]
+        start = self.indptr[cell]
+        count = self.indptr[cell + 1] - start
+
+        pending = np.flatnonzero(inside_box & (count > 0))
+        k = 0
+        while len(pending):
+            tri = self.cell_triangles[start[pending] + k]
+            l0, l1, l2 = self._barycentric(points[pending, 0], points[pending, 1], tri)
+            hit = np.minimum(np.minimum(l0, l1), l2) >= -self.tol
+            found[pending[hit]] = tri[hit]
+            bary[pending[hit]] = np.column_stack([l0[hit], l1[hit], l2[hit]])
+            k += 1
+            pending = pending[~hit]
+            pending = pending[count[pending] > k]
+        return found, bary
+
+    def locate(self, points):
+        """
+        Triangle contenant chaque point et coordonnees barycentriques
+
+        Args:
+            points: (n, >=2) coordonnees
+
+        Returns:
+            (tri, bary) : indices (n,) (-1 hors maillage) et λ (n, 3)
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, np.shape(points)[-1])[:, :2]
+        n = len(points)
+        tri = np.empty(n, dtype=np.int64)
+        bary = np.empty((n, 3))
+        for s in range(0, n, CHUNK_POINTS):
+            tri[s:s + CHUNK_POINTS], bary[s:s + CHUNK_POINTS] = self._locate_chunk(points[s:s + CHUNK_POINTS])
+        return tri, bary
+
+    def evaluate(self, U, points, outside=np.nan):
+        """Interpolee P1 Σ U_i φ_i aux points (valeur outside hors maillage)"""
+        shape = np.shape(points)[:-1]
+        tri, bary = self.locate(points)
+        ok = tri >= 0
+        values = np.full(len(tri), outside, dtype=float)
+        values[ok] = np.einsum('ni,ni->n', np.asarray(U)[self.triangles[tri[ok]]], bary[ok])
+        return values.reshape(shape)
+
+    def interpolation_matrix(self, points):
+        """
+        Matrice creuse P (n_points, nv) de l'interpolation P1 aux points :
+        P @ U = evaluate(U, points) (lignes nulles hors maillage)
+        """
+        tri, bary = self.locate(points)
+        ok = np.flatnonzero(tri >= 0)
+        rows = np.repeat(ok, 3)
+        cols = self.triangles[tri[ok]].ravel()
+        return sp.csr_matrix((bary[ok].ravel(), (rows, cols)), shape=(len(tri), len(self.vertices)))
+
+
+# ============================================================================
+# TRANSFERT ET ERREUR ENTRE MAILLAGES
+# ============================================================================
+
+def transfer(U, source_locator, target_vertices):
+    """Interpolee P1 de U (maillage source) aux sommets du maillage cible"""
+    return source_locator.evaluate(U, np.asarray(target_vertices)[:, :2])
+
+
+def cross_mesh_error(coarse_mesh, U_coarse, fine_mesh, U_fine, n_points=3, locator=None):
+    """
+    Ecart entre deux solutions P1 de maillages differents, integre sur le
+    maillage fin (quadrature de Gauss ; u_c et ∇u_c evalues aux points de
+    quadrature du maillage fin par localisation)
+
+        ||u_f - u_c||_{L2},   |u_f - u_c|_{H1}
+
+    Pour des maillages emboites (m_{k+1} raffine m_k), chaque triangle fin
+    est inclus dans un triangle grossier et les integrales sont exactes.
+
+    Returns:
+        dict avec 'L2', 'H1_semi' et 'outside' (points de quadrature hors
+        du maillage grossier, ignores)
+    """
+    locator = locator if locator is not None else PointLocator.from_mesh(coarse_mesh)
+    Vf = np.asarray(fine_mesh['vertices'], dtype=float)[:, :2]
+    Tf = np.asarray(fine_mesh['triangles'])[:, :3]
+
+    bary, weights = quadrature_rule(n_points)
+    xq = quadrature_points(Vf, Tf, bary)                           # (nt, nq, 2)
+    grads_f, areas = barycentric_gradients(Vf, Tf)
+    uf_q = U_fine[Tf] @ bary.T
+    grad_f = np.einsum('ti,tid->td', U_fine[Tf], grads_f)
+
+    tri_c, bary_c = locator.locate(xq.reshape(-1, 2))
+    ok = tri_c >= 0
+    Tc = locator.triangles
+    grads_c, _ = barycentric_gradients(locator.vertices, Tc)
+    grad_c_T = np.einsum('ti,tid->td', U_coarse[Tc], grads_c)
+
+    uc_q = np.zeros(len(tri_c))
+    uc_q[ok] = np.einsum('ni,ni->n', U_coarse[Tc[tri_c[ok]]], bary_c[ok])
+    gc_q = np.zeros((len(tri_c), 2))
+    gc_q[ok] = grad_c_T[tri_c[ok]]
+
+    w = (areas[:, None] * weights[None, :]).ravel() * ok
+    diff = uf_q.ravel() - uc_q
+    gdiff = np.repeat(grad_f, len(weights), axis=0) - gc_q
+    return {'L2': float(np.sqrt(w @ diff**2)),
+            'H1_semi': float(np.sqrt(w @ (gdiff**2).sum(axis=1))),
+            'outside': int((~ok).sum())}
+
+
+def location_benchmark(mesh_file, n_points=1000000, seed=0):
+    """Construction de l'index et debit de localisation sur des points aleatoires"""
+    from mesh_io import read_msh
+
+    mesh = read_msh(mesh_file, cache=True)
+    t0 = time.perf_counter()
+    locator = PointLocator.from_mesh(mesh)
+    t_build = time.perf_counter() - t0
+
+    rng = np.random.default_rng(seed)
+    lower, upper = mesh['vertices'].min(axis=0), mesh['vertices'].max(axis=0)
+    points = lower + (upper - lower) * rng.random((n_points, 2))
+    U = rng.random(mesh['nv'])
+
+    t0 = time.perf_counter()
+    values = locator.evaluate(U, points)
+    t_eval = time.perf_counter() - t0
+
+    print(f"Maillage {mesh_file} : {mesh['nt']} triangles, grille {locator.shape[0]} x "
+          f"{locator.shape[1]}, au plus {locator.max_candidates} triangles par case")
+    print(f"  construction de l'index : {t_build:.3f} s")
+    print(f"  evaluation en {n_points} points : {t_eval:.3f} s "
+          f"({n_points / t_eval / 1e6:.2f} M points/s), {np.isnan(values).sum()} hors maillage")
+    return t_build, t_eval
+
+
+def main(mesh_files):
+    """
+    Solutions de validation_pen sur m1 ... mK transferees sur le maillage le
+    plus fin, ecarts avec la solution fine (sans solution exacte) compares
+    aux erreurs exactes
+    """
+    from validation_pen import main as solve_fem, read_freefem_mesh, fct_u, grad_u_exact
+    from error_norms import compute_error_norms
+
+    meshes = [read_freefem_mesh(f) for f in mesh_files]
+    solutions = [solve_fem(f, verbose=False)['Uh'] for f in mesh_files]
+    fine, U_fine = meshes[-1], solutions[-1]
+
+    print(f"Reference : {mesh_files[-1]} ({fine['nv']} sommets)")
+    print(f"  {'maillage':<12} {'||u_f-u_h||_L2':>15} {'|u_f-u_h|_H1':>13} "
+          f"{'||u-u_h||_L2':>13} {'|u-u_h|_H1':>12} {'max |transfert - u_f|':>22}")
+    for f, mesh, U in zip(mesh_files[:-1], meshes[:-1], solutions[:-1]):
+        locator = PointLocator.from_mesh(mesh)
+        err = cross_mesh_error(mesh, U, fine, U_fine, locator=locator)
+        exact = compute_error_norms(mesh['vertices'], mesh['triangles'], U, fct_u, grad_u_exact)
+        U_on_fine = transfer(U, locator, fine['vertices'])
+        print(f"  {os.path.basename(f):<12} {err['L2']:>15.4e} {err['H1_semi']:>13.4e} "
+              f"{exact['L2']:>13.4e} {exact['H1_semi']:>12.4e} "
+              f"{np.abs(U_on_fine - U_fine).max():>22.4e}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Localisation de points et transfert entre maillages')
+    parser.add_argument('meshes', nargs='*',
+                        default=['meshes/m1.msh', 'meshes/m2.msh', 'meshes/m3.msh', 'meshes/m4.msh'],
+                        help='Maillages, du plus grossier au plus fin')
+    parser.add_argument('--benchmark', action='store_true',
+                        help='Debit de localisation sur le premier maillage')
+    parser.add_argument('--points', type=int, default=1000000, help='Nombre de points (benchmark)')
+    args = parser.parse_args()
+
+    if args.benchmark:
+        location_benchmark(args.meshes[0], args.points)
+    else:
+        main(args.meshes)
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Backend Python de main.py : resolutions standard et penalisee sans FreeFem++
+
+Equivalent en processus des scripts freefem/validation.edp et
+freefem/validation_pen.edp, a partir des assemblages vectorises existants :
+- 'standard'  : bonus_assemblage (Dirichlet fort par systeme reduit)
+- 'penalized' : validation_pen (penalisation α = 10^8 sur x=0 et x=4)
+
+L'erreur renvoyee est celle des scripts .edp : semi-norme H1
+|u - u_h|_{H1}, integree avec la quadrature a 7 points (degre 5, comme
+qf5pT, la quadrature par defaut de int2d dans FreeFem++).
+
+Les resultats sont des dicts (erreurs, h, Q, temps par etape) transmis
+directement a convergence_analysis.analyze_convergence et a
+generate_report.generate_pdf_report, sans fichiers results/m*_error*.txt.
+"""
+
+import os
+import sys
+import time
+import numpy as np
+from typing import Dict, List
+
+sys.path.append(os.path.dirname(__file__))
+
+from mesh_io import read_msh
+from mesh_topology import get_topology
+from utils import compute_mesh_metrics
+from error_norms import compute_error_norms
+from solvers import solve_linear_system
+import bonus_assemblage as bonus
+import validation_pen as pen
+
+
+METHODS = ('standard', 'penalized')
+
+# Quadrature de l'erreur (7 points, degre 5 : qf5pT de FreeFem++)
+ERROR_QUADRATURE = 7
+
+
+def _build_standard(mesh: Dict):
+    """Dirichlet fort (u = uE sur x=0 et x=4) : systeme reduit et relevement"""
+    vertices, triangles = mesh['vertices'], mesh['triangles']
+
+    A, F = bonus.assemble_stiffness_and_load_vectorized(vertices, triangles, bonus.f_source)
+    dirichlet_nodes = get_topology(mesh).label_nodes({1})
+    A_LL, F_L, free_nodes, u_D = bonus.reduce_dirichlet_system(A, F, dirichlet_nodes,
+                                                               vertices, bonus.u_exact)
+    return A_LL, F_L, lambda u: bonus.lift_dirichlet_solution(u, free_nodes, u_D)
+
+
+def _build_penalized(mesh: Dict):
+    """Penalisation α = 10^8 sur les aretes Dirichlet (label 1) : systeme complet"""
+    edges = np.column_stack([mesh['edges'], mesh['edge_labels']])
+    A, F, _ = pen.assemblage_EF_P1_vectorise(mesh['vertices'], mesh['triangles'], edges, {1},
+                                             pen.fct_kappa, pen.fct_f, pen.fct_alpha, pen.fct_uE,
+                                             verbose=False)
+    return A, F, lambda u: u
+
+
+def solve_mesh(mesh_file: str, method: str = 'standard', solver: str = 'direct',
+               cache: bool = False, **solver_options) -> Dict:
+    """
+    Resolution EF-P1 d'un maillage (equivalent de FreeFem++ <script>.edp <maillage>)
+
+    Args:
+        mesh_file: Chemin du maillage .msh
+        method: 'standard' (Dirichlet fort) ou 'penalized' (penalisation)
+        solver: Solveur lineaire (voir solvers.solve_linear_system)
+        cache: Cache binaire du maillage (mesh_io)
+        solver_options: precond, tol, maxiter...
+
+    Returns:
+        dict avec 'mesh', 'method', 'nv', 'nt', 'h', 'Q', 'error_H1'
+        (semi-norme H1), 'error_L2', 'iterations' et 'times' (secondes par
+        etape : 'read', 'metrics', 'assembly', 'solve', 'error', 'total')
+    """
+    if method not in METHODS:
+        raise ValueError(f"Methode inconnue : {method!r} (choix : {METHODS})")
+
+    times = {}
+    t0 = time.perf_counter()
+
+    mesh = read_msh(mesh_file, cache=cache)
+    t1 = time.perf_counter()
+    times['read'] = t1 - t0
+
+    metrics = compute_mesh_metrics(mesh['vertices'], mesh['triangles'])
+    t2 = time.perf_counter()
+    times['metrics'] = t2 - t1
+
+    build = _build_standard if method == 'standard' else _build_penalized
+    A, F, lift = build(mesh)
+    t3 = time.perf_counter()
+    times['assembly'] = t3 - t2
+
+    info = solve_linear_system(A, F, method=solver, **solver_options)
+    uh = lift(info['solution'])
+    t4 = time.perf_counter()
+    times['solve'] = t4 - t3
+
+    norms = compute_error_norms(mesh['vertices'], mesh['triangles'], uh,
+                                u_exact_func=bonus.u_exact, grad_u_exact_func=bonus.grad_u_exact,
+                                n_points=ERROR_QUADRATURE)
+    t5 = time.perf_counter()
+    times['error'] = t5 - t4
+    times['total'] = t5 - t0
+
+    return {
+        'mesh': mesh_file,
+        'method': method,
+        'nv': mesh['nv'],
+        'nt': mesh['nt'],
+        'h': metrics['h'],
+        'Q': metrics['Q'],
+        'error_H1': norms['H1_semi'],
+        'error_L2': norms['L2'],
+        'iterations': info['iterations'],
+        'times': times
+    }
+
+
+def run_python_backend(mesh_files: List[str], methods=METHODS, verbose: bool = True,
+                       **solve_options) -> Dict[str, List[Dict]]:
+    """
+    Resolution de tous les couples maillage/methode dans le processus courant
+
+    Args:
+        mesh_files: Maillages, du plus grossier au plus fin
+        methods: Methodes a resoudre ('standard', 'penalized')
+        solve_options: Options transmises a solve_mesh
+
+    Returns:
+        dict {methode: [resultat par maillage, dans l'ordre de mesh_files]}
+        (None a la place du resultat si le maillage est absent)
+    """
+    results = {}
+    for method in methods:
+        results[method] = []
+        for mesh_file in mesh_files:
+            if not os.path.exists(mesh_file):
+                print(f"[WARN]  Maillage {mesh_file} non trouve, ignore")
+                results[method].append(None)
+                continue
+
+            res = solve_mesh(mesh_file, method, **solve_options)
+            results[method].append(res)
+
+            if verbose:
+                print(f"  {os.path.basename(mesh_file):<8} ({method:<9}) : N = {res['nv']:<7} "
+                      f"|u - u_h|_H1 = {res['error_H1']:.10e}   ({1e3 * res['times']['total']:.1f} ms)")
+
+    return results
+
+
+def format_timings(results: List[Dict]) -> str:
+    """Tableau des temps par etape (ms) pour une liste de resultats solve_mesh"""
+    stages = ('read', 'metrics', 'assembly', 'solve', 'error', 'total')
+    lines = [f"{'Maillage':<10} " + " ".join(f"{s:>10}" for s in stages)]
+    lines.append("-" * (11 + 11 * len(stages)))
+    for res in results:
+        if res is None:
+            continue
+        lines.append(f"{os.path.basename(res['mesh']):<10} "
+                     + " ".join(f"{1e3 * res['times'][s]:>10.2f}" for s in stages))
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    mesh_files = sys.argv[1:] or [f'meshes/m{i}.msh' for i in range(1, 5)]
+    all_results = run_python_backend(mesh_files)
+    for method, res in all_results.items():
+        print(f"\nTemps par etape (ms) - {method}")
+        print(format_timings(res))
@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Preconditionneur de Schwarz additif avec recouvrement (decomposition de domaine)
+
+    M^{-1} = Σ_i R_i^T A_i^{-1} R_i  [+ R_0^T A_0^{-1} R_0]
+
+- Partition : bissection recursive du graphe dual des triangles (triangles
+  voisins par une arete). Chaque sous-graphe est ordonne par distance (BFS)
+  a un triangle pseudo-peripherique et coupe au rang voulu (bandes de
+  niveaux, nombre quelconque de parts de tailles egales a un triangle pres).
+- Recouvrement : les sommets des triangles du sous-domaine, etendus de
+  `overlap` couches de voisins dans le graphe des sommets.
+- Problemes locaux : A_i = R_i A R_i^T (conditions de Dirichlet homogenes
+  sur le bord artificiel), factorises par splu dans des processus
+  travailleurs persistants. Le residu et les corrections locales
+  transitent par multiprocessing.shared_memory, les processus ne recoivent
+  qu'un signal par application.
+- Espace grossier optionnel (Nicolaides) : une fonction par sous-domaine,
+  indicatrice ponderee par la partition de l'unite 1 / multiplicite, nulle
+  sur les sommets Dirichlet (fixed_dofs) : avec la penalisation, une
+  fonction non nulle au bord aurait une energie en α et ne corrigerait
+  rien. Les fonctions nulles (sous-domaine entierement Dirichlet) sont
+  retirees ; A_0 (taille nombre de sous-domaines) peut rester singulier
+  (fonctions liees sur les petits maillages) et est inverse par pseudo-
+  inverse dense (decomposition spectrale, valeurs propres negligeables
+  ignorees).
+
+Sans espace grossier, le nombre d'iterations du CG croit avec le nombre de
+sous-domaines (l'information ne traverse qu'un sous-domaine par iteration) ;
+l'espace grossier limite cette croissance (m6 : 122 iterations a 1 niveau,
+86 a 2 niveaux pour 64 sous-domaines).
+
+Usage :
+    python schwarz.py meshes/m6.msh --subdomains 2 4 8 16 32 --overlap 2
+"""
+
+import os
+import sys
+import time
+import numpy as np
+import scipy.sparse as sp
+import scipy.sparse.linalg as spla
+import scipy.linalg as la
+import multiprocessing as mp
+from multiprocessing import shared_memory
+from scipy.sparse.csgraph import dijkstra
+
+sys.path.append(os.path.dirname(__file__))
+
+from renumbering import vertex_adjacency
+from mesh_topology import MeshTopology, select_edges
+
+
+# ============================================================================
+# PARTITION DU MAILLAGE
+# ============================================================================
+
+def _bfs_levels(G: sp.csr_matrix, source: int) -> np.ndarray:
+    """Distances (nombre d'aretes) a source, inf hors composante connexe"""
+    return dijkstra(G, directed=False, indices=source, unweighted=True)
+
+
+def partition_triangles(triangles: np.ndarray, n_parts: int) -> np.ndarray:
+    """
+    Bissection recursive du graphe dual en n_parts sous-domaines
+
+    Returns:
+        part (nt,) : numero de sous-domaine de chaque triangle
+    """
+    G = MeshTopology(None, triangles).triangle_graph()
+    nt = G.shape[0]
+    part = np.zeros(nt, dtype=np.int32)
+
+    stack = [(np.arange(nt), n_parts, 0)]
+    while stack:
+        ids, k, first = stack.pop()
+        if k == 1:
+            part[ids] = first
+            continue
+
+        sub = G[ids][:, ids]
+        # Sommet pseudo-peripherique : le plus eloigne d'un sommet quelconque
+        d0 = _bfs_levels(sub, 0)
+        d0[~np.isfinite(d0)] = -1
+        dist = _bfs_levels(sub, int(np.argmax(d0)))
+        dist[~np.isfinite(dist)] = np.inf
+
+        k_left = k // 2
+        cut = len(ids) * k_left // k
+        order = np.argsort(dist, kind='stable')
+        stack.append((ids[order[:cut]], k_left, first))
+        stack.append((ids[order[cut:]], k - k_left, first + k_left))
+
+    return part
+
+
+def subdomain_dofs(triangles: np.ndarray, part: np.ndarray, nv: int, overlap: int = 1):
+    """
+    Sommets de chaque sous-domaine avec `overlap` couches de recouvrement
+
+    Returns:
+        Liste de tableaux d'indices de sommets (tries), un par sous-domaine
+    """
+    tri = np.asarray(triangles)[:, :3]
+    G = vertex_adjacency(tri, nv)
+    dofs = []
+    for i in range(int(part.max()) + 1):
+        mask = np.zeros(nv, dtype=bool)
+        mask[tri[part == i].ravel()] = True
+        for _ in range(overlap):
+            mask |= (G @ mask.astype(np.int8)) > 0
+        dofs.append(np.flatnonzero(mask))
+    return dofs
+
+
+def schwarz_options(mesh, labels):
+    """
+    Options de solvers.make_preconditioner(precond='schwarz') pour un maillage
+
+    Args:
+        mesh: dict avec 'triangles' et 'edges', soit (nbe, 3) : i1 i2 label
+              (validation_pen.read_freefem_mesh), soit (nbe, 2) avec
+              'edge_labels' (mesh_io.read_msh)
+        labels: Labels des aretes de bord Dirichlet (penalisees)
+
+    Returns:
+        dict 'triangles' (partition) et 'fixed_dofs' (sommets Dirichlet,
+        exclus de l'espace grossier)
+    """
+    edges = np.asarray(mesh['edges'])
+    if 'edge_labels' in mesh:
+        edges = np.column_stack([edges[:, :2], mesh['edge_labels']])
+    return {'triangles': mesh['triangles'],
+            'fixed_dofs': np.unique(select_edges(edges, labels))}
+
+
+# ============================================================================
+# PROCESSUS TRAVAILLEURS
+# ============================================================================
+
+def _attach(spec):
+    """Vue NumPy d'un segment de memoire partagee, spec = (nom, shape, dtype)"""
+    name, shape, dtype = spec
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+def _factor_local(A, dofs):
+    """Factorisation du probleme local A_i = R_i A R_i^T"""
+    return spla.splu(sp.csc_matrix(A[dofs][:, dofs]))
+
+
+def _schwarz_worker(conn, specs, nv, subdomains):
+    """
+    Boucle d'un processus : factorise ses sous-domaines, puis a chaque
+    signal lit r et ecrit z_i = A_i^{-1} r|_i a sa place dans z
+    """
+    segments = {key: _attach(spec) for key, spec in specs.items()}
+    arrays = {key: array for key, (_, array) in segments.items()}
+    A = sp.csr_matrix((arrays['data'], arrays['indices'], arrays['indptr']), shape=(nv, nv))
+    dofs, offsets = arrays['dofs'], arrays['offsets']
+
+    t0 = time.perf_counter()
+    local = [(dofs[offsets[i]:offsets[i + 1]], offsets[i], _factor_local(A, dofs[offsets[i]:offsets[i + 1]]))
+             for i in subdomains]
+    conn.send(time.perf_counter() - t0)
+
+    r, z = arrays['r'], arrays['z']
+    while conn.recv() is not None:
+        for d, start, lu in local:
+            z[start:start + len(d)] = lu.solve(r[d])
+        conn.send(True)
+
+    del A, local, r, z, arrays
+    for shm, _ in segments.values():
+        shm.close()
+    conn.close()
+
+
+# ============================================================================
+# PRECONDITIONNEUR
+# ============================================================================
+
+class AdditiveSchwarz(spla.LinearOperator):
+    """
+    Preconditionneur de Schwarz additif M^{-1} ≈ A^{-1} (LinearOperator)
+
+    Args:
+        A: Matrice du systeme (sparse, SPD)
+        triangles: Connectivite du maillage (partition)
+        n_subdomains: Nombre de sous-domaines
+        overlap: Couches de sommets de recouvrement
+        coarse: Ajoute l'espace grossier de Nicolaides
+        fixed_dofs: Sommets Dirichlet (penalises), exclus de l'espace grossier
+        workers: Processus factorisant et appliquant les A_i^{-1}
+                 (None : min(coeurs, sous-domaines) ; 0 : processus courant)
+
+    Les processus sont arretes par close() (ou en sortie de bloc with).
+    """
+
+    def __init__(self, A, triangles, n_subdomains=8, overlap=1, coarse=True, fixed_dofs=None,
+                 workers=None):
+        A = sp.csr_matrix(A)
+        nv = A.shape[0]
+        super().__init__(dtype=np.float64, shape=(nv, nv))
+        self._segments = {}
+        self._workers = []
+
+        t0 = time.perf_counter()
+        # Au plus un sous-domaine par triangle ; les sous-domaines vides sont retires
+        n_subdomains = max(1, min(n_subdomains, len(triangles)))
+        self.part = partition_triangles(triangles, n_subdomains)
+        self.dofs = [d for d in subdomain_dofs(triangles, self.part, nv, overlap) if len(d)]
+        self.n_subdomains = len(self.dofs)
+        self.all_dofs = np.concatenate(self.dofs)
+        self.offsets = np.concatenate([[0], np.cumsum([len(d) for d in self.dofs])])
+        self.partition_time = time.perf_counter() - t0
+
+        if workers is None:
+            workers = min(os.cpu_count() or 1, self.n_subdomains)
+        self.n_workers = min(workers, self.n_subdomains)
+
+        try:
+            t0 = time.perf_counter()
+            if self.n_workers == 0:
+                self._local = [_factor_local(A, d) for d in self.dofs]
+            else:
+                self._start_workers(A)
+            self.factor_time = time.perf_counter() - t0
+
+            self.coarse = self._coarse_space(A, fixed_dofs) if coarse else None
+        except BaseException:
+            # Pas de processus ni de segments partages orphelins
+            self.close()
+            raise
+
+    def _coarse_space(self, A, fixed_dofs):
+        """
+        Espace grossier de Nicolaides : R_0[i, dofs_i] = 1 / multiplicite
+
+        Returns:
+            (Q, inv_w) : pseudo-inverse A_0^+ = Q diag(inv_w) Q^T, ou None si
+            toutes les fonctions grossieres sont nulles
+        """
+        nv = A.shape[0]
+        weight = 1.0 / np.bincount(self.all_dofs, minlength=nv)
+        if fixed_dofs is not None:
+            weight[fixed_dofs] = 0.0
+        rows = np.repeat(np.arange(self.n_subdomains), np.diff(self.offsets))
+        R0 = sp.csr_matrix((weight[self.all_dofs], (rows, self.all_dofs)),
+                           shape=(self.n_subdomains, nv))
+        R0.eliminate_zeros()
+        self.R0 = R0[np.diff(R0.indptr) > 0]
+        if self.R0.shape[0] == 0:
+            return None
+
+        w, Q = la.eigh((self.R0 @ A @ self.R0.T).toarray())
+        keep = w > w.max() * len(w) * np.finfo(float).eps
+        return Q[:, keep], 1.0 / w[keep]
+
+    def _start_workers(self, A):
+        """Segments partages (A, sous-domaines, r, z) et processus travailleurs"""
+        arrays = {'data': A.data, 'indices': A.indices, 'indptr': A.indptr,
+                  'dofs': self.all_dofs, 'offsets': self.offsets,
+                  'r': np.zeros(A.shape[0]), 'z': np.zeros(len(self.all_dofs))}
+        specs = {}
+        for key, array in arrays.items():
+            shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            view = np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)
+            view[...] = array
+            self._segments[key] = (shm, view)
+            specs[key] = (shm.name, array.shape, array.dtype)
+        self._r, self._z = self._segments['r'][1], self._segments['z'][1]
+
+        # Sous-domaines repartis en tranches contigues, equilibrees en sommets
+        sizes = np.cumsum([len(d) for d in self.dofs])
+        owner = np.minimum((sizes - 1) * self.n_workers // sizes[-1], self.n_workers - 1)
+        for w in range(self.n_workers):
+            parent, child = mp.Pipe()
+            proc = mp.Process(target=_schwarz_worker, daemon=True,
+                              args=(child, specs, A.shape[0], np.flatnonzero(owner == w).tolist()))
+            proc.start()
+            self._workers.append((proc, parent))
+        self.worker_factor_times = [conn.recv() for _, conn in self._workers]
+
+    def _matvec(self, r):
+        r = np.ravel(r)
+        if self._workers:
+            self._r[:] = r
+            for _, conn in self._workers:
+                conn.send(1)
+            for _, conn in self._workers:
+                conn.recv()
+            z = self._z
+        else:
+            z = np.concatenate([lu.solve(r[d]) for d, lu in zip(self.dofs, self._local)])
+
+        y = np.bincount(self.all_dofs, weights=z, minlength=self.shape[0])
+        if self.coarse is not None:
+            Q, inv_w = self.coarse
+            y += self.R0.T @ (Q @ (inv_w * (Q.T @ (self.R0 @ r))))
+        return y
+
+    def _rmatvec(self, r):
+        return self._matvec(r)
+
+    def close(self):
+        """Arrete les processus et libere la memoire partagee"""
+        for proc, conn in self._workers:
+            try:
+                conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        for proc, conn in self._workers:
+            proc.join()
+            conn.close()
+        self._workers = []
+        self._r = self._z = None
+        for shm, _ in self._segments.values():
+            shm.close()
+            shm.unlink()
+        self._segments = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __del__(self):
+        if getattr(self, '_segments', None):
+            self.close()
+
+
+# ============================================================================
+# ETUDE : ITERATIONS EN FONCTION DU NOMBRE DE SOUS-DOMAINES
+# ============================================================================
+
+def subdomain_study(mesh_file, subdomain_counts=(2, 4, 8, 16, 32), overlap=1,
+                    workers=None, tol=1e-10):
+    """
+    Iterations du CG preconditionne par Schwarz additif (probleme penalise
+    de validation_pen), avec et sans espace grossier
+
+    Returns:
+        Liste de dicts par nombre de sous-domaines
+    """
+    from validation_pen import (read_freefem_mesh, assemblage_EF_P1_vectorise, fct_kappa,
+                                fct_f, fct_alpha, fct_uE, fct_u)
+    from solvers import conjugate_gradient, make_preconditioner
+    from error_norms import energy_norm_error
+
+    mesh = read_freefem_mesh(mesh_file, cache=True)
+    fixed = np.unique(select_edges(mesh['edges'], mesh['dirichlet_labels']))
+    A, F, K = assemblage_EF_P1_vectorise(mesh['vertices'], mesh['triangles'], mesh['edges'],
+                                         mesh['dirichlet_labels'], fct_kappa, fct_f, fct_alpha,
+                                         fct_uE, verbose=False)
+
+    print(f"Maillage {mesh_file} : N = {A.shape[0]}, recouvrement {overlap}, "
+          f"{os.cpu_count()} coeur(s)")
+    jacobi = conjugate_gradient(A, F, M=make_preconditioner(A, 'jacobi'), tol=tol)
+    print(f"  Reference CG + Jacobi : {jacobi['iterations']} iterations")
+    print(f"  {'sous-dom.':>9} {'proc.':>6} {'iter (1 niv.)':>14} {'iter (2 niv.)':>14} "
+          f"{'facto (s)':>10} {'CG 2 niv. (s)':>14} {'erreur e_h':>12}")
+
+    rows = []
+    for n in subdomain_counts:
+        row = {'subdomains': n}
+        for coarse in (False, True):
+            with AdditiveSchwarz(A, mesh['triangles'], n, overlap, coarse, fixed, workers) as M:
+                t0 = time.perf_counter()
+                res = conjugate_gradient(A, F, M=M, tol=tol)
+                key = 'two_level' if coarse else 'one_level'
+                row[f'iterations_{key}'] = res['iterations']
+                row[f'time_{key}'] = time.perf_counter() - t0
+                row['factor_time'] = M.factor_time
+                row['workers'] = M.n_workers
+        row['error'] = energy_norm_error(res['solution'], mesh['vertices'], K, fct_u)
+        rows.append(row)
+        print(f"  {n:>9} {row['workers']:>6} {row['iterations_one_level']:>14} "
+              f"{row['iterations_two_level']:>14} {row['factor_time']:>10.3f} "
+              f"{row['time_two_level']:>14.3f} {row['error']:>12.4e}")
+    return rows
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Schwarz additif avec recouvrement (CG)')
+    parser.add_argument('mesh', nargs='?', default='meshes/m6.msh', help='Maillage .msh')
+    parser.add_argument('--subdomains', type=int, nargs='+', default=[2, 4, 8, 16, 32],
+                        help='Nombres de sous-domaines (defaut : 2 4 8 16 32)')
+    parser.add_argument('--overlap', type=int, default=1, help='Couches de recouvrement (defaut : 1)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Processus (defaut : min(coeurs, sous-domaines) ; 0 : sans processus)')
+    args = parser.parse_args()
+
+    subdomain_study(args.mesh, args.subdomains, args.overlap, args.workers)
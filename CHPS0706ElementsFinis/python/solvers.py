@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Solveurs lineaires pour les systemes EF-P1 : AU = F
+
+Choix du solveur :
+    'direct'  : factorisation LU creuse SuperLU (spsolve)
+    'umfpack' : factorisation UMFPACK (necessite scikit-umfpack)
+    'cg'      : gradient conjugue preconditionne, avec preconditionneur
+                'none', 'jacobi', 'ilu' (factorisation incomplete spilu),
+                'amg' (agregation lissee, necessite pyamg), 'schwarz'
+                (Schwarz additif avec recouvrement, voir schwarz.py) ou
+                'gmg' (cycle de multigrille geometrique, voir multigrid.py)
+
+Les matrices EF-P1 (avec penalisation ou apres elimination de Dirichlet)
+sont symetriques definies positives : le gradient conjugue s'applique, avec
+une memoire O(nnz) au lieu du remplissage de la factorisation directe.
+
+Le resultat est un dict : solution, nombre d'iterations, historique des
+residus relatifs, convergence et temps de resolution.
+"""
+
+import time
+import importlib
+import numpy as np
+import scipy.sparse as sp
+import scipy.sparse.linalg as spla
+from typing import Dict
+
+
+SOLVERS = ('direct', 'umfpack', 'cg')
+PRECONDITIONERS = ('none', 'jacobi', 'ilu', 'amg', 'schwarz', 'gmg')
+
+
+def make_preconditioner(A, precond: str = 'jacobi', **options):
+    """
+    Construit un preconditionneur M ≈ A^{-1} (LinearOperator ou None)
+
+    Args:
+        A: Matrice du systeme (sparse)
+        precond: 'none', 'jacobi', 'ilu', 'amg', 'schwarz' ou 'gmg'
+        options: 'drop_tol', 'fill_factor' (ilu) ; options de
+                 pyamg.smoothed_aggregation_solver (amg) ; 'triangles'
+                 (obligatoire), 'subdomains', 'overlap', 'coarse',
+                 'fixed_dofs', 'workers' (schwarz) ; 'prolongations'
+                 (obligatoire, voir multigrid.mesh_prolongations), 'cycle',
+                 'nu1', 'nu2' (gmg)
+
+    Returns:
+        LinearOperator appliquant M, ou None si precond == 'none'
+    """
+    n = A.shape[0]
+
+    if precond in (None, 'none'):
+        return None
+
+    if precond == 'jacobi':
+        # A.diagonal() : matrice creuse ou operateur sans matrice (matrix_free.P1Operator)
+        inv_diag = 1.0 / A.diagonal()
+        return spla.LinearOperator((n, n), matvec=lambda r: inv_diag * r, dtype=float)
+
+    if not sp.issparse(A):
+        raise ValueError(f"Le preconditionneur {precond!r} necessite une matrice assemblee "
+                         "(operateur sans matrice : 'none' ou 'jacobi')")
+
+    if precond == 'ilu':
+        # SciPy ne fournit pas de Cholesky incomplet : ILU (SuperLU) le remplace.
+        # CG exige un M symetrique : ordre symetrique (MMD sur A + A^T), sans
+        # pivotage partiel (diag_pivot_thresh=0) et en SymmetricMode ; avec
+        # COLAMD et le pivotage par defaut, CG+ILU diverge des m5
+        ilu = spla.spilu(sp.csc_matrix(A),
+                         drop_tol=options.get('drop_tol', 1e-4),
+                         fill_factor=options.get('fill_factor', 10),
+                         permc_spec='MMD_AT_PLUS_A',
+                         diag_pivot_thresh=0.0,
+                         options=dict(SymmetricMode=True))
+        return spla.LinearOperator((n, n), matvec=ilu.solve, dtype=float)
+
+    if precond == 'amg':
+        try:
+            import pyamg
+        except ImportError:
+            raise ImportError("Le preconditionneur 'amg' necessite pyamg "
+                              "(pip3 install pyamg)")
+        ml = pyamg.smoothed_aggregation_solver(sp.csr_matrix(A), **options)
+        return ml.aspreconditioner(cycle='V')
+
+    if precond == 'schwarz':
+        from schwarz import AdditiveSchwarz
+        if options.get('triangles') is None:
+            raise ValueError("Le preconditionneur 'schwarz' necessite la connectivite "
+                             "(option triangles)")
+        return AdditiveSchwarz(A, options['triangles'],
+                               n_subdomains=options.get('subdomains', 8),
+                               overlap=options.get('overlap', 1),
+                               coarse=options.get('coarse', True),
+                               fixed_dofs=options.get('fixed_dofs'),
+                               workers=options.get('workers'))
+
+    if precond == 'gmg':
+        from multigrid import GeometricMultigrid
+        if options.get('prolongations') is None:
+            raise ValueError("Le preconditionneur 'gmg' necessite la hierarchie de maillages "
+                             "(option prolongations)")
+        mg = GeometricMultigrid(A, options['prolongations'],
+                                nu1=options.get('nu1', 2), nu2=options.get('nu2', 2))
+        return mg.aspreconditioner(options.get('cycle', 'V'))
+
+    raise ValueError(f"Preconditionneur inconnu : {precond!r} (choix : {PRECONDITIONERS})")
+
+
+def conjugate_gradient(A, F, M=None, x0=None, tol: float = 1e-10,
+                       maxiter: int = None) -> Dict:
+    """
+    Gradient conjugue preconditionne
+
+    Arret quand ||r_k||_M / ||F||_M <= tol, avec ||r||_M = sqrt(r^T M r)
+    (norme euclidienne si M est None). Avec la penalisation (α = 10^8), la
+    norme euclidienne est dominee par les lignes du bord ; la norme M
+    (Jacobi, ILU, AMG) equilibre les lignes et controle aussi l'interieur.
+
+    A et M peuvent etre des matrices creuses ou des LinearOperator
+    (seuls les produits A @ v et M @ r sont utilises).
+
+    Returns:
+        dict avec 'solution', 'iterations', 'residuals' (historique de
+        ||r_k||_M / ||F||_M, k = 0..iterations) et 'converged'
+    """
+    n = F.shape[0]
+    maxiter = 10 * n if maxiter is None else maxiter
+
+    x = np.zeros(n) if x0 is None else np.array(x0, dtype=float)
+    r = F - A @ x if x0 is not None else F.copy()
+    z = r if M is None else M @ r
+    p = z.copy()
+    rz = r @ z
+
+    norm_F = np.sqrt(np.abs(F @ (F if M is None else M @ F)))
+    if norm_F == 0.0:
+        norm_F = 1.0
+
+    residuals = [np.sqrt(np.abs(rz)) / norm_F]
+    k = 0
+
+    while residuals[-1] > tol and k < maxiter:
+        Ap = A @ p
+        alpha = rz / (p @ Ap)
+        x += alpha * p
+        r -= alpha * Ap
+        k += 1
+
+        z = r if M is None else M @ r
+        rz_new = r @ z
+        residuals.append(np.sqrt(np.abs(rz_new)) / norm_F)
+
+        p = z + (rz_new / rz) * p
+        rz = rz_new
+
+    return {
+        'solution': x,
+        'iterations': k,
+        'residuals': np.array(residuals),
+        'converged': residuals[-1] <= tol
+    }
+
+
+def solve_linear_system(A, F, method: str = 'direct', precond: str = 'jacobi',
+                        tol: float = 1e-10, maxiter: int = None, x0=None,
+                        **precond_options) -> Dict:
+    """
+    Resolution de AU = F avec le solveur choisi
+
+    Args:
+        A: Matrice du systeme (sparse, ou LinearOperator pour 'cg')
+        F: Second membre
+        method: 'direct', 'umfpack' ou 'cg'
+        precond: Preconditionneur pour 'cg' ('none', 'jacobi', 'ilu', 'amg', 'schwarz', 'gmg')
+        tol: Tolerance sur le residu relatif (solveurs iteratifs)
+        maxiter: Nombre maximal d'iterations (solveurs iteratifs)
+        x0: Solution initiale (solveurs iteratifs)
+        precond_options: Options transmises a make_preconditioner
+
+    Returns:
+        dict avec 'solution', 'method', 'precond', 'iterations',
+        'residuals', 'converged', 'setup_time', 'solve_time'
+    """
+    t0 = time.perf_counter()
+
+    if method in ('direct', 'umfpack'):
+        if not sp.issparse(A):
+            raise ValueError(f"Le solveur {method!r} necessite une matrice assemblee "
+                             "(operateur sans matrice : utiliser method='cg')")
+        if method == 'umfpack':
+            # Sans scikit-umfpack, spsolve reviendrait silencieusement a SuperLU
+            try:
+                importlib.import_module('scikits.umfpack')
+            except ImportError:
+                raise ImportError("Le solveur 'umfpack' necessite scikit-umfpack "
+                                  "(pip3 install scikit-umfpack) ; sinon method='direct'")
+        A = sp.csc_matrix(A)
+        t1 = time.perf_counter()
+        U = spla.spsolve(A, F, use_umfpack=(method == 'umfpack'))
+        t2 = time.perf_counter()
+        residual = np.linalg.norm(F - A @ U) / max(np.linalg.norm(F), 1e-300)
+        return {
+            'solution': U,
+            'method': method,
+            'precond': None,
+            'iterations': 0,
+            'residuals': np.array([residual]),
+            'converged': bool(np.all(np.isfinite(U))),
+            'setup_time': t1 - t0,
+            'solve_time': t2 - t1
+        }
+
+    if method == 'cg':
+        M = make_preconditioner(A, precond, **precond_options)
+        t1 = time.perf_counter()
+        try:
+            result = conjugate_gradient(A, F, M=M, x0=x0, tol=tol, maxiter=maxiter)
+        finally:
+            if hasattr(M, 'close'):
+                M.close()            # processus du preconditionneur de Schwarz
+        t2 = time.perf_counter()
+        result.update({
+            'method': method,
+            'precond': precond,
+            'setup_time': t1 - t0,
+            'solve_time': t2 - t1
+        })
+        return result
+
+    raise ValueError(f"Solveur inconnu : {method!r} (choix : {SOLVERS})")
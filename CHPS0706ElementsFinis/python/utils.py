@@ -5,9 +5,20 @@ Fonctions utilitaires pour l'analyse des éléments finis
 Contient les fonctions communes pour lecture maillages, calculs Q/h, etc.
 """
 
+import os
+import sys
 import numpy as np
 from typing import Tuple, Dict
 
+try:
+    import resource
+except ImportError:  # Windows : pas de mesure de la memoire
+    resource = None
+
+sys.path.append(os.path.dirname(__file__))
+
+from mesh_io import read_msh
+
 # Exercice 1 : Solution exacte et second membre
 
 def u_exact(x: np.ndarray, y: np.ndarray) -> np.ndarray:
@@ -57,7 +68,7 @@ def u_dirichlet(x: np.ndarray, y: np.ndarray) -> np.ndarray:
 
 # Exercice 2 : Lecture et analyse des maillages
 
-def read_freefem_mesh(filename: str) -> Dict:
+def read_freefem_mesh(filename: str, cache: bool = False) -> Dict:
     """
     Lecture d'un maillage FreeFem++ au format .msh
 
@@ -66,39 +77,19 @@ def read_freefem_mesh(filename: str) -> Dict:
     Lignes suivantes : x y label (sommets)
     Puis : i1 i2 i3 label (triangles, indices 1-based)
     Puis : i1 i2 label (aretes bord, indices 1-based)
+
+    La lecture est deleguee au lecteur commun mesh_io.read_msh
+    (cache binaire optionnel avec cache=True).
     """
-    with open(filename, 'r') as f:
-        # Première ligne
-        first_line = f.readline().strip().split()
-        nv = int(first_line[0])   # nb sommets
-        nt = int(first_line[1])   # nb triangles
-        nbe = int(first_line[2])  # nb aretes bord
-
-        # Lecture sommets
-        vertices = np.zeros((nv, 3))  # x, y, label
-        for i in range(nv):
-            line = f.readline().strip().split()
-            vertices[i] = [float(line[0]), float(line[1]), int(line[2])]
-
-        # Lecture triangles (conversion indices 1-based -> 0-based)
-        triangles = np.zeros((nt, 4), dtype=int)  # i1, i2, i3, label
-        for i in range(nt):
-            line = f.readline().strip().split()
-            triangles[i] = [int(line[0])-1, int(line[1])-1, int(line[2])-1, int(line[3])]
-
-        # Lecture aretes bord
-        edges = np.zeros((nbe, 3), dtype=int)  # i1, i2, label
-        for i in range(nbe):
-            line = f.readline().strip().split()
-            edges[i] = [int(line[0])-1, int(line[1])-1, int(line[2])]
+    mesh = read_msh(filename, cache=cache)
 
     return {
-        'vertices': vertices,
-        'triangles': triangles,
-        'edges': edges,
-        'nv': nv,
-        'nt': nt,
-        'nbe': nbe
+        'vertices': np.column_stack([mesh['vertices'], mesh['vertex_labels']]),   # x, y, label
+        'triangles': np.column_stack([mesh['triangles'], mesh['triangle_labels']]),  # i1, i2, i3, label
+        'edges': np.column_stack([mesh['edges'], mesh['edge_labels']]),  # i1, i2, label
+        'nv': mesh['nv'],
+        'nt': mesh['nt'],
+        'nbe': mesh['nbe']
     }
 
 
@@ -161,43 +152,140 @@ def triangle_inradius(p1: np.ndarray, p2: np.ndarray, p3: np.ndarray) -> float:
     return 2.0 * area / perimeter
 
 
-def compute_mesh_characteristics(mesh_data: Dict) -> Tuple[float, float]:
+def compute_mesh_metrics(vertices: np.ndarray, triangles: np.ndarray) -> Dict:
     """
-    Calcul de la qualite Q et du pas h du maillage
+    Metriques de tous les triangles du maillage en un seul passage vectorise
 
-    Q_Th = max(Q_T) pour tous les triangles (qualite du pire triangle)
-    h = max(h_T) pour tous les triangles (pas du maillage)
+    Memes formules que triangle_quality / triangle_diameter / triangle_inradius :
+    - h_T = longueur de la plus grande arete
+    - r_T = 2 * Aire / Perimetre
+    - Q_T = (sqrt(3)/6) * (h_T / r_T)  (+infini pour un triangle degenere)
+
+    Args:
+        vertices: Coordonnees des sommets (nv x 2, ou nv x 3 avec label)
+        triangles: Connectivite (nt x 3, ou nt x 4 avec label)
+
+    Returns:
+        dict avec les tableaux par triangle 'Q_T', 'h_T', 'r_T', 'area'
+        et les reductions 'Q' = max(Q_T), 'h' = max(h_T)
     """
-    vertices = mesh_data['vertices']
-    triangles = mesh_data['triangles']
-    nt = mesh_data['nt']
+    p = vertices[triangles[:, :3], :2]          # (nt, 3, 2)
+    p1, p2, p3 = p[:, 0], p[:, 1], p[:, 2]
+
+    # Aretes
+    e1 = p2 - p1
+    e2 = p3 - p2
+    e3 = p1 - p3
+
+    l1 = np.sqrt(e1[:, 0]**2 + e1[:, 1]**2)
+    l2 = np.sqrt(e2[:, 0]**2 + e2[:, 1]**2)
+    l3 = np.sqrt(e3[:, 0]**2 + e3[:, 1]**2)
+
+    # Aire (produit vectoriel) et perimetre
+    area = 0.5 * np.abs(e1[:, 0] * e3[:, 1] - e1[:, 1] * e3[:, 0])
+    perimeter = l1 + l2 + l3
+
+    h_T = np.maximum(np.maximum(l1, l2), l3)
 
-    qualities = []
-    diameters = []
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r_T = np.where(perimeter > 0, 2.0 * area / perimeter, 0.0)
+        Q_T = np.where(r_T > 0, (np.sqrt(3.0) / 6.0) * (h_T / r_T), np.inf)
+
+    return {
+        'Q_T': Q_T,
+        'h_T': h_T,
+        'r_T': r_T,
+        'area': area,
+        'Q': float(Q_T.max()) if len(Q_T) else float('nan'),
+        'h': float(h_T.max()) if len(h_T) else float('nan')
+    }
 
-    for tri in triangles:
-        # Indices sommets
-        i1, i2, i3 = tri[0], tri[1], tri[2]
 
-        # Coordonnées
-        p1 = vertices[i1, :2]
-        p2 = vertices[i2, :2]
-        p3 = vertices[i3, :2]
+def mesh_quality_summary(metrics: Dict,
+                         quantiles: Tuple[float, ...] = (0.5, 0.9, 0.99),
+                         bins: int = 20) -> Dict:
+    """
+    Resume statistique de la qualite d'un maillage (sans boucle Python)
 
-        # Qualité et diametre
-        Q = triangle_quality(p1, p2, p3)
-        hT = triangle_diameter(p1, p2, p3)
+    Args:
+        metrics: Resultat de compute_mesh_metrics
+        quantiles: Quantiles a calculer pour Q_T et h_T
+        bins: Nombre de classes de l'histogramme de Q_T
 
-        qualities.append(Q)
-        diameters.append(hT)
+    Returns:
+        dict avec 'nt', min/moyenne/max et quantiles de Q_T et h_T,
+        histogramme de Q_T ('Q_hist', 'Q_bin_edges') et nombre de
+        triangles degeneres ('n_degenerate', Q_T infini)
+    """
+    Q_T = metrics['Q_T']
+    h_T = metrics['h_T']
+
+    finite = np.isfinite(Q_T)
+    Q_finite = Q_T[finite]
+
+    summary = {
+        'nt': len(Q_T),
+        'n_degenerate': int(np.count_nonzero(~finite)),
+        'Q_min': float(Q_finite.min()) if len(Q_finite) else float('nan'),
+        'Q_mean': float(Q_finite.mean()) if len(Q_finite) else float('nan'),
+        'Q_max': metrics['Q'],
+        'h_min': float(h_T.min()) if len(h_T) else float('nan'),
+        'h_mean': float(h_T.mean()) if len(h_T) else float('nan'),
+        'h_max': metrics['h'],
+        'Q_quantiles': {},
+        'h_quantiles': {}
+    }
 
-    # Qualité du maillage = MAX des qualités
-    Q_max = max(qualities)
+    if len(Q_finite):
+        for q, v in zip(quantiles, np.quantile(Q_finite, quantiles)):
+            summary['Q_quantiles'][q] = float(v)
+        summary['Q_hist'], summary['Q_bin_edges'] = np.histogram(Q_finite, bins=bins)
 
-    # Pas du maillage = MAX des diametres
-    h = max(diameters)
+    if len(h_T):
+        for q, v in zip(quantiles, np.quantile(h_T, quantiles)):
+            summary['h_quantiles'][q] = float(v)
 
-    return Q_max, h
+    return summary
+
+
+def barycentric_gradients(vertices, triangles):
+    """
+    Gradients des fonctions de base P1 de tous les triangles, sans inversion
+
+    Formule fermee a partir des vecteurs aretes : pour le sommet i, l'arete
+    opposee e_i = p_{i+2} - p_{i+1} donne
+        grad λ_i = (-e_i[y], e_i[x]) / (2 * Aire signee)
+
+    Args:
+        vertices: Coordonnees des sommets (nv × 2)
+        triangles: Connectivite (nt × 3)
+
+    Returns:
+        (grads, areas) : gradients (nt × 3 × 2) et aires (nt,)
+    """
+    p = vertices[triangles[:, :3], :2]          # (nt, 3, 2)
+    e = np.roll(p, -2, axis=1) - np.roll(p, -1, axis=1)   # aretes opposees
+
+    det = e[:, 2, 0] * e[:, 0, 1] - e[:, 2, 1] * e[:, 0, 0]   # 2 * Aire signee
+
+    grads = np.empty_like(e)
+    grads[:, :, 0] = -e[:, :, 1] / det[:, None]
+    grads[:, :, 1] = e[:, :, 0] / det[:, None]
+
+    return grads, 0.5 * np.abs(det)
+
+
+def compute_mesh_characteristics(mesh_data: Dict) -> Tuple[float, float]:
+    """
+    Calcul de la qualite Q et du pas h du maillage
+
+    Q_Th = max(Q_T) pour tous les triangles (qualite du pire triangle)
+    h = max(h_T) pour tous les triangles (pas du maillage)
+    """
+    metrics = compute_mesh_metrics(mesh_data['vertices'], mesh_data['triangles'])
+
+    # Qualité du maillage = MAX des qualités, pas du maillage = MAX des diametres
+    return metrics['Q'], metrics['h']
 
 
 # Exercice 4 : Calcul de l'ordre de convergence
@@ -214,3 +302,14 @@ def compute_convergence_order(e1: float, e2: float) -> float:
 
     p = np.log(e1 / e2) / np.log(2.0)
     return p
+
+
+# Mesures : memoire du processus
+
+def peak_rss_mb():
+    """Pic de memoire residente (RSS) du processus courant, en Mo (None si indisponible)"""
+    if resource is None:
+        return None
+    # ru_maxrss est en kilo-octets sous Linux, en octets sous macOS
+    scale = 1024.0 * 1024.0 if sys.platform == 'darwin' else 1024.0
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
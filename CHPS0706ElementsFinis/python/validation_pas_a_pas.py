@@ -22,8 +22,9 @@ from validation_pen import (
     fct_u, fct_uE, fct_f, fct_kappa, fct_alpha,
     coeffelem_P1_rigid, coeffelem_P1_source, coeffelem_P1_poids, coeffelem_P1_transf,
     read_freefem_mesh, assemblage_EF_P1, solve_fem_system, compute_H1_error,
-    grad_u_exact, triangle_area, edge_length
+    grad_u_exact, triangle_area
 )
+from utils import compute_mesh_metrics
 
 
 def test_element_triangle():
@@ -153,24 +154,9 @@ def test_mini_maillage(mesh_file="meshes/m00.msh"):
     print(f"{{ max(Uh) : {Uh.max():.2f}")
     print(f"{{ mean(Uh) : {Uh.mean():.2f}")
 
-    h_max = 0.0
-    Q_max = 0.0
-    for tri in triangles:
-        x1, y1 = vertices[tri[0]]
-        x2, y2 = vertices[tri[1]]
-        x3, y3 = vertices[tri[2]]
-
-        d12 = edge_length(x1, y1, x2, y2)
-        d23 = edge_length(x2, y2, x3, y3)
-        d31 = edge_length(x3, y3, x1, y1)
-        h_T = max(d12, d23, d31)
-        h_max = max(h_max, h_T)
-
-        area = triangle_area(x1, y1, x2, y2, x3, y3)
-        perim = d12 + d23 + d31
-        r_T = 2.0 * area / perim
-        Q_T = (np.sqrt(3) / 6.0) * h_T / r_T
-        Q_max = max(Q_max, Q_T)
+    metrics = compute_mesh_metrics(vertices, triangles)
+    h_max = metrics['h']
+    Q_max = metrics['Q']
 
     print(f"{{ h : {h_max:.3f}")
     print(f"{{ Q : {Q_max:.3f}")
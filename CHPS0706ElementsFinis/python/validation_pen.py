@@ -28,9 +28,21 @@ Usage :
 Auteur: CHPS0706 Éléments Finis - M1
 """
 
+import os
+import sys
+import warnings
 import numpy as np
 import scipy.sparse as sp
-import scipy.sparse.linalg as spla
+
+sys.path.append(os.path.dirname(__file__))
+
+from mesh_io import read_msh
+from mesh_topology import select_edges
+from utils import compute_mesh_metrics
+from error_norms import energy_norm_error
+from solvers import solve_linear_system
+from renumbering import (compute_ordering, renumber_mesh, matrix_profile_stats,
+                         format_ordering_report)
 
 
 # ============================================================================
@@ -304,7 +316,8 @@ def coeffelem_P1_transf(vertices_A, alpha_val, uE_func):
 # ASSEMBLAGE EF-P1 (Algorithme de l'Annexe)
 # ============================================================================
 
-def assemblage_EF_P1(vertices, triangles, edges, boundary_edges, kappa_func, f_func, alpha_func, uE_func):
+def assemblage_EF_P1(vertices, triangles, edges, boundary_edges, kappa_func, f_func, alpha_func, uE_func,
+                     mode='boucle', workers=None, verbose=True):
     """
     Assemblage de la matrice EF-P1 A et du second membre F
 
@@ -316,18 +329,43 @@ def assemblage_EF_P1(vertices, triangles, edges, boundary_edges, kappa_func, f_f
     Args:
         vertices: array (nv, 2) coordonnees des sommets
         triangles: array (nt, 3) indices des triangles (0-based)
-        edges: list des aretes avec labels
+        edges: aretes de bord avec labels, array (nbe, 3) : i1 i2 label
         boundary_edges: set des labels de bord Dirichlet (pour penalisation)
         kappa_func: Fonction κ(x, y)
         f_func: Fonction source f(x, y)
         alpha_func: Fonction α(x, y)
         uE_func: Fonction condition Dirichlet uE(x, y)
+        mode: 'boucle' (algorithme de l'annexe, triangle par triangle),
+              'vectorise' (tous les elements en un seul passage NumPy,
+              voir assemblage_EF_P1_vectorise), 'parallele' (triangles
+              repartis sur plusieurs processus, voir parallel_assembly.py)
+              ou 'sans_matrice' (A et K renvoyes comme operateurs, voir
+              matrix_free.py)
+        workers: Nombre de processus du mode 'parallele' (None : tous les coeurs)
+        verbose: Affichage des etapes d'assemblage
 
     Returns:
         A: Matrice assemblee (sparse CSR)
         F: Second membre assemble
         K: Matrice de rigidite (pour calcul erreur)
     """
+    if mode == 'vectorise':
+        return assemblage_EF_P1_vectorise(vertices, triangles, edges, boundary_edges,
+                                          kappa_func, f_func, alpha_func, uE_func,
+                                          verbose=verbose)
+    if mode == 'parallele':
+        from parallel_assembly import assemblage_EF_P1_parallele
+        return assemblage_EF_P1_parallele(vertices, triangles, edges, boundary_edges,
+                                          kappa_func, f_func, alpha_func, uE_func,
+                                          workers=workers, verbose=verbose)
+    if mode == 'sans_matrice':
+        from matrix_free import assemblage_EF_P1_sans_matrice
+        return assemblage_EF_P1_sans_matrice(vertices, triangles, edges, boundary_edges,
+                                             kappa_func, f_func, alpha_func, uE_func)
+    if mode != 'boucle':
+        raise ValueError(f"Mode d'assemblage inconnu : {mode!r} "
+                         "(attendu 'boucle', 'vectorise', 'parallele' ou 'sans_matrice')")
+
     nv = len(vertices)
     nt = len(triangles)
 
@@ -340,7 +378,8 @@ def assemblage_EF_P1(vertices, triangles, edges, boundary_edges, kappa_func, f_f
     # ========================================================================
     # ETAPE 2 : ADDITION DES TERMES VOLUMIQUES (Algorithme 2)
     # ========================================================================
-    print(f"  Assemblage volumique ({nt} triangles)...")
+    if verbose:
+        print(f"  Assemblage volumique ({nt} triangles)...")
 
     for l in range(nt):
 
@@ -372,41 +411,284 @@ def assemblage_EF_P1(vertices, triangles, edges, boundary_edges, kappa_func, f_f
     # ========================================================================
     # ETAPE 3 : ADDITION DES TERMES DE BORD FOURIER/ROBIN
     # ========================================================================
-    n_dirichlet_edges = sum(1 for _, _, label in edges if label in boundary_edges)
-    print(f"  Assemblage bord ({n_dirichlet_edges} aretes Dirichlet)...")
-
-    for i1, i2, label in edges:
-        if label in boundary_edges:
+    dirichlet = select_edges(edges, boundary_edges)
+    if verbose:
+        print(f"  Assemblage bord ({len(dirichlet)} aretes Dirichlet)...")
 
-            vertices_A = vertices[[i1, i2]]
+    for i1, i2 in dirichlet:
 
+        vertices_A = vertices[[i1, i2]]
 
-            xM = np.mean(vertices_A[:, 0])
-            yM = np.mean(vertices_A[:, 1])
-            alpha_val = alpha_func(xM, yM)
 
-            p_a = coeffelem_P1_poids(vertices_A, alpha_val)
-            e_a = coeffelem_P1_transf(vertices_A, alpha_val, uE_func)
+        xM = np.mean(vertices_A[:, 0])
+        yM = np.mean(vertices_A[:, 1])
+        alpha_val = alpha_func(xM, yM)
 
-            for i in range(2):
-                for j in range(2):
-                    I_global = [i1, i2][i]
-                    J_global = [i1, i2][j]
-                    A_lil[I_global, J_global] += p_a[i, j]
+        p_a = coeffelem_P1_poids(vertices_A, alpha_val)
+        e_a = coeffelem_P1_transf(vertices_A, alpha_val, uE_func)
 
+        for i in range(2):
+            for j in range(2):
                 I_global = [i1, i2][i]
-                F[I_global] += e_a[i]
+                J_global = [i1, i2][j]
+                A_lil[I_global, J_global] += p_a[i, j]
+
+            I_global = [i1, i2][i]
+            F[I_global] += e_a[i]
 
     A = A_lil.tocsr()
 
     return A, F, K
 
 
+# ============================================================================
+# ASSEMBLAGE EF-P1 VECTORISE (tous les elements en un seul passage)
+# ============================================================================
+
+def _eval_par_lot(func, x, y):
+    """
+    Evalue une fonction coefficient sur des tableaux de points
+
+    Les fonctions constantes (fct_kappa, fct_alpha) renvoient un scalaire :
+    on le diffuse a la taille des tableaux x, y.
+    """
+    return np.broadcast_to(np.asarray(func(x, y), dtype=float), np.shape(x))
+
+
+def coeffelem_P1_rigid_vect(coords_T, kappa_vals):
+    """
+    Matrices de rigidite elementaires k^l pour tous les triangles a la fois
+
+    Memes formules (Annexe) que coeffelem_P1_rigid, appliquees aux tableaux.
+
+    Args:
+        coords_T: array (nt, 3, 2) coordonnees des sommets de chaque triangle
+        kappa_vals: array (nt,) conductivite κ au barycentre de chaque triangle
+
+    Returns:
+        k: array (nt, 3, 3) des matrices de rigidite elementaires
+    """
+    x1, y1 = coords_T[:, 0, 0], coords_T[:, 0, 1]
+    x2, y2 = coords_T[:, 1, 0], coords_T[:, 1, 1]
+    x3, y3 = coords_T[:, 2, 0], coords_T[:, 2, 1]
+
+    area = triangle_area(x1, y1, x2, y2, x3, y3)
+    coef = kappa_vals / (4.0 * area)
+
+    k = np.empty((len(coords_T), 3, 3))
+
+    k[:, 0, 0] = coef * ((x2 - x3)**2 + (y2 - y3)**2)
+    k[:, 1, 1] = coef * ((x3 - x1)**2 + (y3 - y1)**2)
+    k[:, 2, 2] = coef * ((x1 - x2)**2 + (y1 - y2)**2)
+
+    k[:, 0, 1] = k[:, 1, 0] = coef * (-(x1 - x3) * (x2 - x3) - (y1 - y3) * (y2 - y3))
+    k[:, 0, 2] = k[:, 2, 0] = coef * (-(x3 - x2) * (x1 - x2) - (y3 - y2) * (y1 - y2))
+    k[:, 1, 2] = k[:, 2, 1] = coef * (-(x2 - x1) * (x3 - x1) - (y2 - y1) * (y3 - y1))
+
+    return k
+
+
+def coeffelem_P1_source_vect(coords_T, f_func):
+    """
+    Vecteurs sources elementaires f^l pour tous les triangles a la fois
+
+    Quadrature point milieu : f^l ≃ (mes(T_l)/3) * f(barycentre) * [1, 1, 1]^T
+
+    Args:
+        coords_T: array (nt, 3, 2) coordonnees des sommets de chaque triangle
+        f_func: Fonction source f(x, y) (evaluee une fois sur tous les barycentres)
+
+    Returns:
+        f: array (nt, 3) des vecteurs sources elementaires
+    """
+    x1, y1 = coords_T[:, 0, 0], coords_T[:, 0, 1]
+    x2, y2 = coords_T[:, 1, 0], coords_T[:, 1, 1]
+    x3, y3 = coords_T[:, 2, 0], coords_T[:, 2, 1]
+
+    area = triangle_area(x1, y1, x2, y2, x3, y3)
+
+    xG = (x1 + x2 + x3) / 3.0
+    yG = (y1 + y2 + y3) / 3.0
+
+    f_val = _eval_par_lot(f_func, xG, yG)
+
+    return np.repeat(((area / 3.0) * f_val)[:, None], 3, axis=1)
+
+
+def coeffelem_P1_masse_vect(coords_T):
+    """
+    Matrices de masse elementaires m^l pour tous les triangles a la fois
+
+    Args:
+        coords_T: array (nt, 3, 2) coordonnees des sommets de chaque triangle
+
+    Returns:
+        m: array (nt, 3, 3)
+    """
+    area = triangle_area(coords_T[:, 0, 0], coords_T[:, 0, 1], coords_T[:, 1, 0],
+                         coords_T[:, 1, 1], coords_T[:, 2, 0], coords_T[:, 2, 1])
+    return (area / 12.0)[:, None, None] * (np.ones((3, 3)) + np.eye(3))
+
+
+def coeffelem_P1_poids_vect(coords_A, alpha_vals):
+    """
+    Matrices de poids p^a pour toutes les aretes de bord a la fois
+
+    Args:
+        coords_A: array (na, 2, 2) coordonnees des 2 sommets de chaque arete
+        alpha_vals: array (na,) parametre α au milieu de chaque arete
+
+    Returns:
+        p: array (na, 2, 2) des matrices de poids
+    """
+    length = edge_length(coords_A[:, 0, 0], coords_A[:, 0, 1],
+                         coords_A[:, 1, 0], coords_A[:, 1, 1])
+
+    coef = length * alpha_vals / 6.0
+    return coef[:, None, None] * np.array([[2.0, 1.0],
+                                           [1.0, 2.0]])
+
+
+def coeffelem_P1_transf_vect(coords_A, alpha_vals, uE_func):
+    """
+    Vecteurs de flux exterieur e^a pour toutes les aretes de bord a la fois
+
+    Args:
+        coords_A: array (na, 2, 2) coordonnees des 2 sommets de chaque arete
+        alpha_vals: array (na,) parametre α au milieu de chaque arete
+        uE_func: Fonction uE(x, y) (evaluee une fois sur tous les milieux)
+
+    Returns:
+        e: array (na, 2) des vecteurs de flux
+    """
+    x1, y1 = coords_A[:, 0, 0], coords_A[:, 0, 1]
+    x2, y2 = coords_A[:, 1, 0], coords_A[:, 1, 1]
+
+    length = edge_length(x1, y1, x2, y2)
+
+    xM = (x1 + x2) / 2.0
+    yM = (y1 + y2) / 2.0
+
+    uE_val = _eval_par_lot(uE_func, xM, yM)
+
+    return np.repeat(((length / 2.0) * alpha_vals * uE_val)[:, None], 2, axis=1)
+
+
+def _triplets_coo(connect, blocs):
+    """
+    Triplets COO (rows, cols, vals) des blocs elementaires (ne, k, k)
+    de connectivite (ne, k), dans l'ordre de l'algorithme de l'annexe
+    """
+    k = connect.shape[1]
+    rows = np.repeat(connect, k, axis=1).ravel()
+    cols = np.tile(connect, (1, k)).ravel()
+    return rows, cols, blocs.ravel()
+
+
+def _coo_vers_csr(rows, cols, vals, n):
+    """Matrice CSR (n, n) par sommation des doublons des triplets COO"""
+    M = sp.coo_matrix((vals, (rows, cols)), shape=(n, n)).tocsr()
+    # Meme structure que l'assemblage LIL (pas de zeros explicites)
+    M.eliminate_zeros()
+    return M
+
+
+def assemblage_masse_P1(vertices, triangles):
+    """Matrice de masse P1 M (sparse CSR), M_ij = ∫ φ_i φ_j"""
+    vertices = np.asarray(vertices, dtype=float)[:, :2]
+    triangles = np.asarray(triangles)[:, :3]
+    m = coeffelem_P1_masse_vect(vertices[triangles])
+    return _coo_vers_csr(*_triplets_coo(triangles, m), len(vertices))
+
+
+def termes_bord_P1_vect(vertices, edges, boundary_edges, alpha_func, uE_func):
+    """
+    Termes de bord Fourier-Robin (etape 3) de toutes les aretes Dirichlet
+
+    Returns:
+        (dirichlet, p, e) : aretes (na, 2), matrices de poids p^a (na, 2, 2)
+        et vecteurs de flux e^a (na, 2)
+    """
+    dirichlet = select_edges(edges, boundary_edges)
+    coords_A = vertices[dirichlet]
+    xM = coords_A[:, :, 0].mean(axis=1)
+    yM = coords_A[:, :, 1].mean(axis=1)
+    alpha_vals = _eval_par_lot(alpha_func, xM, yM)
+
+    p = coeffelem_P1_poids_vect(coords_A, alpha_vals)
+    e = coeffelem_P1_transf_vect(coords_A, alpha_vals, uE_func)
+    return dirichlet, p, e
+
+
+def assemblage_EF_P1_vectorise(vertices, triangles, edges, boundary_edges,
+                               kappa_func, f_func, alpha_func, uE_func, verbose=True):
+    """
+    Assemblage EF-P1 par lots : meme resultat que assemblage_EF_P1 (mode 'boucle')
+
+    Etape 2 : les nt matrices k^l (nt, 3, 3) et vecteurs f^l (nt, 3) sont
+              calcules en une fois, puis assembles via des triplets COO.
+    Etape 3 : idem pour les na aretes Dirichlet, p^a (na, 2, 2) et e^a (na, 2).
+
+    Les fonctions f_func et uE_func doivent accepter des tableaux NumPy ;
+    kappa_func et alpha_func peuvent renvoyer un scalaire (coefficient constant).
+
+    Args:
+        memes arguments que assemblage_EF_P1
+        verbose: Affichage des etapes d'assemblage
+
+    Returns:
+        A: Matrice assemblee (sparse CSR)
+        F: Second membre assemble
+        K: Matrice de rigidite (pour calcul erreur)
+    """
+    vertices = np.asarray(vertices, dtype=float)[:, :2]
+    triangles = np.asarray(triangles)[:, :3]
+    edges = np.asarray(edges, dtype=int).reshape(-1, 3)
+    nv = len(vertices)
+    nt = len(triangles)
+
+    # ========================================================================
+    # ETAPE 2 : TERMES VOLUMIQUES (tous les triangles)
+    # ========================================================================
+    if verbose:
+        print(f"  Assemblage volumique ({nt} triangles, vectorise)...")
+
+    coords_T = vertices[triangles]
+    xG = coords_T[:, :, 0].mean(axis=1)
+    yG = coords_T[:, :, 1].mean(axis=1)
+    kappa_vals = _eval_par_lot(kappa_func, xG, yG)
+
+    k = coeffelem_P1_rigid_vect(coords_T, kappa_vals)
+    f = coeffelem_P1_source_vect(coords_T, f_func)
+
+    rows_T, cols_T, vals_T = _triplets_coo(triangles, k)
+    K = _coo_vers_csr(rows_T, cols_T, vals_T, nv)
+
+    # ========================================================================
+    # ETAPE 3 : TERMES DE BORD FOURIER/ROBIN (toutes les aretes Dirichlet)
+    # ========================================================================
+    dirichlet, p, e = termes_bord_P1_vect(vertices, edges, boundary_edges, alpha_func, uE_func)
+    if verbose:
+        print(f"  Assemblage bord ({len(dirichlet)} aretes Dirichlet, vectorise)...")
+
+    # Termes de bord ajoutes a la suite des termes volumiques : les sommes
+    # sont effectuees dans le meme ordre que l'algorithme de l'annexe
+    rows_A, cols_A, vals_A = _triplets_coo(dirichlet, p)
+    A = _coo_vers_csr(np.concatenate([rows_T, rows_A]),
+                      np.concatenate([cols_T, cols_A]),
+                      np.concatenate([vals_T, vals_A]), nv)
+    F = np.bincount(np.concatenate([triangles.ravel(), dirichlet.ravel()]),
+                    weights=np.concatenate([f.ravel(), e.ravel()]),
+                    minlength=nv)
+
+    return A, F, K
+
+
 # ============================================================================
 # LECTURE MAILLAGE FREEFEM++ (.msh)
 # ============================================================================
 
-def read_freefem_mesh(filename):
+def read_freefem_mesh(filename, cache=False):
     """
     Lecture d'un maillage FreeFem++ au format .msh
 
@@ -416,46 +698,30 @@ def read_freefem_mesh(filename):
         Puis : triangles (i1 i2 i3 label)
         Puis : aretes bord (i1 i2 label)
 
+    La lecture est deleguee au lecteur commun mesh_io.read_msh.
+
     Args:
         filename: Chemin vers le fichier .msh
+        cache: Reutiliser le cache binaire <filename>.npz s'il est a jour
 
     Returns:
-        dict avec 'vertices', 'triangles', 'edges', 'dirichlet_labels'
+        dict avec 'vertices', 'triangles', 'edges' (array (nbe, 3) : i1 i2 label),
+        'dirichlet_labels'
     """
-    with open(filename, 'r') as f:
-        first_line = f.readline().strip().split()
-        nv = int(first_line[0])
-        nt = int(first_line[1])
-        nbe = int(first_line[2])
-
-        vertices = np.zeros((nv, 2))
-        for i in range(nv):
-            line = f.readline().strip().split()
-            vertices[i] = [float(line[0]), float(line[1])]
-
-
-        triangles = np.zeros((nt, 3), dtype=int)
-        for i in range(nt):
-            line = f.readline().strip().split()
-            triangles[i] = [int(line[0])-1, int(line[1])-1, int(line[2])-1]
+    mesh = read_msh(filename, cache=cache)
 
-
-        edges = []
-        for i in range(nbe):
-            line = f.readline().strip().split()
-            i1, i2, label = int(line[0])-1, int(line[1])-1, int(line[2])
-            edges.append((i1, i2, label))
+    edges = np.column_stack([mesh['edges'], mesh['edge_labels']])
 
     dirichlet_labels = {1}
 
     return {
-        'vertices': vertices,
-        'triangles': triangles,
+        'vertices': mesh['vertices'],
+        'triangles': mesh['triangles'],
         'edges': edges,
         'dirichlet_labels': dirichlet_labels,
-        'nv': nv,
-        'nt': nt,
-        'nbe': nbe
+        'nv': mesh['nv'],
+        'nt': mesh['nt'],
+        'nbe': mesh['nbe']
     }
 
 
@@ -463,19 +729,41 @@ def read_freefem_mesh(filename):
 # RESOLUTION ET CALCUL D'ERREUR
 # ============================================================================
 
-def solve_fem_system(A, F):
+def solve_fem_system(A, F, solver='direct', return_info=False, verbose=True, **solver_options):
     """
     Resolution du systeme lineaire AU^h = F
 
     Args:
         A: Matrice du systeme (sparse CSR)
         F: Second membre
+        solver: 'direct' (SuperLU), 'umfpack' ou 'cg' (voir solvers.py)
+        return_info: Renvoyer aussi le dict d'informations du solveur
+        verbose: Affichage de la resolution (iterations et residu du CG)
+        solver_options: precond ('none', 'jacobi', 'ilu', 'amg', 'schwarz', 'gmg'), tol, maxiter...
 
     Returns:
-        Uh: Solution EF-P1
+        Uh: Solution EF-P1 (et dict d'informations si return_info)
+
+    Un gradient conjugue non converge (maxiter atteint) emet un
+    RuntimeWarning : Uh n'est alors qu'une approximation du systeme.
     """
-    print("  Resolution du systeme lineaire...")
-    Uh = spla.spsolve(A, F)
+    if verbose:
+        print("  Resolution du systeme lineaire...")
+    info = solve_linear_system(A, F, method=solver, **solver_options)
+    Uh = info['solution']
+
+    if info['method'] == 'cg':
+        if verbose:
+            status = "converge" if info['converged'] else "NON converge"
+            print(f"  CG ({info['precond']}) : {info['iterations']} iterations, "
+                  f"residu relatif {info['residuals'][-1]:.2e} ({status})")
+        if not info['converged']:
+            warnings.warn(f"CG ({info['precond']}) non converge apres {info['iterations']} "
+                          f"iterations (residu relatif {info['residuals'][-1]:.2e})",
+                          RuntimeWarning, stacklevel=2)
+
+    if return_info:
+        return Uh, info
     return Uh
 
 
@@ -495,6 +783,7 @@ def compute_H1_error(Uh, vertices, triangles, K, u_exact_func, grad_u_exact_func
 
     Pour la vraie semi-norme H^1, il faudrait integrer les gradients :
         ||e||_{H^1} = sqrt(int_Omega |grad(u - u_h)|^2 dx)
+    (voir error_norms.compute_error_norms, quadrature de Gauss configurable)
 
     Args:
         Uh: Solution EF-P1 (vecteur N)
@@ -507,12 +796,9 @@ def compute_H1_error(Uh, vertices, triangles, K, u_exact_func, grad_u_exact_func
     Returns:
         error_H1: Erreur en norme energie (notation conservee pour compatibilite)
     """
-    # Interpolee de la solution exacte aux noeuds
-    U = np.array([u_exact_func(x, y) for x, y in vertices])
-
-    # Erreur : e_h = sqrt((U - Uh)^T K (U - Uh))
-    diff = U - Uh
-    error_H1 = np.sqrt(np.abs(diff.T @ K @ diff))
+    # Interpolee de la solution exacte aux noeuds (evaluee en un seul appel)
+    # puis erreur : e_h = sqrt((U - Uh)^T K (U - Uh))
+    error_H1 = energy_norm_error(Uh, vertices, K, u_exact_func)
 
     return error_H1
 
@@ -521,13 +807,26 @@ def compute_H1_error(Uh, vertices, triangles, K, u_exact_func, grad_u_exact_func
 # FONCTION PRINCIPALE
 # ============================================================================
 
-def main(mesh_file, verbose=True):
+def main(mesh_file, verbose=True, mode='vectorise', cache=False, solver='direct',
+         renumber=None, **solver_options):
     """
     Fonction principale : resolution du probleme EF-P1 avec penalisation
 
     Args:
         mesh_file: Chemin vers le fichier maillage .msh
         verbose: Affichage detaille
+        mode: Mode d'assemblage ('vectorise' par defaut, 'boucle', 'parallele'
+              ou 'sans_matrice', a resoudre avec solver='cg')
+        cache: Reutiliser le cache binaire du maillage (<mesh_file>.npz)
+        solver: Solveur lineaire ('direct', 'umfpack' ou 'cg')
+        renumber: Renumerotation des sommets avant assemblage (None, 'rcm'
+                  ou 'nd', voir renumbering.py) ; Uh est renvoye dans la
+                  numerotation d'origine
+        solver_options: Options du solveur (precond, tol, maxiter ; subdomains,
+                        overlap, coarse, workers pour precond='schwarz' ;
+                        coarse_meshes, liste des maillages plus grossiers
+                        que mesh_file (niveaux de la multigrille), et cycle
+                        pour precond='gmg')
 
     Returns:
         dict avec resultats (Uh, error_H1, h, Q, nv, nt)
@@ -544,7 +843,7 @@ def main(mesh_file, verbose=True):
     if verbose:
         print("\n[1/5] Lecture du maillage...")
 
-    mesh = read_freefem_mesh(mesh_file)
+    mesh = read_freefem_mesh(mesh_file, cache=cache)
     vertices = mesh['vertices']
     triangles = mesh['triangles']
     edges = mesh['edges']
@@ -556,6 +855,13 @@ def main(mesh_file, verbose=True):
         print(f"  Nombre de triangles : {nt}")
         print(f"  Nombre d'aretes bord: {mesh['nbe']}")
 
+    # Renumerotation optionnelle (inv ramene les resultats a l'ordre d'origine)
+    perm = compute_ordering(vertices, triangles, renumber)
+    if perm is not None:
+        vertices, triangles, edges, inv = renumber_mesh(vertices, triangles, edges, perm)
+        if verbose:
+            print(f"  Renumerotation      : {renumber}")
+
     # ========================================================================
     # ASSEMBLAGE EF-P1
     # ========================================================================
@@ -564,20 +870,46 @@ def main(mesh_file, verbose=True):
 
     A, F, K = assemblage_EF_P1(
         vertices, triangles, edges, dirichlet_labels,
-        fct_kappa, fct_f, fct_alpha, fct_uE
+        fct_kappa, fct_f, fct_alpha, fct_uE, mode=mode, verbose=verbose
     )
 
     if verbose:
-        print(f"  Matrice A : {A.shape}, {A.nnz} elements non-nuls")
+        if sp.issparse(A):
+            print(f"  Matrice A : {A.shape}, {A.nnz} elements non-nuls")
+        else:
+            print(f"  Operateur A : {A.shape}, sans matrice ({A.nbytes / 1e6:.1f} Mo de facteurs)")
         print(f"  Vecteur F : {F.shape}")
 
+    ordering_stats = None
+    if perm is not None and sp.issparse(A):
+        # Matrice dans l'ordre d'origine : A_origine = A[inv][:, inv]
+        ordering_stats = {'before': matrix_profile_stats(A[inv][:, inv]),
+                          'after': matrix_profile_stats(A)}
+        if verbose:
+            print(format_ordering_report(ordering_stats['before'], ordering_stats['after'],
+                                         renumber))
+
     # ========================================================================
     # RESOLUTION
     # ========================================================================
     if verbose:
         print("\n[3/5] Resolution du systeme AU^h = F...")
 
-    Uh = solve_fem_system(A, F)
+    if solver_options.get('precond') == 'schwarz':
+        from schwarz import schwarz_options
+        solver_options = {**schwarz_options({'triangles': triangles, 'edges': edges},
+                                            dirichlet_labels), **solver_options}
+    if solver_options.get('precond') == 'gmg':
+        # Hierarchie : maillages grossiers interpoles jusqu'aux sommets (renumerotes) du systeme
+        from multigrid import mesh_prolongations
+        coarse_meshes = solver_options.pop('coarse_meshes', ())
+        solver_options.setdefault('prolongations',
+                                  mesh_prolongations(coarse_meshes, vertices, cache=cache))
+        if verbose:
+            print(f"  Multigrille : {len(solver_options['prolongations']) + 1} niveaux")
+
+    Uh, solver_info = solve_fem_system(A, F, solver=solver, return_info=True, verbose=verbose,
+                                       **solver_options)
 
     if verbose:
         print(f"  min(U^h) = {Uh.min():.6f}")
@@ -601,30 +933,17 @@ def main(mesh_file, verbose=True):
     if verbose:
         print("\n[5/5] Caracteristiques du maillage...")
 
-    h_max = 0.0
-    Q_max = 0.0
-
-    for tri in triangles:
-        x1, y1 = vertices[tri[0]]
-        x2, y2 = vertices[tri[1]]
-        x3, y3 = vertices[tri[2]]
-
-        d12 = edge_length(x1, y1, x2, y2)
-        d23 = edge_length(x2, y2, x3, y3)
-        d31 = edge_length(x3, y3, x1, y1)
-        h_T = max(d12, d23, d31)
-        h_max = max(h_max, h_T)
-
-        area = triangle_area(x1, y1, x2, y2, x3, y3)
-        perim = d12 + d23 + d31
-        r_T = 2.0 * area / perim
-        Q_T = (np.sqrt(3) / 6.0) * h_T / r_T
-        Q_max = max(Q_max, Q_T)
+    metrics = compute_mesh_metrics(vertices, triangles)
+    h_max = metrics['h']
+    Q_max = metrics['Q']
 
     if verbose:
         print(f"  Pas h         : {h_max:.16f}")
         print(f"  Qualite Q     : {Q_max:.16f}")
 
+    if perm is not None:
+        Uh = Uh[inv]
+
     # ========================================================================
     # RESULTATS
     # ========================================================================
@@ -644,7 +963,13 @@ def main(mesh_file, verbose=True):
         'Q': Q_max,
         'nv': nv,
         'nt': nt,
-        'mesh_file': mesh_file
+        'mesh_file': mesh_file,
+        'solver': solver_info['method'],
+        'iterations': solver_info['iterations'],
+        'residuals': solver_info['residuals'],
+        'converged': solver_info['converged'],
+        'solve_time': solver_info['setup_time'] + solver_info['solve_time'],
+        'ordering_stats': ordering_stats
     }
 
 
@@ -656,9 +981,18 @@ if __name__ == "__main__":
     import sys
 
     if len(sys.argv) < 2:
-        print("Usage: python validation_pen.py <mesh_file.msh>")
+        print("Usage: python validation_pen.py <mesh_file.msh> [boucle|vectorise|parallele|sans_matrice] "
+              "[direct|umfpack|cg] [none|jacobi|ilu|amg|schwarz|gmg] [none|rcm|nd] [maillages grossiers...]")
         print("Exemple: python validation_pen.py meshes/m1.msh")
+        print("         python validation_pen.py meshes/m4.msh vectorise cg gmg none "
+              "meshes/m1.msh meshes/m2.msh meshes/m3.msh")
         sys.exit(1)
 
     mesh_file = sys.argv[1]
-    results = main(mesh_file, verbose=True)
+    mode = sys.argv[2] if len(sys.argv) > 2 else 'vectorise'
+    solver = sys.argv[3] if len(sys.argv) > 3 else 'direct'
+    precond = sys.argv[4] if len(sys.argv) > 4 else 'jacobi'
+    renumber = sys.argv[5] if len(sys.argv) > 5 else None
+    options = {'coarse_meshes': sys.argv[6:]} if precond == 'gmg' else {}
+    results = main(mesh_file, verbose=True, mode=mode, solver=solver, precond=precond,
+                   renumber=renumber, **options)